@@ -7,7 +7,7 @@ API System
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.openapi.docs import get_swagger_ui_html
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, RedirectResponse, FileResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, FileResponse, PlainTextResponse
 from typing import Callable, Dict, List, Set, Optional, Any, Tuple, Type
 from functools import wraps, partial
 import inspect
@@ -21,6 +21,7 @@ from starlette.requests import Request
 from fastapi import FastAPI
 from core.plugin import PluginManager
 from utils.image_manager import image_manager as global_image_manager
+from utils.memory_cache import LRUCache, get_all_cache_stats
 
 # 全局变量来持有CoreApp实例
 _core_app_instance = None
@@ -50,28 +51,23 @@ def set_core_app(app_instance):
     _core_app_instance = app_instance
 
 
-# 请求计数器
-request_counts = {}
-last_cleanup = time.time()
+# 请求计数器：client_ip -> [本窗口内的请求数]，每个 IP 的窗口从首次请求起 60 秒后过期
+request_counts = LRUCache(max_entries=10000, name="api_rate_limit")
 
 class RateLimitMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request: Request, call_next):
-        # 清理旧的请求记录
-        global last_cleanup
-        now = time.time()
-        if now - last_cleanup > 60:  # 每分钟清理一次
-            request_counts.clear()
-            last_cleanup = now
-            
         # 获取客户端IP
         client_ip = request.client.host
         
         # 检查请求频率
         if "/images/" in request.url.path:
-            minute_count = request_counts.get(client_ip, 0)
-            if minute_count > 60:  # 每分钟最多60次请求
+            window = request_counts.get(client_ip)
+            if window is None:
+                request_counts.set(client_ip, [1], ttl=60)
+            elif window[0] > 60:  # 每分钟最多60次请求
                 raise HTTPException(status_code=429, detail="Too many requests")
-            request_counts[client_ip] = minute_count + 1
+            else:
+                window[0] += 1
             
         response = await call_next(request)
         return response
@@ -110,7 +106,6 @@ async def root():
 @app.get("/health", include_in_schema=False)
 async def health_check():
     """健康检查端点 - 用于 Docker 容器健康检查"""
-    import time
     from utils.redis_manager import redis_manager
     
     health_status = {
@@ -132,8 +127,109 @@ async def health_check():
         health_status["services"]["redis"] = f"error: {str(e)}"
         health_status["status"] = "degraded"
     
+    # 上游熔断器状态
+    from utils.base_api import BaseAPI
+    health_status["upstreams"] = {
+        host: stats["state"] for host, stats in BaseAPI.get_circuit_breaker_stats().items()
+    }
+    
     return health_status
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics(request: Request, format: str = "prometheus"):
+    """上游请求指标 (按端点模板)；默认仅允许本机抓取"""
+    if not Settings.SERVER_API_METRICS_PUBLIC and request.client.host not in ("127.0.0.1", "::1", "localhost"):
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+    from utils.base_api import BaseAPI
+    from utils.metrics import upstream_metrics
+    from core.mode_board import ModeBoardAPI
+    from utils.render_cache import render_cache
+    from utils.template_assets import template_assets
+    from utils.browser import browser_manager
+    from utils.prerender import prerender_scheduler
+    if format == "json":
+        return {
+            "endpoints": BaseAPI.get_upstream_metrics(),
+            "mode_boards": ModeBoardAPI.get_all_lookup_stats(),
+            "cache_layers": BaseAPI.get_cache_layer_stats(),
+            "singleflight": BaseAPI.get_singleflight_stats(),
+            "connections": BaseAPI.get_connection_stats(),
+            "memory_caches": get_all_cache_stats(),
+            "render_cache": render_cache.get_stats(),
+            "template_assets": template_assets.get_stats(),
+            "page_pool": browser_manager.get_stats(),
+            "render_queue": browser_manager.render_queue.get_stats(),
+            "prerender": prerender_scheduler.get_stats(),
+        }
+    lines = [
+        "# HELP mode_board_lookups_total Player lookups on mode board snapshots by outcome",
+        "# TYPE mode_board_lookups_total counter",
+    ]
+    for mode, stats in ModeBoardAPI.get_all_lookup_stats().items():
+        for outcome in ("hits", "fallbacks", "fallback_hits", "misses"):
+            lines.append(f'mode_board_lookups_total{{mode="{mode}",outcome="{outcome}"}} {stats[outcome]}')
+    lines += ["# HELP memory_cache_lookups_total In-process cache lookups by outcome",
+              "# TYPE memory_cache_lookups_total counter"]
+    cache_stats = get_all_cache_stats()
+    for name, stats in cache_stats.items():
+        lines.append(f'memory_cache_lookups_total{{cache="{name}",outcome="hit"}} {stats["hits"]}')
+        lines.append(f'memory_cache_lookups_total{{cache="{name}",outcome="miss"}} {stats["misses"]}')
+    lines += ["# HELP memory_cache_bytes Accounted size of in-process cache entries",
+              "# TYPE memory_cache_bytes gauge"]
+    for name, stats in cache_stats.items():
+        lines.append(f'memory_cache_bytes{{cache="{name}"}} {stats["bytes"]}')
+    lines += ["# HELP render_cache_lookups_total Rendered image cache lookups by outcome",
+              "# TYPE render_cache_lookups_total counter"]
+    render_stats = render_cache.get_stats()
+    for outcome, key in (("l1_hit", "l1_hits"), ("l2_hit", "l2_hits"), ("miss", "misses"), ("coalesced", "coalesced")):
+        lines.append(f'render_cache_lookups_total{{outcome="{outcome}"}} {render_stats[key]}')
+    pool_stats = browser_manager.get_stats()
+    lines += [
+        "# HELP browser_page_pool_pages Browser pages in the render pool by state",
+        "# TYPE browser_page_pool_pages gauge",
+        f'browser_page_pool_pages{{state="idle"}} {pool_stats["idle"]}',
+        f'browser_page_pool_pages{{state="busy"}} {pool_stats["busy"]}',
+        "# HELP browser_page_pool_utilization Fraction of pool pages in use",
+        "# TYPE browser_page_pool_utilization gauge",
+        f'browser_page_pool_utilization {pool_stats["utilization"]}',
+        "# HELP browser_page_pool_waiting Render requests waiting for a page",
+        "# TYPE browser_page_pool_waiting gauge",
+        f'browser_page_pool_waiting {pool_stats["waiting"]}',
+        "# HELP browser_page_pool_wait_seconds Time spent waiting for a pool page",
+        "# TYPE browser_page_pool_wait_seconds summary",
+        f'browser_page_pool_wait_seconds_sum {pool_stats["wait_seconds_sum"]:.6f}',
+        f'browser_page_pool_wait_seconds_count {pool_stats["acquires"]}',
+        "# HELP browser_page_pool_scale_events_total Page pool resize events by direction",
+        "# TYPE browser_page_pool_scale_events_total counter",
+        f'browser_page_pool_scale_events_total{{direction="up"}} {pool_stats["scale_ups"]}',
+        f'browser_page_pool_scale_events_total{{direction="down"}} {pool_stats["scale_downs"]}',
+    ]
+    queue_stats = browser_manager.render_queue.get_stats()
+    lines += [
+        "# HELP render_queue_depth Render requests waiting for a page by priority",
+        "# TYPE render_queue_depth gauge",
+        f'render_queue_depth{{priority="interactive"}} {queue_stats["depth_interactive"]}',
+        f'render_queue_depth{{priority="background"}} {queue_stats["depth_background"]}',
+        "# HELP render_queue_dropped_total Render requests dropped before starting by reason",
+        "# TYPE render_queue_dropped_total counter",
+        f'render_queue_dropped_total{{reason="expired"}} {queue_stats["dropped_expired"]}',
+        f'render_queue_dropped_total{{reason="full"}} {queue_stats["dropped_full"]}',
+    ]
+    prerender_stats = prerender_scheduler.get_stats()
+    lines += [
+        "# HELP prerender_jobs_total Background card pre-render job runs by outcome",
+        "# TYPE prerender_jobs_total counter",
+        f'prerender_jobs_total{{outcome="rendered"}} {prerender_stats["runs"]}',
+        f'prerender_jobs_total{{outcome="failed"}} {prerender_stats["failures"]}',
+        "# HELP prerender_notifications_total Data refresh notifications received by the pre-render scheduler",
+        "# TYPE prerender_notifications_total counter",
+        f'prerender_notifications_total{{outcome="scheduled"}} {prerender_stats["notifications"] - prerender_stats["coalesced"]}',
+        f'prerender_notifications_total{{outcome="coalesced"}} {prerender_stats["coalesced"]}',
+    ]
+    body = upstream_metrics.render_prometheus() + "\n".join(lines) + "\n"
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
 @app.get("/docs", include_in_schema=False)
 async def docs():
     return HTMLResponse("""
@@ -5,12 +5,16 @@ from typing import TYPE_CHECKING, Any, Set
 from utils.config import settings
 from utils.logger import bot_logger
 from utils.message_handler import MessageHandler
+from utils.render_queue import render_context
 from core.plugin import PluginManager
 from .events import GenericMessage
 
 if TYPE_CHECKING:
     from asyncio import Task
 
+# 单条消息的处理时限(秒)，其中发起的渲染以此为截止时间
+MESSAGE_TIMEOUT = 30
+
 class CoreApp:
     """
     应用核心类，包含所有与平台无关的业务逻辑。
@@ -57,9 +61,10 @@ class CoreApp:
 
         # 交由插件处理
         try:
-            async with self.semaphore, asyncio.timeout(30):  # 使用配置的超时
-                if await self.plugin_manager.handle_message(handler, message.content):
-                    return
+            async with self.semaphore, asyncio.timeout(MESSAGE_TIMEOUT):
+                with render_context(timeout=MESSAGE_TIMEOUT):
+                    if await self.plugin_manager.handle_message(handler, message.content):
+                        return
         except asyncio.TimeoutError:
             await handler.send_text("⚠️ 处理超时，请稍后重试")
         except Exception:
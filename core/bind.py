@@ -6,6 +6,7 @@ from datetime import datetime
 from typing import Optional, Dict, List, Callable, Any
 from utils.logger import bot_logger
 from utils.templates import SEPARATOR
+from utils.memory_cache import LRUCache
 from pathlib import Path
 
 class BindManager:
@@ -39,9 +40,8 @@ class BindManager:
         self.bindings: Dict[str, Dict[str, Any]] = {}
         
         # 缓存配置
-        self._cache: Dict[str, str] = {}
         self._cache_ttl = 300  # 缓存有效期（秒）
-        self._last_cache_cleanup = datetime.now()
+        self._cache = LRUCache(max_entries=10000, name="bind")  # user_id -> game_id
         
         # 锁配置
         self._lock = asyncio.Lock()
@@ -174,18 +174,9 @@ class BindManager:
 
     def _update_cache(self) -> None:
         """更新缓存"""
-        self._cache = {
-            user_id: data["game_id"] 
-            for user_id, data in self.bindings.items()
-        }
-        self._last_cache_cleanup = datetime.now()
-
-    def _clean_cache(self) -> None:
-        """清理过期缓存"""
-        now = datetime.now()
-        if (now - self._last_cache_cleanup).total_seconds() > self._cache_ttl:
-            self._cache.clear()
-            self._last_cache_cleanup = now
+        self._cache.clear()
+        for user_id, data in self.bindings.items():
+            self._cache.set(user_id, data["game_id"], self._cache_ttl)
 
     async def _retry_operation(self, operation, *args, **kwargs):
         """带重试机制的操作执行器"""
@@ -246,7 +237,7 @@ class BindManager:
             }
             
             # 更新缓存（在锁内）
-            self._cache[user_id] = game_id
+            self._cache.set(user_id, game_id, self._cache_ttl)
             
             # 异步保存到文件（在主锁外）
             await self._save_bindings_async()
@@ -277,7 +268,7 @@ class BindManager:
             
             # 更新内存中的数据
             self.bindings.pop(user_id)
-            self._cache.pop(user_id, None)
+            self._cache.delete(user_id)
             
             # 异步保存到文件（在主锁外）
             await self._save_bindings_async()
@@ -307,9 +298,9 @@ class BindManager:
     def get_game_id(self, user_id: str) -> Optional[str]:
         """获取用户绑定的游戏ID"""
         # 先检查缓存
-        self._clean_cache()
-        if user_id in self._cache:
-            return self._cache[user_id]
+        game_id = self._cache.get(user_id)
+        if game_id is not None:
+            return game_id
             
         # 缓存未命中，从bindings获取
         if user_id in self.bindings:
@@ -327,7 +318,7 @@ class BindManager:
                 game_id = data["game_id"]
                 
             # 更新缓存
-            self._cache[user_id] = game_id
+            self._cache.set(user_id, game_id, self._cache_ttl)
             return game_id
             
         return None
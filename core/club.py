@@ -1,6 +1,7 @@
 from typing import Optional, Dict, List, Union
 import asyncio
 import os
+from collections import Counter
 from utils.logger import bot_logger
 from utils.config import settings
 from core.rank import RankQuery  # 添加 RankQuery 导入
@@ -124,6 +125,8 @@ class ClubQuery:
         # 初始化图片生成器
         template_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'resources', 'templates')
         self.image_generator = ImageGenerator(template_dir)
+        # 各俱乐部的查询次数，用于挑选预渲染的热门俱乐部
+        self.query_counts: Counter = Counter()
         self._initialized = True
         bot_logger.info("ClubQuery 单例初始化完成")
     
@@ -368,6 +371,8 @@ class ClubQuery:
             if not data:
                 return "\n⚠️ 未找到俱乐部数据"
             
+            self.query_counts[data[0].get("clubTag", club_tag)] += 1
+            
             # 尝试生成图片
             image_bytes = await self.generate_club_image(data)
             
@@ -390,4 +395,13 @@ class ClubQuery:
             bot_logger.error(f"处理俱乐部查询命令时出错: {str(e)}", exc_info=True) # Log exception with traceback
             result = "\n⚠️ 查询过程中发生错误，请稍后重试" 
             
-        return result
\ No newline at end of file
+        return result
+
+    async def prerender_popular_clubs(self, limit: int) -> Optional[int]:
+        """按查询次数预渲染前 limit 个俱乐部的卡片，返回成功数量 (没有可渲染的俱乐部时返回 None)"""
+        rendered = 0
+        for club_tag, _ in self.query_counts.most_common(limit):
+            data = await self.api.get_club_info(club_tag, True)
+            if data and await self.generate_club_image(data):
+                rendered += 1
+        return rendered or None
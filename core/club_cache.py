@@ -5,13 +5,15 @@
 
 import orjson as json
 import asyncio
-from typing import Dict, List, Optional, Any, AsyncGenerator
+import hashlib
+from typing import Dict, List, Optional, Any, AsyncGenerator, Iterable
 from datetime import datetime, timedelta
 
 from utils.logger import bot_logger
 from utils.redis_manager import redis_manager
 from utils.base_api import BaseAPI
 from utils.config import settings
+from utils.prerender import prerender_scheduler
 
 
 class ClubIndexer:
@@ -60,6 +62,31 @@ class ClubIndexer:
         
         bot_logger.info(f"[ClubIndexer] 索引构建完成，共 {len(self._club_data)} 个俱乐部")
     
+    def apply_changes(self, upserts: List[Dict[str, Any]], removed_tags: Iterable[str]):
+        """
+        增量更新索引，只处理发生变化的俱乐部
+        
+        参数:
+            upserts: 新增或内容变化的俱乐部数据
+            removed_tags: 已从 API 中消失的俱乐部标签
+        """
+        for club_tag in removed_tags:
+            self._club_data.pop(club_tag, None)
+            lower_tag = club_tag.lower()
+            # 仅当小写映射仍指向被删除的标签时才移除，避免误删大小写不同的同名标签
+            if self._tag_lower_map.get(lower_tag) == club_tag:
+                del self._tag_lower_map[lower_tag]
+        
+        for club in upserts:
+            club_tag = club.get("clubTag")
+            if not club_tag:
+                continue
+            self._club_data[club_tag] = club
+            self._tag_lower_map[club_tag.lower()] = club_tag
+        
+        if not self._is_ready:
+            self._is_ready = True
+    
     def search_exact(self, club_tag: str) -> Optional[Dict[str, Any]]:
         """
         精确查找俱乐部
@@ -142,9 +169,11 @@ class ClubCache:
         self._is_updating = False
         
         # Redis key 定义
-        self.redis_key_clubs = "clubs:all"  # Hash: clubTag -> club_data
+        self.redis_key_clubs = "clubs:all"  # Hash: clubTag -> club_data（按俱乐部分字段存储，单个查询只读取一个字段）
         self.redis_key_tags = "clubs:tags"  # Set: 所有 clubTag
         self.redis_key_tags_lower = "clubs:tags_lower"  # Hash: lowercase_tag -> original_tag
+        self.redis_key_digests = "clubs:digests"  # Hash: clubTag -> 内容摘要，用于变更检测
+        self.redis_key_source_digest = "clubs:source_digest"  # String: 上次处理的 API 响应摘要
         self.redis_key_last_update = "clubs:last_update"
         
         bot_logger.debug("ClubCache 初始化完成，使用 Redis 进行数据管理")
@@ -238,63 +267,108 @@ class ClubCache:
         try:
             bot_logger.info("开始更新俱乐部数据到 Redis...")
             api_url = "/v1/clubs"
-            # 优化：启用HTTP缓存，支持304 Not Modified响应，大幅减少流量
-            response = await self.api.get(api_url, headers=self.headers, use_cache=True)
+            # 优化：启用HTTP缓存，支持304 Not Modified响应，大幅减少流量；后台同步不接受 stale 数据
+            response = await self.api.get(api_url, headers=self.headers, use_cache=True, allow_stale=False)
             
             if not (response and response.status_code == 200):
                 bot_logger.error(f"获取俱乐部 API 数据失败: {response.status_code if response else 'No response'}")
                 return
             
+            expire_time = self.update_interval * 2
+            client = redis_manager._get_client()
+            
+            # 响应体与上次处理的完全一致（常见于 304 命中缓存）时，只续期，不解析也不写入
+            source_digest = hashlib.blake2b(response.content, digest_size=16).hexdigest()
+            if self.indexer.is_ready() and not force_update:
+                stored_source_digest = await client.get(self.redis_key_source_digest)
+                if stored_source_digest == source_digest and await client.exists(self.redis_key_clubs):
+                    pipeline = client.pipeline()
+                    pipeline.set(self.redis_key_last_update, datetime.now().isoformat())
+                    for key in self._all_redis_keys():
+                        pipeline.expire(key, expire_time)
+                    await pipeline.execute()
+                    bot_logger.info("俱乐部数据未发生变化，仅刷新过期时间")
+                    return
+            
             clubs = response.json()
             if not isinstance(clubs, list) or not clubs:
                 bot_logger.warning("俱乐部 API 未返回任何数据")
                 return
             
-            # --- Redis 操作 ---
-            client = redis_manager._get_client()
-            pipeline = client.pipeline()
+            # --- 变更检测 ---
+            # 1. 计算每个俱乐部的内容摘要
+            new_entries: Dict[str, bytes] = {}
+            new_digests: Dict[str, str] = {}
+            new_clubs: Dict[str, Dict[str, Any]] = {}
+            for club in clubs:
+                club_tag = club.get("clubTag")
+                if not club_tag:
+                    continue
+                club_json = json.dumps(club, option=json.OPT_SORT_KEYS)
+                new_entries[club_tag] = club_json
+                new_digests[club_tag] = self._compute_digest(club_json)
+                new_clubs[club_tag] = club
             
-            # 1. 清理旧数据
-            pipeline.delete(self.redis_key_clubs, self.redis_key_tags, self.redis_key_tags_lower)
+            # 2. 读取上次写入的摘要；主数据已过期时视为全量写入
+            pipeline = client.pipeline()
+            pipeline.exists(self.redis_key_clubs)
+            pipeline.hgetall(self.redis_key_digests)
+            clubs_exist, old_digests = await pipeline.execute()
+            if not clubs_exist:
+                old_digests = {}
             
-            # 2. 准备新数据
-            club_hash_data = {}
-            club_tags_set = set()
-            tags_lower_map = {}  # lowercase -> original
+            changed_tags = [tag for tag, digest in new_digests.items() if old_digests.get(tag) != digest]
+            removed_tags = [tag for tag in old_digests if tag not in new_digests]
             
-            for club in clubs:
-                club_tag = club.get("clubTag")
-                if club_tag:
-                    club_hash_data[club_tag] = json.dumps(club)
-                    club_tags_set.add(club_tag)
-                    tags_lower_map[club_tag.lower()] = club_tag
+            # --- Redis 操作 ---
+            pipeline = client.pipeline()
             
-            # 3. 写入新数据
-            if club_hash_data:
-                pipeline.hmset(self.redis_key_clubs, club_hash_data)
+            if not clubs_exist:
+                # 主数据缺失，清理可能残留的辅助键后全量写入
+                pipeline.delete(self.redis_key_tags, self.redis_key_tags_lower, self.redis_key_digests)
             
-            if club_tags_set:
-                pipeline.sadd(self.redis_key_tags, *club_tags_set)
+            # 3. 删除已消失的俱乐部
+            if removed_tags:
+                pipeline.hdel(self.redis_key_clubs, *removed_tags)
+                pipeline.hdel(self.redis_key_digests, *removed_tags)
+                pipeline.srem(self.redis_key_tags, *removed_tags)
+                live_lower_tags = {tag.lower() for tag in new_digests}
+                stale_lower_tags = [tag.lower() for tag in removed_tags if tag.lower() not in live_lower_tags]
+                if stale_lower_tags:
+                    pipeline.hdel(self.redis_key_tags_lower, *stale_lower_tags)
             
-            if tags_lower_map:
-                pipeline.hmset(self.redis_key_tags_lower, tags_lower_map)
+            # 4. 只写入新增或内容变化的俱乐部
+            if changed_tags:
+                pipeline.hset(self.redis_key_clubs, mapping={tag: new_entries[tag] for tag in changed_tags})
+                pipeline.hset(self.redis_key_digests, mapping={tag: new_digests[tag] for tag in changed_tags})
+                pipeline.sadd(self.redis_key_tags, *changed_tags)
+                pipeline.hset(self.redis_key_tags_lower, mapping={tag.lower(): tag for tag in changed_tags})
             
-            # 更新上次更新时间戳
+            # 更新上次更新时间戳与响应摘要
             pipeline.set(self.redis_key_last_update, datetime.now().isoformat())
+            pipeline.set(self.redis_key_source_digest, source_digest)
             
-            # 4. 设置过期时间
-            expire_time = self.update_interval * 2
-            pipeline.expire(self.redis_key_clubs, expire_time)
-            pipeline.expire(self.redis_key_tags, expire_time)
-            pipeline.expire(self.redis_key_tags_lower, expire_time)
-            pipeline.expire(self.redis_key_last_update, expire_time)
+            # 5. 设置过期时间
+            for key in self._all_redis_keys():
+                pipeline.expire(key, expire_time)
             
             await pipeline.execute()
-            bot_logger.info(f"俱乐部数据成功更新到 Redis，共 {len(clubs)} 条记录")
+            bot_logger.info(
+                f"俱乐部数据成功同步到 Redis，共 {len(new_digests)} 个俱乐部，"
+                f"变更 {len(changed_tags)}，删除 {len(removed_tags)}，"
+                f"未变化 {len(new_digests) - len(changed_tags)}"
+            )
+            
+            # 6. 更新搜索索引
+            if self.indexer.is_ready() and clubs_exist:
+                # 只把变化部分应用到内存索引
+                self.indexer.apply_changes([new_clubs[tag] for tag in changed_tags], removed_tags)
+            else:
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(None, self.indexer.build_index, clubs)
             
-            # 5. 更新搜索索引
-            loop = asyncio.get_running_loop()
-            await loop.run_in_executor(None, self.indexer.build_index, clubs)
+            # 7. 预渲染热门俱乐部卡片
+            prerender_scheduler.notify("club")
             
         except Exception as e:
             bot_logger.error(f"更新俱乐部 Redis 数据失败: {e}", exc_info=True)
@@ -302,6 +376,22 @@ class ClubCache:
         finally:
             self._is_updating = False
     
+    @staticmethod
+    def _compute_digest(club_json: bytes) -> str:
+        """计算单个俱乐部数据的内容摘要"""
+        return hashlib.blake2b(club_json, digest_size=8).hexdigest()
+    
+    def _all_redis_keys(self) -> List[str]:
+        """返回俱乐部缓存使用的所有 Redis key"""
+        return [
+            self.redis_key_clubs,
+            self.redis_key_tags,
+            self.redis_key_tags_lower,
+            self.redis_key_digests,
+            self.redis_key_source_digest,
+            self.redis_key_last_update,
+        ]
+    
     async def get_club_data(self, club_tag: str, exact_match: bool = True) -> Optional[List[Dict[str, Any]]]:
         """
         获取俱乐部数据
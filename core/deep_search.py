@@ -4,6 +4,7 @@ from typing import Dict, List, Any, Optional, Tuple
 import re
 from utils.logger import bot_logger
 from utils.redis_manager import redis_manager
+from utils.memory_cache import LRUCache
 import orjson as json
 from core.season import SeasonManager
 from difflib import SequenceMatcher
@@ -16,7 +17,8 @@ class DeepSearch:
         """初始化深度搜索"""
         self.cooldown_seconds = 1
         self.min_query_length = 2
-        self.user_cooldowns: Dict[str, datetime] = {}
+        # user_id -> 上次搜索时间，条目在冷却结束后自动过期
+        self.user_cooldowns = LRUCache(max_entries=10000, name="deep_search_cooldown")
         self.season_manager = SeasonManager()
         self.redis_club_prefix = "deep_search:club:"
 
@@ -28,8 +30,8 @@ class DeepSearch:
     async def is_on_cooldown(self, user_id: str) -> Tuple[bool, int]:
         """检查用户是否处于冷却状态"""
         now = datetime.now()
-        if user_id in self.user_cooldowns:
-            last_time = self.user_cooldowns[user_id]
+        last_time = self.user_cooldowns.get(user_id)
+        if last_time is not None:
             elapsed = (now - last_time).total_seconds()
             
             if elapsed < self.cooldown_seconds:
@@ -40,7 +42,7 @@ class DeepSearch:
     
     async def set_cooldown(self, user_id: str):
         """设置用户冷却时间"""
-        self.user_cooldowns[user_id] = datetime.now()
+        self.user_cooldowns.set(user_id, datetime.now(), self.cooldown_seconds)
     
     async def validate_query(self, query: str) -> Tuple[bool, str]:
         """验证搜索查询是否合法"""
@@ -11,6 +11,7 @@ import os
 from pathlib import Path
 from utils.json_utils import load_json, save_json
 from utils.redis_manager import redis_manager
+from utils.prerender import prerender_scheduler
 
 class DFQuery:
     """底分查询功能类 (Redis + JSON文件双重持久化)"""
@@ -206,6 +207,7 @@ class DFQuery:
                     raise json_result
                 
                 bot_logger.debug(f"[DFQuery] 实时底分数据已成功保存到Redis和JSON文件")
+                prerender_scheduler.notify("df")
             except Exception as e:
                 bot_logger.error(f"[DFQuery] 更新实时底分数据时发生错误: {e}", exc_info=True)
             finally:
@@ -348,6 +350,17 @@ class DFQuery:
             "text": text,
         }
 
+    @staticmethod
+    def _get_data_update_time(data: Dict[str, Any]) -> str:
+        """实时数据的获取时间 (而非生成图片的时间)，同一份数据生成的图片内容相同，可命中渲染缓存"""
+        times = []
+        for entry in data.values():
+            try:
+                times.append(datetime.fromisoformat(entry["update_time"]))
+            except (KeyError, TypeError, ValueError):
+                continue
+        return (max(times) if times else datetime.now()).strftime('%Y-%m-%d %H:%M:%S')
+
     def _prepare_cutoff_template_data(self, data: Dict[str, Any], yesterday_data: Dict[str, Any], safe_score_line: str) -> Dict[str, Any]:
         """为 'the_finals_cutoff.html' 准备模板数据"""
         
@@ -427,7 +440,7 @@ class DFQuery:
             "diamond_player": diamond_data.get("player_id", ""),
             "diamond_change": self._get_change_trend(diamond_rank_change, is_rank=True),
 
-            "update_time": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            "update_time": self._get_data_update_time(data),
             "safe_score_line": safe_score_line,
             "season_remaining_days": remaining_days_display,
             "season_bg": season_bg
@@ -1,27 +1,24 @@
-from typing import Optional, Dict, List
-import asyncio
-import orjson as json
+from typing import Optional
 from utils.logger import bot_logger
 from utils.config import settings
-from utils.base_api import BaseAPI
+from core.mode_board import ModeBoardAPI
 from core.season import SeasonConfig
 from utils.templates import SEPARATOR
 from utils.redis_manager import RedisManager
 
-class H2HAPI(BaseAPI):
+class H2HAPI(ModeBoardAPI):
     """对对碰API封装"""
+
+    MODE = "head2head"
+    LOG_TAG = "H2HAPI"
+    STAT_FIELDS = ("points",)
+    # 快照可能落后于新上榜的玩家，未命中时按名称查询上游
+    FALLBACK_ON_MISS = True
     
     def __init__(self):
-        super().__init__(settings.api_base_url, timeout=10)
-        self.platform = "crossplay"
+        super().__init__()
         self.redis = RedisManager()
         
-        # 设置默认请求头
-        self.headers = {
-            "Accept": "application/json",
-            "User-Agent": "TheFinals-Bot/1.0"
-        }
-        
         # 当前赛季
         self.current_season = settings.CURRENT_SEASON
         
@@ -78,22 +75,24 @@ class H2HAPI(BaseAPI):
             dict: 玩家数据，如果找不到则返回None
         """
         try:
-            # 首先尝试精确搜索
-            data = await self.get_h2h_data(player_name=player_name, limit=1)
-            
-            if data and data.get('data'):
-                player_data = data['data'][0]
-                # 验证返回的玩家名是否匹配
-                if player_data.get('name', '').lower() == player_name.lower():
-                    return player_data
-            
-            bot_logger.warning(f"[H2HAPI] 未找到玩家数据: {player_name}")
-            return None
-            
+            return await self.find_player(player_name, self.current_season)
         except Exception as e:
             bot_logger.error(f"[H2HAPI] 获取玩家 {player_name} 对对碰数据时发生错误: {str(e)}")
             return None
 
+    def _lookup(self, board, player_name: str) -> Optional[dict]:
+        """对对碰只接受完整 ID 的精确匹配"""
+        return board.indexer.find_exact(player_name)
+
+    async def _fetch_player(self, player_name: str, season: str) -> Optional[dict]:
+        """按名称查询上游 (快照未命中时的回退路径)"""
+        data = await self.get_h2h_data(player_name=player_name, limit=1)
+        if data and data.get('data'):
+            player_data = data['data'][0]
+            # 验证返回的玩家名是否匹配
+            if player_data.get('name', '').lower() == player_name.lower():
+                return player_data
+        return None
 
     def format_player_data(self, player_data: dict) -> str:
         """格式化单个玩家的对对碰数据
@@ -5,11 +5,70 @@ import json
 import time
 import uuid
 import contextlib
-from typing import Optional, List, Dict, Any
+import re
+from typing import Optional, List, Dict, Any, Tuple
 from playwright.async_api import Page, TimeoutError as PlaywrightTimeoutError
 from jinja2 import Environment, FileSystemLoader
 from utils.logger import bot_logger
-from utils.browser import browser_manager
+from utils.browser import browser_manager, DEFAULT_VIEWPORT, DEFAULT_DEVICE_SCALE_FACTOR
+from utils.config import settings
+from utils.render_cache import render_cache
+from utils.template_assets import template_assets
+from utils.render_queue import RenderDropped, current_deadline, current_priority
+
+# 禁用动画的样式，直接拼入渲染后的 HTML，省去一次 add_style_tag 往返
+DISABLE_ANIMATIONS_STYLE = """<style>
+* {
+    animation: none !important;
+    transition: none !important;
+}
+/* 避免在截图时出现输入光标闪烁 */
+input, textarea { caret-color: transparent !important; }
+</style>"""
+
+# 数据注入渲染：把新渲染的 body 逐节点对比合并到当前文档，只修改变化的文本与属性，
+# 未变化的元素 (包括图片) 保持原样；随后等待新图片加载 (最多 1 秒) 与字体就绪
+INJECT_BODY_SCRIPT = """
+async ({ body }) => {
+    const next = document.createElement('template');
+    next.innerHTML = body;
+    const morph = (from, to) => {
+        if (from.nodeType !== to.nodeType || from.nodeName !== to.nodeName) {
+            from.replaceWith(to.cloneNode(true));
+            return;
+        }
+        if (from.nodeType !== Node.ELEMENT_NODE) {
+            if (from.nodeValue !== to.nodeValue) from.nodeValue = to.nodeValue;
+            return;
+        }
+        for (const attr of Array.from(from.attributes)) {
+            if (!to.hasAttribute(attr.name)) from.removeAttribute(attr.name);
+        }
+        for (const attr of Array.from(to.attributes)) {
+            if (from.getAttribute(attr.name) !== attr.value) from.setAttribute(attr.name, attr.value);
+        }
+        morphChildren(from, to);
+    };
+    const morphChildren = (from, to) => {
+        const current = Array.from(from.childNodes);
+        const target = Array.from(to.childNodes);
+        target.forEach((node, i) => {
+            if (i < current.length) morph(current[i], node);
+            else from.appendChild(node.cloneNode(true));
+        });
+        current.slice(target.length).forEach(node => node.remove());
+    };
+    morphChildren(document.body, next.content);
+    const pending = Array.from(document.images).filter(img => !img.complete).map(img => new Promise(resolve => {
+        img.addEventListener('load', resolve, { once: true });
+        img.addEventListener('error', resolve, { once: true });
+    }));
+    await Promise.race([Promise.all(pending), new Promise(resolve => setTimeout(resolve, 1000))]);
+    await document.fonts.ready;
+}
+"""
+
+_BODY_OPEN_RE = re.compile(r"<body\b[^>]*>", re.IGNORECASE)
 
 # ----------------------------
 # 性能日志工具
@@ -65,6 +124,7 @@ class ImageGenerator:
     
     负责处理HTML模板到图片的转换。
     它从全局页面池中获取页面，从而支持高并发。
+    模板与数据都相同的请求直接返回渲染缓存 (utils/render_cache.py) 中的截图。
     """
     
     def __init__(self, template_dir: str):
@@ -80,8 +140,51 @@ class ImageGenerator:
 
     def _compute_content_hash(self, template_data: dict) -> str:
         """计算模板数据的稳定哈希值"""
-        json_str = json.dumps(template_data, sort_keys=True, ensure_ascii=False)
+        json_str = json.dumps(template_data, sort_keys=True, ensure_ascii=False, default=str)
         return hashlib.sha256(json_str.encode()).hexdigest()
+
+    def _compute_render_key(self, html_content: Optional[str], content_hash: str, options: Dict[str, Any]) -> Optional[str]:
+        """渲染缓存键：模板 (文件模板含修改时间，内联模板取内容哈希)、数据哈希、视口与截图参数"""
+        if not html_content or not isinstance(html_content, str):
+            return None
+        if html_content.endswith('.html'):
+            try:
+                mtime = os.stat(os.path.join(self.template_dir, html_content)).st_mtime_ns
+            except OSError:
+                return None
+            template_id = f"{self.template_dir}/{html_content}:{mtime}"
+        else:
+            template_id = hashlib.sha256(html_content.encode()).hexdigest()
+        payload = json.dumps(
+            [template_id, content_hash, DEFAULT_VIEWPORT, DEFAULT_DEVICE_SCALE_FACTOR, options], sort_keys=True
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _template_key(self, html_content: Optional[str]) -> str:
+        """页面预热标识：文件模板为 目录/模板名，内联模板共用模板目录"""
+        if html_content and isinstance(html_content, str) and html_content.endswith('.html'):
+            return f"{self.template_dir}/{html_content}"
+        return self.template_dir
+
+    @staticmethod
+    def _inject_style(html: str, style: str) -> str:
+        """把样式插入到 </head> 之前，没有 head 时放在文档开头"""
+        index = html.find("</head>")
+        if index == -1:
+            return style + html
+        return html[:index] + style + html[index:]
+
+    @staticmethod
+    def _split_document(html: str) -> Optional[Tuple[str, str]]:
+        """拆分为 (外壳, body 内容)：外壳为 body 之外的部分 (head、body 标签本身)，
+        外壳相同的两次渲染只需替换 body 内容。无法识别 body 时返回 None"""
+        match = _BODY_OPEN_RE.search(html)
+        if not match:
+            return None
+        close = html.rfind("</body>")
+        if close < match.end():
+            return None
+        return html[:match.end()] + html[close:], html[match.end():close]
             
     async def generate_image(self, 
                              template_data: dict, 
@@ -94,12 +197,56 @@ class ImageGenerator:
                              full_page: Optional[bool] = None,
                              wait_selectors_timeout_ms: int = 500,
                              disable_css_animations: bool = True,
-                             screenshot_timeout_ms: int = 13000
+                             screenshot_timeout_ms: int = 13000,
+                             use_cache: bool = True,
+                             data_injection: Optional[bool] = None
                              ) -> Optional[bytes]:
+        """生成图片：渲染缓存命中时直接返回，否则通过浏览器渲染并写入缓存。
+
+        data_injection 为 None 时按配置 (image.data_injection) 决定是否对该模板使用数据注入渲染。
+        """
+        content_hash = self._compute_content_hash(template_data)
+
+        async def render() -> Optional[bytes]:
+            return await self._render_image(
+                template_data, html_content, wait_selectors, image_quality, content_hash,
+                screenshot_selector=screenshot_selector,
+                full_page=full_page,
+                wait_selectors_timeout_ms=wait_selectors_timeout_ms,
+                disable_css_animations=disable_css_animations,
+                screenshot_timeout_ms=screenshot_timeout_ms,
+                data_injection=data_injection,
+            )
+
+        render_key = None
+        if use_cache and settings.IMAGE_RENDER_CACHE_ENABLED:
+            render_key = self._compute_render_key(html_content, content_hash, {
+                "quality": image_quality,
+                "selector": screenshot_selector,
+                "full_page": full_page,
+                "disable_css_animations": disable_css_animations,
+            })
+        if render_key is None:
+            return await render()
+        return await render_cache.get_or_render(render_key, render)
+
+    async def _render_image(self,
+                            template_data: dict,
+                            html_content: Optional[str],
+                            wait_selectors: Optional[List[str]],
+                            image_quality: int,
+                            content_hash: str,
+                            *,
+                            screenshot_selector: Optional[str] = None,
+                            full_page: Optional[bool] = None,
+                            wait_selectors_timeout_ms: int = 500,
+                            disable_css_animations: bool = True,
+                            screenshot_timeout_ms: int = 13000,
+                            data_injection: Optional[bool] = None
+                            ) -> Optional[bytes]:
         """从页面池获取页面，使用 Jinja2 渲染HTML并生成图片。"""
         page: Optional[Page] = None
         req_id = uuid.uuid4().hex[:12]
-        content_hash = self._compute_content_hash(template_data)
         base_meta = {
             "template_dir": self.template_dir,
             "html_content_descriptor": (html_content if isinstance(html_content, str) else "None"),
@@ -107,21 +254,32 @@ class ImageGenerator:
             "request_id": req_id,
         }
         perf = PerfLogger(req_id, base_meta)
+        template_key = self._template_key(html_content)
+        warm_hit = False
+        render_mode = "set_content"
+        if data_injection is None:
+            data_injection = settings.IMAGE_DATA_INJECTION_ENABLED and html_content in settings.IMAGE_DATA_INJECTION_TEMPLATES
 
         try:
-            with perf.step("acquire_page"):
-                page = await browser_manager.acquire_page()
+            with perf.step("acquire_page", template=template_key):
+                page = await browser_manager.acquire_page(
+                    template_key, priority=current_priority(), deadline=current_deadline()
+                )
+            warm_hit = getattr(page, "_warmed_for", None) == template_key
 
-            # 粘性页面逻辑：如果页面不是为当前模板预热的，则重新导航
-            with perf.step("warmup_if_needed",
-                           warmed_for=getattr(page, "_warmed_for", None),
-                           target=self.template_dir,
-                           page_id=id(page)):
-                if getattr(page, '_warmed_for', None) != self.template_dir:
-                    bot_logger.debug(f"页面预热: {self.template_dir}")
-                    # 使用 file:// 协议指向模板目录，以便HTML内部的相对路径能够正确解析
-                    await page.goto(f"file://{self.template_dir}/", wait_until='domcontentloaded')
-                    setattr(page, '_warmed_for', self.template_dir)
+            # 粘性页面逻辑：页面的基准地址不是当前模板目录时才重新导航 (热路径上没有该步骤)
+            # 启用内存资源时指向虚拟源 (由页面路由从内存返回)，否则使用 file:// 协议指向模板目录，
+            # 以便HTML内部的相对路径能够正确解析
+            base_url = (settings.IMAGE_ASSETS_IN_MEMORY and template_assets.base_url(self.template_dir)) \
+                or f"file://{self.template_dir}/"
+            if getattr(page, '_base_url', None) != base_url:
+                with perf.step("page.goto",
+                               warmed_for=getattr(page, "_warmed_for", None),
+                               target=base_url,
+                               page_id=id(page)):
+                    bot_logger.debug(f"页面预热: {base_url}")
+                    await page.goto(base_url, wait_until='domcontentloaded')
+                    setattr(page, '_base_url', base_url)
 
             # 1) 渲染 HTML
             with perf.step("render_template"):
@@ -137,27 +295,26 @@ class ImageGenerator:
                     source_type = "inline"
                 else:
                     raise Exception("未提供HTML模板内容或模板文件名")
+                # 禁用动画（多数情况下可减少绘制时间、避免抖动），随内容一起设置
+                if disable_css_animations:
+                    html_to_set = self._inject_style(html_to_set, DISABLE_ANIMATIONS_STYLE)
 
-            # 2) 设置页面内容
-            with perf.step("page.set_content"):
-                await page.set_content(html_to_set, wait_until='domcontentloaded')
-
-            # 注入禁用动画（多数情况下可减少绘制时间、避免抖动）
-            # 必须在 set_content 之后注入，否则会被清除
-            if disable_css_animations:
-                with perf.step("inject_disable_animations_style"):
+            # 2) 设置页面内容：页面已加载相同外壳时只注入 body，否则整页 set_content
+            parts = self._split_document(html_to_set) if data_injection else None
+            shell_hash = hashlib.sha256(parts[0].encode()).hexdigest() if parts else None
+            if parts and warm_hit and getattr(page, '_shell_hash', None) == shell_hash:
+                with perf.step("page.inject_data", body_bytes=len(parts[1])):
                     try:
-                        await page.add_style_tag(content="""
-                            * {
-                                animation: none !important;
-                                transition: none !important;
-                            }
-                            /* 避免在截图时出现输入光标闪烁 */
-                            input, textarea { caret-color: transparent !important; }
-                        """)
-                    except Exception:
-                        # 注入失败不影响主流程
-                        pass
+                        await page.evaluate(INJECT_BODY_SCRIPT, {"body": parts[1]})
+                        render_mode = "inject"
+                    except Exception as e:
+                        bot_logger.debug(f"[ImageGenerator] 数据注入失败，回退到 set_content: {e}")
+            if render_mode != "inject":
+                with perf.step("page.set_content"):
+                    await page.set_content(html_to_set, wait_until='domcontentloaded')
+                    # 页面保持为该模板预热，渲染器内存缓存中保留其字体与图片
+                    setattr(page, '_warmed_for', template_key)
+                    setattr(page, '_shell_hash', shell_hash)
 
             # 3) 等待关键选择器（并发等待，降低总等待时间）
             if wait_selectors:
@@ -283,15 +440,20 @@ class ImageGenerator:
                 except Exception:
                     bot_logger.info("[perf] %s", meta)
 
-            perf.flush_total()
+            perf.flush_total({"warm_hit": warm_hit, "render_mode": render_mode, "steps": [step["step"] for step in perf.steps]})
             return screenshot_bytes
 
+        except RenderDropped as e:
+            # 请求已过期或队列已满，尚未占用页面
+            bot_logger.warning(f"[ImageGenerator] {e}")
+            perf.flush_total({"dropped": e.reason})
+            return None
         except Exception as e:
             bot_logger.error(f"[ImageGenerator] 图片生成失败: {e}", exc_info=True)
-            perf.flush_total({"error": str(e)})
+            perf.flush_total({"error": str(e), "warm_hit": warm_hit})
             if page and not page.is_closed():
                 await page.close()
-            page = None  # 避免在 finally 中被再次释放
+            # 已关闭的页面仍归还到池中，由 release_page 创建新页面补充
             return None
         finally:
             if page:
@@ -3,7 +3,6 @@ import matplotlib.dates as mdates
 from datetime import datetime, timedelta
 import io
 import logging
-import asyncio
 from typing import List, Dict, Any, Tuple, Optional
 from matplotlib.font_manager import FontProperties
 import numpy as np
@@ -17,41 +16,11 @@ from utils.config import settings
 import os
 import httpx
 from urllib.parse import quote
-import time
-from functools import lru_cache, wraps
+from functools import lru_cache
 from core.rank import RankAPI
-
-# 为异步函数设计的简单的TTL缓存
-def async_ttl_cache(ttl: int = 60):
-    def decorator(func):
-        cache = {}
-        lock = asyncio.Lock()
-
-        @wraps(func)
-        async def wrapper(*args, **kwargs):
-            key = str(args) + str(kwargs)
-            now = time.time()
-            
-            async with lock:
-                if key in cache:
-                    result, timestamp = cache[key]
-                    if now - timestamp < ttl:
-                        return result
-            
-            new_result = await func(*args, **kwargs)
-
-            async with lock:
-                # 限制缓存大小，防止内存泄漏
-                if len(cache) > 100:
-                    # 移除最旧的条目
-                    oldest_key = min(cache, key=lambda k: cache[k][1])
-                    cache.pop(oldest_key, None)
-                cache[key] = (new_result, now)
-                
-            return new_result
-        return wrapper
-    return decorator
-
+from utils.rate_limiter import host_rate_limiter, parse_retry_after
+from utils.http_client import http_clients
+from utils.memory_cache import async_cached
 
 class LeaderboardCore(BaseAPI):
     """排位分数走势图核心类"""
@@ -78,7 +47,6 @@ class LeaderboardCore(BaseAPI):
     
     def __init__(self, rank_api: RankAPI):
         self.logger = logging.getLogger("LeaderboardCore")
-        self._client = httpx.AsyncClient(timeout=10)
         self.base_url = "https://www.davg25.com/app/the-finals-leaderboard-tracker/api/vaiiya"
         self.rank_api = rank_api
         
@@ -252,7 +220,9 @@ class LeaderboardCore(BaseAPI):
             self.logger.error(f"生成走势图失败: {str(e)}")
             raise
 
-    @async_ttl_cache(ttl=60)
+    # 按玩家与时间范围缓存 1 分钟，所有实例共享；并发的相同查询只请求一次
+    @async_cached(ttl=60, key=lambda self, player_id, time_range=604800: (player_id.lower(), time_range),
+                  max_entries=256, name="player_history")
     async def fetch_player_history(self, player_id: str, time_range: int = 604800) -> List[Dict[str, Any]]:
         """
         获取玩家历史数据 (使用带1分钟缓存的httpx直连)
@@ -284,8 +254,11 @@ class LeaderboardCore(BaseAPI):
             url = f"{self.base_url}/player-history?id={encoded_player_id}&range={time_range}"
             
             self.logger.debug(f"[LeaderboardCore] 发送明文请求: {url}")
-            response = await self._client.get(url)
+            await host_rate_limiter.acquire(url)
+            response = await http_clients.get_client(url).get(url, timeout=10)
             
+            if response.status_code == 429:
+                host_rate_limiter.penalize(url, parse_retry_after(response.headers.get("Retry-After")))
             if response.status_code == 404:
                 self.logger.warning(f"玩家不存在: {exact_player_id}")
                 raise ValueError("玩家不存在")
@@ -1,4 +1,4 @@
-from typing import Optional, Dict, List, Tuple
+from typing import Any, ClassVar, Optional, Dict, List, Tuple
 import asyncio
 from utils.logger import bot_logger
 from utils.config import settings
@@ -33,6 +33,13 @@ def get_catmull_rom_control_points(p0: Point, p1: Point, p2: Point, p3: Point, k
 
 class MeAPI:
     """玩家个人数据API封装"""
+
+    # 各数据源的默认截止时间(秒)，可通过 me.timeouts 覆盖
+    DEFAULT_SOURCE_TIMEOUTS: ClassVar[Dict[str, float]] = {"rank": 5, "world_tour": 2, "quick_cash": 2, "chart": 3}
+    DEFAULT_RANK_ICON = "bronze-4"
+
+    # 段位图标清单: 图标名 (如 gold-1) -> 模板中使用的相对路径，首次创建实例时扫描一次
+    _rank_icons: ClassVar[Optional[Dict[str, str]]] = None
     
     def __init__(self, rank_api: RankAPI = None):
         """初始化MeAPI"""
@@ -47,6 +54,9 @@ class MeAPI:
         template_dir = os.path.join(resources_dir, "templates")
         self.image_generator = ImageGenerator(template_dir)
         self.resources_dir = resources_dir
+        self.source_timeouts = {**self.DEFAULT_SOURCE_TIMEOUTS, **settings.ME_SOURCE_TIMEOUTS}
+        if MeAPI._rank_icons is None:
+            MeAPI._rank_icons = self._load_rank_icons(resources_dir)
         
         # 初始化状态标记
         self._initialized = False
@@ -73,15 +83,60 @@ class MeAPI:
             bot_logger.error(f"[MeAPI] 初始化失败: {str(e)}")
             raise
             
+    @staticmethod
+    def _load_rank_icons(resources_dir: str) -> Dict[str, str]:
+        """扫描段位图标目录，生成图标清单"""
+        icon_dir = os.path.join(resources_dir, "images", "rank_icons")
+        try:
+            file_names = os.listdir(icon_dir)
+        except OSError as e:
+            bot_logger.warning(f"[MeAPI] 读取段位图标目录失败: {e}")
+            return {}
+        icons = {
+            os.path.splitext(file_name)[0]: f"../images/rank_icons/{file_name}"
+            for file_name in file_names if file_name.endswith(".png")
+        }
+        bot_logger.debug(f"[MeAPI] 段位图标清单加载完成，共 {len(icons)} 个")
+        return icons
+
+    def _get_rank_icon(self, league: str) -> str:
+        """按段位名称查找图标路径，找不到时使用默认图标"""
+        icon_name = league.lower().replace(' ', '-')
+        icon = self._rank_icons.get(icon_name)
+        if icon is None:
+            bot_logger.warning(f"Rank icon not found: {icon_name}, falling back to {self.DEFAULT_RANK_ICON}.")
+            icon = f"../images/rank_icons/{self.DEFAULT_RANK_ICON}.png"
+        return icon
+
+    async def _await_source(self, name: str, task: asyncio.Future) -> Tuple[Any, Optional[str]]:
+        """在该数据源的截止时间内等待结果，返回 (结果, 未按时返回的原因)
+
+        原因为 None 表示按时返回，"timeout" 表示超过截止时间，"error" 表示查询抛出异常。
+        超时不会取消任务：任务在后台继续完成并写入各层缓存，下一次查询可以直接命中。
+        """
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), self.source_timeouts[name]), None
+        except asyncio.TimeoutError:
+            bot_logger.warning(f"[MeAPI] 数据源 {name} 超过截止时间 {self.source_timeouts[name]}s，本次不等待")
+            # 后台完成时取走异常，避免出现 "exception was never retrieved"
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            return None, "timeout"
+        except Exception as e:
+            bot_logger.warning(f"[MeAPI] 数据源 {name} 获取失败: {e}")
+            return None, "error"
+
     async def get_player_data(self, player_name: str, season: str = None) -> Optional[Dict]:
         """获取玩家数据
         
+        排位、世界巡回赛、快速提现与走势图同时获取，各自有独立的截止时间；
+        超时或失败的数据源记录在 missing 中 (其中超时的另记在 timed_out 中)，卡片中对应部分标记为暂不可用。
+        
         Args:
             player_name: 玩家ID
             season: 赛季ID，默认为当前赛季
             
         Returns:
-            Dict: 玩家数据，包含排位、世界巡回赛等信息
+            Dict: 玩家数据，包含排位、世界巡回赛等信息；玩家不在排位榜上时返回 None
         """
         try:
             # 确保已初始化
@@ -90,31 +145,31 @@ class MeAPI:
             # 使用当前赛季
             season = season or settings.CURRENT_SEASON
             
-            # 并行获取各项数据
-            rank_data, wt_data, qc_data = await asyncio.gather(
-                self.season_manager.get_player_data(player_name, season, use_fuzzy_search=False),
-                self.world_tour_api.get_player_stats(player_name, season),
-                self.quick_cash_api.get_quick_cash_data(player_name, season)
-            )
+            # 并行获取各项数据 (走势图默认获取最近7天，time_range 单位为秒)
+            sources = {
+                "rank": self.season_manager.get_player_data(player_name, season, use_fuzzy_search=False),
+                "world_tour": self.world_tour_api.get_player_stats(player_name, season),
+                "quick_cash": self.quick_cash_api.get_quick_cash_data(player_name, season),
+                "chart": self.leaderboard_core.fetch_player_history(player_name, time_range=604800),
+            }
+            tasks = {name: asyncio.ensure_future(coro) for name, coro in sources.items()}
+            results = await asyncio.gather(*(self._await_source(name, task) for name, task in tasks.items()))
+            data = {name: value for name, (value, _) in zip(tasks, results)}
+            missing = [name for name, (_, reason) in zip(tasks, results) if reason]
+            timed_out = [name for name, (_, reason) in zip(tasks, results) if reason == "timeout"]
             
-            if not rank_data:
+            if not data["rank"] and "rank" not in missing:
                 bot_logger.warning(f"[MeAPI] 未找到玩家排位数据: {player_name}")
                 return None
-                
-            # 获取走势图数据 (默认获取最近7天)
-            try:
-                # Note: fetch_player_history expects time_range in seconds
-                chart_data = await self.leaderboard_core.fetch_player_history(player_name, time_range=604800) 
-            except Exception as chart_error:
-                bot_logger.warning(f"[MeAPI] 获取玩家 {player_name} 走势图数据失败: {chart_error}")
-                chart_data = []  # 获取失败则设置为空列表
             
             # 整合数据
             return {
-                "rank_data": rank_data,
-                "world_tour_data": wt_data,
-                "quick_cash_data": qc_data,
-                "chart_data": chart_data
+                "rank_data": data["rank"],
+                "world_tour_data": data["world_tour"],
+                "quick_cash_data": data["quick_cash"],
+                "chart_data": data["chart"] or [],
+                "missing": missing,
+                "timed_out": timed_out,
             }
             
         except Exception as e:
@@ -135,6 +190,7 @@ class MeAPI:
             wt_data = player_data.get("world_tour_data", {})
             qc_data = player_data.get("quick_cash_data", {})
             chart_data = player_data.get("chart_data", [])
+            missing = player_data.get("missing", [])
             
             if not rank_data:
                 return None
@@ -146,14 +202,7 @@ class MeAPI:
             
             # 获取段位信息
             league = rank_data.get("league", "Bronze 4")
-            # Ensure league name matches icon file naming convention (lowercase, hyphenated)
-            icon_league_name = league.lower().replace(' ', '-')
-            league_icon = f"../images/rank_icons/{icon_league_name}.png"
-            # Verify icon exists, fallback if needed (optional but good practice)
-            icon_path = os.path.join(self.resources_dir, "images", "rank_icons", f"{icon_league_name}.png")
-            if not os.path.exists(icon_path):
-                bot_logger.warning(f"Rank icon not found: {icon_path}, falling back to bronze-4.")
-                league_icon = "../images/rank_icons/bronze-4.png"
+            league_icon = self._get_rank_icon(league)
 
             # 计算评分等级
             # Use 'points' from rank_data if available (might be named differently, check API response)
@@ -163,6 +212,8 @@ class MeAPI:
             
             # 处理图表数据 - generates smooth path now
             chart_info = self._process_chart_data(chart_data)
+            if "chart" in missing:
+                chart_info["title"] = "走势 (暂不可用)"
             
             # 处理排名变化
             rank_change = rank_data.get("change", 0)
@@ -216,7 +267,8 @@ class MeAPI:
                 "qc_rank": str(qc_rank),
                 "qc_points": "{:,}".format(qc_points),
                 "season_number": settings.CURRENT_SEASON[1:],  # 移除's'前缀
-                "season_bg": season_bg
+                "season_bg": season_bg,
+                "missing_sections": missing,
             }
             
         except Exception as e:
@@ -508,6 +560,10 @@ class MeQuery:
             player_data = await self.api.get_player_data(player_name, season)
             if not player_data:
                 return None, f"\n⚠️ 未找到玩家 {player_name} 的数据"
+            if not player_data["rank_data"]:
+                if "rank" in player_data["timed_out"]:
+                    return None, "\n⚠️ 排位数据获取超时，请稍后重试"
+                return None, "\n⚠️ 排位数据查询失败，请稍后重试"
                 
             # 准备模板数据
             template_data = self.api.prepare_template_data(player_data)
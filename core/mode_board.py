@@ -0,0 +1,485 @@
+"""
+模式榜单快照
+
+世界巡回赛、快速提现、死亡竞赛等模式的榜单由同一套引擎处理：后台定期整体同步，
+只保留各模式需要的字段，按玩家比较差异后增量写入 Redis，并在内存中建立名称索引；
+查询直接读取快照，上游请求次数与查询量无关。新增模式只需继承 ModeBoardAPI 并声明配置。
+"""
+
+from typing import Any, Awaitable, Callable, ClassVar, Dict, List, Optional, Set, Tuple
+from collections import defaultdict
+from datetime import datetime, timedelta
+import asyncio
+import hashlib
+import time
+import orjson as json
+from utils.logger import bot_logger
+from utils.redis_manager import redis_manager
+from utils.base_api import BaseAPI
+from utils.config import settings
+from core.season import SeasonConfig
+
+
+NAME_FIELDS = ("name", "steamName", "psnName", "xboxName")
+# 所有模式都会用到的字段 (展示排名、排名变化、平台与战队)
+BASE_FIELDS = ("rank", "change", "clubTag") + NAME_FIELDS
+# 单条 HSET/HDEL 的字段数，避免超大命令阻塞 Redis
+WRITE_BATCH_SIZE = 1000
+
+
+def compact_player(player: Dict[str, Any], fields: Optional[Tuple[str, ...]]) -> Dict[str, Any]:
+    """只保留指定字段；fields 为 None 时保留全部"""
+    if fields is None:
+        return player
+    return {field: player[field] for field in fields if field in player}
+
+
+def _trigrams(text: str) -> Set[str]:
+    """小写文本的三元组；子串的三元组一定是原串三元组的子集"""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class BoardIndexer:
+    """
+    模式榜单的内存名称索引
+
+    保持与原先线性扫描相同的匹配语义：任一名称字段包含查询词 (不区分大小写) 的玩家中，
+    返回排名最靠前的一个。查询词不短于 3 个字符时，先用三元组倒排索引求候选集，再逐个校验。
+    """
+
+    def __init__(self, name_fields: Tuple[str, ...] = NAME_FIELDS):
+        self.name_fields = name_fields
+        self._players: List[Dict[str, Any]] = []  # 按榜单顺序
+        self._names: List[Tuple[str, ...]] = []  # 与 _players 对齐的小写名称字段
+        self._exact: Dict[str, int] = {}  # 小写完整 Embark ID -> 位置
+        self._trigrams: Dict[str, Set[int]] = {}
+        self._is_ready = False
+
+    def is_ready(self) -> bool:
+        """检查索引是否已构建并准备就绪"""
+        return self._is_ready
+
+    def build_index(self, players: List[Dict[str, Any]]) -> None:
+        """从榜单数据重建索引 (players 需按排名排序)"""
+        names, exact = [], {}
+        trigrams: Dict[str, Set[int]] = defaultdict(set)
+        for position, player in enumerate(players):
+            fields = tuple(filter(None, (str(player.get(field) or "").lower() for field in self.name_fields)))
+            names.append(fields)
+            if fields and player.get("name"):
+                exact.setdefault(player["name"].lower(), position)
+            for field in fields:
+                for trigram in _trigrams(field):
+                    trigrams[trigram].add(position)
+
+        # 原子性替换
+        self._players, self._names, self._exact, self._trigrams = list(players), names, exact, dict(trigrams)
+        self._is_ready = True
+        bot_logger.debug(f"[BoardIndexer] 索引构建完成，共 {len(players)} 名玩家，{len(trigrams)} 个三元组")
+
+    def find(self, query: str) -> Optional[Dict[str, Any]]:
+        """查找排名最靠前的匹配玩家"""
+        query = query.lower()
+        if not query or not self._is_ready:
+            return None
+
+        # 完整 Embark ID (带 #) 是唯一的，直接命中
+        if "#" in query and query in self._exact:
+            return self._players[self._exact[query]]
+
+        query_trigrams = _trigrams(query)
+        if query_trigrams:
+            postings = sorted((self._trigrams.get(t, ()) for t in query_trigrams), key=len)
+            if not postings[0]:
+                return None
+            candidates = set(postings[0]).intersection(*postings[1:])
+            positions = sorted(candidates)
+        else:
+            positions = range(len(self._players))
+
+        for position in positions:
+            if any(query in field for field in self._names[position]):
+                return self._players[position]
+        return None
+
+    def top(self, limit: int) -> List[Dict[str, Any]]:
+        """按榜单顺序返回前 limit 名玩家"""
+        return self._players[:limit] if self._is_ready else []
+
+    def find_exact(self, name: str) -> Optional[Dict[str, Any]]:
+        """按完整 Embark ID 精确查找 (不区分大小写)"""
+        position = self._exact.get(name.lower()) if self._is_ready else None
+        return self._players[position] if position is not None else None
+
+    def __len__(self) -> int:
+        return len(self._players)
+
+
+class ModeBoard:
+    """
+    单个模式单个赛季的榜单快照 - 类似 Season
+
+    全量榜单同步到 Redis Hash (玩家名 -> 数据)，并在内存中建立名称索引，
+    查询时不再下载和扫描整个榜单。当前赛季在后台定期同步，历史赛季只在首次查询时同步一次。
+
+    同步时先按 stored_fields 裁剪字段，再与上次写入的内容逐个玩家比较，只 HSET 变化的玩家、
+    HDEL 下榜的玩家；进程内没有上次的内容 (或 Redis 中的数据已过期) 时，分批写入临时键后
+    RENAME 原子替换。所有写入都在一次 pipeline 往返内完成。
+    """
+
+    def __init__(
+        self, mode: str, season_id: str, api: BaseAPI, headers: Dict[str, str],
+        platform: str = "crossplay", name_fields: Tuple[str, ...] = NAME_FIELDS,
+        key_prefix: Optional[str] = None, stored_fields: Optional[Tuple[str, ...]] = None,
+        legacy_keys: Tuple[str, ...] = (), on_indexed: Optional[Callable[["ModeBoard"], Awaitable[None]]] = None,
+    ):
+        self.mode = mode
+        self.season_id = season_id
+        self.api = api
+        self.headers = headers
+        self.platform = platform
+        self.update_interval = settings.UPDATE_INTERVAL
+        self.indexer = BoardIndexer(name_fields)
+        self.stored_fields = stored_fields
+        self._on_indexed = on_indexed
+        self._is_current = SeasonConfig.is_current_season(season_id)
+        self._update_task = None
+        self._update_lock = asyncio.Lock()
+        # 首次初始化只由一个协程执行，其他赛季的查询不受影响
+        self._init_lock = asyncio.Lock()
+        # 上次初始化失败的时间 (time.monotonic)，退避窗口内不再重试
+        self.init_failed_at: Optional[float] = None
+        # 上次写入 Redis 的内容 (小写玩家名 -> 序列化数据)，用于增量写入
+        self._stored: Optional[Dict[str, str]] = None
+        # 最近一次同步的写入量
+        self.last_sync: Dict[str, Any] = {}
+
+        # Redis key 定义
+        prefix = key_prefix or mode
+        self.redis_key_players = f"{prefix}:{season_id}:players"  # Hash: 小写玩家名 -> 玩家数据
+        self.redis_key_source_digest = f"{prefix}:{season_id}:source_digest"  # String: 上次处理的 API 响应摘要
+        self.redis_key_last_update = f"{prefix}:{season_id}:last_update"
+        # 旧版本存储格式遗留的键，全量写入时顺带清理
+        self.legacy_keys = tuple(key.format(season=season_id) for key in legacy_keys)
+
+    @property
+    def api_url(self) -> str:
+        return f"/v1/leaderboard/{self.season_id}{self.mode}/{self.platform}"
+
+    @property
+    def is_current(self) -> bool:
+        return self._is_current
+
+    async def initialize(self) -> None:
+        """初始化榜单：Redis 中有完整同步的数据时直接加载索引，否则从 API 同步"""
+        # 响应摘要只由全量同步写入，用作"已完整同步"的标记
+        if await redis_manager._get_client().exists(self.redis_key_players, self.redis_key_source_digest) == 2:
+            await self._load_index_from_redis()
+        if not self.indexer.is_ready():
+            await self._update_data(force_update=True)
+
+        # 只为当前赛季创建后台更新任务
+        if self._is_current and not self._update_task:
+            self._update_task = asyncio.create_task(self._update_loop())
+
+    async def _load_index_from_redis(self) -> None:
+        """从 Redis 加载榜单并按排名重建内存索引"""
+        data = await redis_manager._get_client().hgetall(self.redis_key_players)
+        players = [json.loads(value) for value in data.values()]
+        players.sort(key=lambda p: p.get("rank") or float("inf"))
+        if players:
+            self._stored = dict(data)
+            self.indexer.build_index(players)
+            await self._notify_indexed()
+            bot_logger.info(f"[ModeBoard] 从 Redis 加载 {self.mode} 赛季 {self.season_id} 榜单，共 {len(players)} 名玩家")
+
+    async def _notify_indexed(self) -> None:
+        """索引重建后通知所属 API (如构建深度搜索索引)"""
+        if self._on_indexed is None:
+            return
+        try:
+            await self._on_indexed(self)
+        except Exception as e:
+            bot_logger.error(f"[ModeBoard] {self.mode} 赛季 {self.season_id} 索引回调出错: {e}", exc_info=True)
+
+    async def _update_loop(self) -> None:
+        """数据更新循环 (仅限当前赛季)"""
+        while True:
+            try:
+                await asyncio.sleep(self.update_interval)
+                await self._update_data()
+            except asyncio.CancelledError:
+                bot_logger.info(f"[ModeBoard] {self.mode} 赛季 {self.season_id} 的更新循环已取消")
+                break
+            except Exception as e:
+                bot_logger.error(f"[ModeBoard] {self.mode} 赛季 {self.season_id} 更新循环出错: {e}", exc_info=True)
+                await asyncio.sleep(60)
+
+    async def _update_data(self, force_update: bool = False) -> None:
+        """从 API 同步榜单到 Redis 并重建索引"""
+        async with self._update_lock:
+            client = redis_manager._get_client()
+            if not force_update and self._is_current:
+                last_update_str = await client.get(self.redis_key_last_update)
+                if last_update_str:
+                    last_update_time = datetime.fromisoformat(last_update_str)
+                    if datetime.now() - last_update_time < timedelta(seconds=self.update_interval):
+                        bot_logger.debug(f"[ModeBoard] {self.mode} 赛季 {self.season_id} 数据在更新间隔内，跳过本次更新")
+                        return
+
+            # 后台同步不接受 stale 数据；304 时由 BaseAPI 直接返回缓存内容
+            response = await self.api.get(self.api_url, headers=self.headers, use_cache=True, allow_stale=False)
+            if not (response and response.status_code == 200):
+                bot_logger.error(f"[ModeBoard] 获取 {self.mode} 赛季 {self.season_id} 数据失败")
+                return
+
+            expire_time = self.update_interval * 2 if self._is_current else None
+            source_digest = hashlib.blake2b(response.content, digest_size=16).hexdigest()
+
+            # 响应体未变化时只续期，不解析也不重建索引
+            if self.indexer.is_ready() and await client.get(self.redis_key_source_digest) == source_digest:
+                pipeline = client.pipeline(transaction=False)
+                pipeline.set(self.redis_key_last_update, datetime.now().isoformat(), ex=expire_time)
+                if expire_time:
+                    pipeline.expire(self.redis_key_players, expire_time)
+                    pipeline.expire(self.redis_key_source_digest, expire_time)
+                await pipeline.execute()
+                bot_logger.debug(f"[ModeBoard] {self.mode} 赛季 {self.season_id} 数据未变化，仅刷新过期时间")
+                return
+
+            data = response.json()
+            players = data.get("data", []) if isinstance(data, dict) else []
+            if not isinstance(players, list) or not players:
+                bot_logger.warning(f"[ModeBoard] {self.mode} 赛季 {self.season_id} API 未返回任何玩家数据")
+                return
+
+            players = [compact_player(p, self.stored_fields) for p in players]
+            mapping = {p["name"].lower(): json.dumps(p).decode() for p in players if p.get("name")}
+            if not mapping:
+                bot_logger.warning(f"[ModeBoard] {self.mode} 赛季 {self.season_id} API 数据中没有玩家名")
+                return
+
+            pipeline = client.pipeline(transaction=False)
+            if self._stored is not None and await client.exists(self.redis_key_players):
+                self.last_sync = self._queue_diff(pipeline, mapping)
+            else:
+                self.last_sync = self._queue_full_write(pipeline, mapping)
+            pipeline.set(self.redis_key_source_digest, source_digest, ex=expire_time)
+            pipeline.set(self.redis_key_last_update, datetime.now().isoformat(), ex=expire_time)
+            if expire_time:
+                pipeline.expire(self.redis_key_players, expire_time)
+            await pipeline.execute()
+            self._stored = mapping
+
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self.indexer.build_index, players)
+            await self._notify_indexed()
+            bot_logger.info(
+                f"[ModeBoard] {self.mode} 赛季 {self.season_id} 数据已同步，共 {len(mapping)} 名玩家，"
+                f"写入 {self.last_sync['written']}，删除 {self.last_sync['removed']}"
+            )
+
+    def _queue_diff(self, pipeline, mapping: Dict[str, str]) -> Dict[str, Any]:
+        """只写入变化的玩家、删除下榜的玩家"""
+        changed = [(name, value) for name, value in mapping.items() if self._stored.get(name) != value]
+        removed = [name for name in self._stored if name not in mapping]
+        for i in range(0, len(changed), WRITE_BATCH_SIZE):
+            pipeline.hset(self.redis_key_players, mapping=dict(changed[i:i + WRITE_BATCH_SIZE]))
+        for i in range(0, len(removed), WRITE_BATCH_SIZE):
+            pipeline.hdel(self.redis_key_players, *removed[i:i + WRITE_BATCH_SIZE])
+        return {"players": len(mapping), "written": len(changed), "removed": len(removed), "full": False}
+
+    def _queue_full_write(self, pipeline, mapping: Dict[str, str]) -> Dict[str, Any]:
+        """分批写入临时键后 RENAME 原子替换，读者不会看到写了一半的榜单"""
+        staging_key = f"{self.redis_key_players}:staging"
+        items = list(mapping.items())
+        pipeline.delete(staging_key)
+        for i in range(0, len(items), WRITE_BATCH_SIZE):
+            pipeline.hset(staging_key, mapping=dict(items[i:i + WRITE_BATCH_SIZE]))
+        pipeline.rename(staging_key, self.redis_key_players)
+        if self.legacy_keys:
+            pipeline.delete(*self.legacy_keys)
+        return {"players": len(mapping), "written": len(mapping), "removed": 0, "full": True}
+
+    def find(self, player_name: str) -> Optional[Dict[str, Any]]:
+        """在内存索引中查找玩家"""
+        return self.indexer.find(player_name)
+
+    async def stop(self) -> None:
+        """停止后台更新任务"""
+        if self._update_task and not self._update_task.done():
+            self._update_task.cancel()
+        self._update_task = None
+
+
+class ModeBoardAPI(BaseAPI):
+    """
+    以榜单快照提供查询的模式API基类
+
+    子类设置 MODE (API 路径中的模式名，如 quickcash) 与 STAT_FIELDS (该模式展示的统计字段)；
+    各赛季榜单在同一子类的所有实例间共享。
+    快照未命中时是否回退到单次上游查询由 FALLBACK_ON_MISS 决定：全量榜单的未命中即为不在榜，
+    而按名称查询的模式 (快照可能落后于新上榜的玩家) 需要回退。
+    """
+
+    MODE: ClassVar[str] = ""
+    LOG_TAG: ClassVar[str] = "ModeBoardAPI"
+    # Redis 键前缀，默认与 MODE 相同
+    KEY_PREFIX: ClassVar[str] = ""
+    # 参与匹配的名称字段
+    NAME_FIELDS: ClassVar[Tuple[str, ...]] = NAME_FIELDS
+    # 除 BASE_FIELDS 外需要保留的统计字段；None 表示保留 API 返回的全部字段
+    STAT_FIELDS: ClassVar[Optional[Tuple[str, ...]]] = None
+    # 旧存储格式遗留的键 (可含 {season})，全量写入时删除
+    LEGACY_KEYS: ClassVar[Tuple[str, ...]] = ()
+    # 快照中找不到玩家时是否回退到上游查询
+    FALLBACK_ON_MISS: ClassVar[bool] = False
+    # 回退路径是否启用对冲请求
+    HEDGE_FALLBACK: ClassVar[bool] = False
+    # 榜单初始化失败后的重试退避 (秒)，期间查询直接走回退路径
+    INIT_RETRY_BACKOFF: ClassVar[float] = 60.0
+
+    _boards: ClassVar[Dict[str, ModeBoard]] = {}
+    # lookups: 查询次数；hits: 快照命中；fallbacks: 回退到上游的次数；fallback_hits: 回退后找到；misses: 最终未找到
+    _lookup_stats: ClassVar[Dict[str, int]] = {}
+    _registry: ClassVar[List[type]] = []
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._boards = {}
+        cls._lookup_stats = {"lookups": 0, "hits": 0, "fallbacks": 0, "fallback_hits": 0, "misses": 0}
+        ModeBoardAPI._registry.append(cls)
+
+    def __init__(self):
+        super().__init__(settings.api_base_url, timeout=10)
+        self.headers = {
+            "Accept": "application/json",
+            "User-Agent": "TheFinals-Bot/1.0"
+        }
+        self.platform = "crossplay"
+
+    async def initialize(self) -> None:
+        """预热当前赛季的榜单与索引，并启动后台同步"""
+        await self.get_board(SeasonConfig.CURRENT_SEASON)
+
+    async def get_board(self, season: str) -> Optional[ModeBoard]:
+        """获取或创建赛季榜单；同步失败 (或处于失败退避窗口内) 时返回 None"""
+        board = self._boards.get(season)
+        if board is None:
+            board = ModeBoard(
+                self.MODE, season, self, self.headers, self.platform, self.NAME_FIELDS,
+                key_prefix=self.KEY_PREFIX or None, stored_fields=self.stored_fields(),
+                legacy_keys=self.LEGACY_KEYS, on_indexed=self._on_board_indexed,
+            )
+            self._boards[season] = board
+        if board.indexer.is_ready():
+            return board
+        if self._in_init_backoff(board):
+            return None
+
+        # 每个赛季独立加锁，某个赛季的同步不会阻塞其他赛季的查询
+        async with board._init_lock:
+            if not board.indexer.is_ready() and not self._in_init_backoff(board):
+                try:
+                    await board.initialize()
+                except Exception as e:
+                    bot_logger.error(f"[{self.LOG_TAG}] 初始化 {self.MODE} 赛季 {season} 榜单失败: {e}")
+                if board.indexer.is_ready():
+                    board.init_failed_at = None
+                else:
+                    board.init_failed_at = time.monotonic()
+                    bot_logger.warning(
+                        f"[{self.LOG_TAG}] {self.MODE} 赛季 {season} 榜单不可用，{self.INIT_RETRY_BACKOFF:.0f} 秒内不再重试"
+                    )
+        return board if board.indexer.is_ready() else None
+
+    def _in_init_backoff(self, board: ModeBoard) -> bool:
+        """榜单上次初始化失败是否仍在退避窗口内"""
+        return board.init_failed_at is not None and time.monotonic() - board.init_failed_at < self.INIT_RETRY_BACKOFF
+
+    @classmethod
+    def stored_fields(cls) -> Optional[Tuple[str, ...]]:
+        """快照中保留的字段"""
+        if cls.STAT_FIELDS is None:
+            return None
+        return tuple(dict.fromkeys(BASE_FIELDS + cls.NAME_FIELDS + cls.STAT_FIELDS))
+
+    async def _on_board_indexed(self, board: ModeBoard) -> None:
+        """榜单索引重建后的回调，子类可覆盖"""
+
+    async def get_top_players(self, season: Optional[str] = None, limit: int = 5) -> List[str]:
+        """获取指定赛季榜单前 limit 名的玩家名"""
+        board = await self.get_board(season or SeasonConfig.CURRENT_SEASON)
+        if board is None:
+            return []
+        return [p["name"] for p in board.indexer.top(limit) if p.get("name")]
+
+    @classmethod
+    async def stop(cls) -> None:
+        """停止所有榜单的后台同步"""
+        for board in cls._boards.values():
+            await board.stop()
+        cls._boards.clear()
+
+    async def find_player(self, player_name: str, season: Optional[str] = None) -> Optional[dict]:
+        """从榜单快照查找玩家；快照不可用 (或未命中且 FALLBACK_ON_MISS) 时回退到上游查询"""
+        season = season or SeasonConfig.CURRENT_SEASON
+        self._lookup_stats["lookups"] += 1
+        board = await self.get_board(season)
+        player = self._lookup(board, player_name) if board is not None else None
+        if player is not None:
+            self._lookup_stats["hits"] += 1
+            return player
+
+        if board is None or self.FALLBACK_ON_MISS:
+            self._lookup_stats["fallbacks"] += 1
+            player = await self._fetch_player(player_name, season)
+            if player is not None:
+                self._lookup_stats["fallback_hits"] += 1
+                return player
+
+        self._lookup_stats["misses"] += 1
+        bot_logger.warning(f"[{self.LOG_TAG}] 未找到玩家数据: {player_name}")
+        return None
+
+    def _lookup(self, board: ModeBoard, player_name: str) -> Optional[dict]:
+        """在快照中查找玩家，子类可改为精确匹配"""
+        return board.find(player_name)
+
+    async def _fetch_player(self, player_name: str, season: str) -> Optional[dict]:
+        """回退路径：默认直接请求整个榜单并扫描，按名称查询的模式可覆盖为单次查询"""
+        return await self._scan_player_data(player_name, season)
+
+    @classmethod
+    def get_lookup_stats(cls) -> Dict[str, Any]:
+        """返回快照命中率与回退率"""
+        stats = dict(cls._lookup_stats)
+        total = stats["lookups"]
+        stats["hit_ratio"] = round(stats["hits"] / total, 4) if total else 0.0
+        stats["fallback_ratio"] = round(stats["fallbacks"] / total, 4) if total else 0.0
+        return stats
+
+    @classmethod
+    def get_all_lookup_stats(cls) -> Dict[str, Dict[str, Any]]:
+        """返回所有模式的快照查询统计"""
+        return {api_cls.MODE: api_cls.get_lookup_stats() for api_cls in ModeBoardAPI._registry}
+
+    async def _scan_player_data(self, player_name: str, season: str) -> Optional[dict]:
+        """直接请求整个榜单并线性查找 (仅作为回退路径)"""
+        url = f"/v1/leaderboard/{season}{self.MODE}/{self.platform}"
+        response = await self.get(url, headers=self.headers, hedge=self.HEDGE_FALLBACK)
+        if not response or response.status_code != 200:
+            bot_logger.error(f"[{self.LOG_TAG}] API请求失败: {season}")
+            return None
+
+        data = response.json()
+        players = data.get("data", []) if isinstance(data, dict) else None
+        if not isinstance(players, list):
+            bot_logger.error(f"[{self.LOG_TAG}] API返回数据格式错误: {season}")
+            return None
+
+        query = player_name.lower()
+        for player in players:
+            if any(query in str(player.get(field) or "").lower() for field in self.NAME_FIELDS):
+                return player
+        return None
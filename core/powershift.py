@@ -1,19 +1,25 @@
-from typing import Optional, Dict, List, Tuple, Union
-import asyncio
+from typing import Optional, Dict, Tuple, Union
 import os
 from utils.logger import bot_logger
-from utils.base_api import BaseAPI
+from core.mode_board import ModeBoardAPI
 from utils.config import settings
 from core.season import SeasonConfig, SeasonManager
 from utils.templates import SEPARATOR
 from core.image_generator import ImageGenerator
 
-class PowerShiftAPI(BaseAPI):
+class PowerShiftAPI(ModeBoardAPI):
     """平台争霸API封装"""
+
+    MODE = "powershift"
+    LOG_TAG = "PowerShiftAPI"
+    NAME_FIELDS = ("name",)
+    # PowerShift 使用 clan 而不是 clubTag
+    STAT_FIELDS = ("points", "clan")
+    # 快照可能落后于新上榜的玩家，未命中时按名称查询上游
+    FALLBACK_ON_MISS = True
     
     def __init__(self):
-        super().__init__(settings.api_base_url, timeout=10)
-        self.platform = "crossplay"
+        super().__init__()
         self.season_manager = SeasonManager()
         # 支持的平台显示
         self.platforms = {
@@ -21,46 +27,39 @@ class PowerShiftAPI(BaseAPI):
             "xbox": "Xbox",
             "psn": "PlayStation"
         }
-        # 设置默认请求头
-        self.headers = {
-            "Accept": "application/json",
-            "User-Agent": "TheFinals-Bot/1.0"
-        }
 
     async def get_player_stats(self, player_name: str, **kwargs) -> Optional[dict]:
         """查询玩家数据（支持模糊搜索）"""
         try:
-            
-            season = settings.CURRENT_SEASON
-            url = f"/v1/leaderboard/{season}powershift/{self.platform}"
-            params = {"name": player_name}
-            
-            response = await self.get(url, params=params, headers=self.headers)
-            if not response or response.status_code != 200:
-                return None
-                
-            data = self.handle_response(response)
-            if not isinstance(data, dict) or not data.get("count"):
-                return None
-                
-            # 如果是完整ID，直接返回第一个匹配
-            if "#" in player_name:
-                return {"data": data["data"][0]} if data.get("data") else None
-                
-            # 否则进行模糊匹配
-            matches = []
-            for player in data.get("data", []):
-                name = player.get("name", "").lower()
-                if player_name.lower() in name:
-                    matches.append(player)
-                    
-            # 返回最匹配的结果
-            return {"data": matches[0]} if matches else None
-            
+            player = await self.find_player(player_name, settings.CURRENT_SEASON)
+            return {"data": player} if player else None
         except Exception as e:
             bot_logger.error(f"查询失败 - 玩家: {player_name}, 错误: {str(e)}")
             return None
 
+    async def _fetch_player(self, player_name: str, season: str) -> Optional[dict]:
+        """按名称查询上游 (快照未命中时的回退路径)"""
+        url = f"/v1/leaderboard/{season}powershift/{self.platform}"
+        params = {"name": player_name}
+        
+        response = await self.get(url, params=params, headers=self.headers)
+        if not response or response.status_code != 200:
+            return None
+            
+        data = self.handle_response(response)
+        if not isinstance(data, dict) or not data.get("count"):
+            return None
+            
+        # 如果是完整ID，直接返回第一个匹配
+        if "#" in player_name:
+            return data["data"][0] if data.get("data") else None
+            
+        # 否则进行模糊匹配
+        for player in data.get("data", []):
+            if player_name.lower() in player.get("name", "").lower():
+                return player
+        return None
+
     def _format_player_data(self, data: dict) -> Tuple[str, str, str, str]:
         """格式化玩家数据"""
         if not data:
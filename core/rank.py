@@ -312,6 +312,34 @@ class RankQuery:
             error_msg = "\n⚠️ 未找到玩家数据"
             return None, error_msg, None, None
 
+    async def _generate_rank_image(self, template_data: Dict, season: str) -> Optional[bytes]:
+        """生成排位卡片图片"""
+        # 根据赛季选择HTML模板文件名
+        if season == "s7":
+            template_filename = "rank_s7.html"
+        else:
+            template_filename = "rank.html"
+
+        # 现在直接将模板文件名传递给ImageGenerator
+        return await self.image_generator.generate_image(
+            template_data=template_data,
+            html_content=template_filename,
+            wait_selectors=['.bg-container'],
+            image_quality=80,
+            wait_selectors_timeout_ms=300
+        )
+
+    async def prerender_top_players(self, limit: int) -> Optional[int]:
+        """预渲染当前赛季前 limit 名玩家的排位卡片，返回成功数量 (没有数据时返回 None)"""
+        season = SeasonConfig.CURRENT_SEASON
+        rendered = 0
+        for player_name in await self.api.season_manager.get_top_players(season, limit=limit):
+            player_data = await self.api.season_manager.get_player_data(player_name, season, use_fuzzy_search=False)
+            template_data = self.prepare_template_data(player_data, season)
+            if template_data and await self._generate_rank_image(template_data, season):
+                rendered += 1
+        return rendered or None
+
     async def process_rank_command(self, player_name: str = None, season: str = None) -> Tuple[Optional[bytes], Optional[str], Optional[dict], Optional[dict]]:
         """处理排位查询命令"""
         try:
@@ -357,20 +385,7 @@ class RankQuery:
                     error_msg = "\n⚠️ 处理玩家数据时出错"
                     return None, error_msg, None, None
 
-                # 根据赛季选择HTML模板文件名
-                if season == "s7":
-                    template_filename = "rank_s7.html"
-                else:
-                    template_filename = "rank.html"
-
-                # 现在直接将模板文件名传递给ImageGenerator
-                image_data = await self.image_generator.generate_image(
-                    template_data=template_data,
-                    html_content=template_filename,
-                    wait_selectors=['.bg-container'],
-                    image_quality=80,
-                    wait_selectors_timeout_ms=300
-                )
+                image_data = await self._generate_rank_image(template_data, season)
                 
                 if not image_data:
                     error_msg = "\n⚠️ 生成图片时出错"
@@ -21,6 +21,8 @@ from utils.browser import browser_manager
 from utils.redis_manager import redis_manager
 from utils.provider_manager import get_provider_manager
 from utils.image_manager import image_manager
+from utils.prerender import prerender_scheduler
+from utils.http_client import http_clients
 from core.api import get_app, set_core_app
 from core.constants import CLEANUP_TIMEOUT
 from core.signal_utils import ensure_exit, setup_signal_handlers
@@ -36,29 +38,20 @@ from core.announcement import announcement_manager
 async def _check_ip() -> None:
     """与旧版代码保持一致，省略具体实现以示例可照旧粘贴原函数。"""
     from utils.base_api import BaseAPI
-    import aiohttp
-    import ssl
-    from aiohttp import ClientTimeout
 
+    # 与 BaseAPI 共用进程级客户端注册表，代理沿用 HTTP(S)_PROXY 环境变量
     proxy_url = BaseAPI._get_proxy_url()
-    ssl_ctx = ssl.create_default_context()
-    ssl_ctx.check_hostname = False
-    ssl_ctx.verify_mode = ssl.CERT_NONE
-    conn = aiohttp.TCPConnector(ssl=ssl_ctx, force_close=True, limit=5, ttl_dns_cache=300)
-    timeout = ClientTimeout(total=10, connect=5)
-
-    async with aiohttp.ClientSession(connector=conn, timeout=timeout) as session:
-        for url in ("https://httpbin.org/ip", "http://ip-api.com/json"):
-            try:
-                async with session.get(url, proxy=proxy_url, ssl=ssl_ctx) as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        ip = data.get("origin") or data.get("query")
-                        if ip:
-                            bot_logger.info(f"网络: IP={ip} 代理={'有' if proxy_url else '无'}")
-                            return
-            except Exception:
-                continue
+    for url in ("https://httpbin.org/ip", "http://ip-api.com/json"):
+        try:
+            resp = await http_clients.get_client(url, verify=False).get(url, timeout=10)
+            if resp.status_code == 200:
+                data = resp.json()
+                ip = data.get("origin") or data.get("query")
+                if ip:
+                    bot_logger.info(f"网络: IP={ip} 代理={'有' if proxy_url else '无'}")
+                    return
+        except Exception:
+            continue
     bot_logger.warning("无法获取出口 IP")
 
 
@@ -158,10 +151,12 @@ async def _async_main() -> None:
         bot_logger.info("检测到服务停止，开始全局清理...")
         if platforms:
             await asyncio.gather(*(p.stop() for p in platforms), return_exceptions=True)
+        await prerender_scheduler.stop()
         if core_app:
             await core_app.cleanup()
         
         await image_manager.stop()
+        await http_clients.close_all()
 
 
 # ---------------------------------------------------------
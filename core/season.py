@@ -8,6 +8,7 @@ from utils.redis_manager import redis_manager
 from utils.base_api import BaseAPI
 from utils.config import settings
 from core.search_indexer import SearchIndexer
+from utils.prerender import prerender_scheduler
 
 
 class SeasonConfig:
@@ -129,8 +130,8 @@ class Season:
             try:
                 bot_logger.info(f"开始更新赛季 {self.season_id} 数据到 Redis...")
                 api_url = SeasonConfig.get_api_url(self.season_id)
-                # 优化：启用HTTP缓存，支持304 Not Modified响应，大幅减少流量
-                response = await self.api.get(api_url, headers=self.headers, use_cache=True)
+                # 优化：启用HTTP缓存，支持304 Not Modified响应，大幅减少流量；后台同步不接受 stale 数据
+                response = await self.api.get(api_url, headers=self.headers, use_cache=True, allow_stale=False)
                 
                 if not (response and response.status_code == 200):
                     bot_logger.error(f"获取赛季 {self.season_id} API 数据失败: {response.status_code if response else 'No response'}")
@@ -196,6 +197,10 @@ class Season:
                         players
                     )
 
+                # 6. 当前赛季数据与索引就绪后预渲染热门卡片
+                if self._is_current:
+                    prerender_scheduler.notify("season")
+
             except Exception as e:
                 bot_logger.error(f"更新赛季 {self.season_id} Redis 数据失败: {e}", exc_info=True)
                 raise
@@ -1,30 +1,34 @@
-from typing import Optional, Dict, List, Tuple, Union
+from typing import ClassVar, Optional, Dict, Tuple, Union
 import asyncio
 import os
-import orjson as json
 from utils.logger import bot_logger
 from utils.config import settings
-from utils.base_api import BaseAPI
+from core.mode_board import ModeBoard, ModeBoardAPI
 from core.season import SeasonManager, SeasonConfig
 from utils.templates import SEPARATOR
-from utils.redis_manager import RedisManager
 from core.search_indexer import SearchIndexer
 from core.image_generator import ImageGenerator
 
-class WorldTourAPI(BaseAPI):
+class WorldTourAPI(ModeBoardAPI):
     """世界巡回赛API封装"""
+
+    MODE = "worldtour"
+    LOG_TAG = "WorldTourAPI"
+    KEY_PREFIX = "wt"
+    STAT_FIELDS = ("cashouts",)
+    # 旧版本的整表 JSON 与前 N 名列表
+    LEGACY_KEYS = ("wt:{season}:leaderboard", "wt:{season}:top")
+    # 快照可能落后于新上榜的玩家，未命中时按名称查询上游
+    FALLBACK_ON_MISS = True
+    HEDGE_FALLBACK = True
+
+    # 当前赛季的深度搜索索引，在所有实例间共享
+    _search_indexer: ClassVar[SearchIndexer] = SearchIndexer()
     
     def __init__(self):
-        super().__init__(settings.api_base_url, timeout=10)
-        self.platform = "crossplay"
+        super().__init__()
         self.season_manager = SeasonManager()
-        self.redis = RedisManager()
-        self.search_indexer = SearchIndexer()
-        self._initialized = False
-        self._lock = asyncio.Lock()
-        self._update_task = None
-        self._stop_event = asyncio.Event()
-        self._force_stop = False
+        self.search_indexer = self._search_indexer
         
         # 支持的赛季列表
         self.seasons = {
@@ -32,11 +36,6 @@ class WorldTourAPI(BaseAPI):
             for season_id in self.season_manager.get_all_seasons()
             if season_id.startswith('s') and int(season_id[1:]) >= 3  # 只支持S3及以后的赛季
         }
-        # 设置默认请求头
-        self.headers = {
-            "Accept": "application/json",
-            "User-Agent": "TheFinals-Bot/1.0"
-        }
         
         # 区分当前赛季和历史赛季
         self.current_season_id = settings.CURRENT_SEASON
@@ -48,181 +47,52 @@ class WorldTourAPI(BaseAPI):
         bot_logger.info("[WorldTourAPI] 初始化完成")
         
     async def initialize(self):
-        """初始化API"""
-        if self._initialized:
-            return
-            
-        try:
-            async with self._lock:
-                if self._initialized:
-                    return
-                    
-                # 初始化当前赛季数据
-                bot_logger.info(f"[WorldTourAPI] 开始初始化当前赛季 {self.current_season_id} 数据...")
-                try:
-                    await self._update_season_data(self.current_season_id)
-                except Exception as e:
-                    bot_logger.error(f"[WorldTourAPI] 初始化当前赛季 {self.current_season_id} 数据失败: {str(e)}")
-                bot_logger.info(f"[WorldTourAPI] 当前赛季 {self.current_season_id} 数据初始化完成")
-                
-                # 初始化历史赛季数据 (检查持久化存储或从API获取)
-                bot_logger.info("[WorldTourAPI] 开始检查/初始化历史赛季数据...")
-                for season_id in self.historical_seasons:
-                    try:
-                        await self._initialize_historical_season(season_id)
-                    except Exception as e:
-                        bot_logger.error(f"[WorldTourAPI] 初始化历史赛季 {season_id} 数据失败: {str(e)}")
-                bot_logger.info("[WorldTourAPI] 历史赛季数据检查/初始化完成")
-                
-                # 创建当前赛季的更新任务
-                if not self._update_task:
-                    self._update_task = asyncio.create_task(self._update_loop())
-                    bot_logger.debug(f"[WorldTourAPI] 创建当前赛季数据更新任务, rotation: {settings.UPDATE_INTERVAL}秒")
-                
-                self._initialized = True
-                bot_logger.info("[WorldTourAPI] 初始化完成")
-                
-        except Exception as e:
-            bot_logger.error(f"[WorldTourAPI] 初始化失败: {str(e)}")
-            raise
-            
-    async def _initialize_historical_season(self, season_id: str):
-        """初始化历史赛季数据 (检查Redis或从API获取)"""
-        leaderboard_key = f"wt:{season_id}:leaderboard"
-        
-        # 检查Redis中是否已有数据
-        exists = await self.redis.exists(leaderboard_key)
-        if exists:
-            bot_logger.info(f"[WorldTourAPI] 历史赛季 {season_id} 数据已存在于Redis, 跳过API获取")
-            return
-        
-        # 如果没有数据，从API获取并存入数据库
-        bot_logger.info(f"[WorldTourAPI] Redis无数据，开始从API获取赛季 {season_id} 数据...")
-        await self._update_season_data(season_id)
-        
-    async def _update_loop(self):
-        """数据更新循环 (只更新当前赛季)"""
-        try:
-            while not (self._stop_event.is_set() or self._force_stop):
-                try:
-                    # 检查强制停止标志
-                    if self._force_stop:
-                        return
-                        
-                    # 只更新当前赛季数据
-                    bot_logger.debug(f"[WorldTourAPI] 开始更新当前赛季 {self.current_season_id} 数据")
-                    await self._update_season_data(self.current_season_id)
-                    bot_logger.debug(f"[WorldTourAPI] 当前赛季 {self.current_season_id} 数据更新完成")
-                    
-                    # 等待下一次更新
-                    for _ in range(settings.UPDATE_INTERVAL):
-                        if self._force_stop:
-                            return
-                        await asyncio.sleep(1)
-                        
-                except Exception as e:
-                    if self._force_stop:
-                        return
-                    bot_logger.error(f"[WorldTourAPI] 更新循环错误: {str(e)}")
-                    await asyncio.sleep(5)
-                    
-        finally:
-            bot_logger.info("[WorldTourAPI] 数据更新循环已停止")
-            
-    async def _update_season_data(self, season: str):
-        """更新指定赛季的数据，统一存入 Redis"""
-        is_current = SeasonConfig.is_current_season(season)
-        bot_logger.debug(f"[WorldTourAPI] 准备更新赛季 {season} 数据到 Redis")
-
-        try:
-            url = f"/v1/leaderboard/{season}worldtour/{self.platform}"
-            # 优化：明确启用HTTP缓存，支持304 Not Modified响应，减少流量
-            response = await self.get(url, headers=self.headers, use_cache=True)
-            if not response or response.status_code != 200:
-                bot_logger.warning(f"[WorldTourAPI] 获取赛季 {season} API数据失败，状态码: {response.status_code if response else 'N/A'}")
-                return
-
-            data = self.handle_response(response)
-            if not isinstance(data, dict) or not data.get("count"):
-                bot_logger.warning(f"[WorldTourAPI] 赛季 {season} API数据格式无效或为空")
-                return
-
-            players = data.get("data", [])
-            if not players:
-                bot_logger.warning(f"[WorldTourAPI] 赛季 {season} 无玩家数据")
-                return
+        """预热当前赛季 (启动后台同步) 与各历史赛季的榜单"""
+        bot_logger.info(f"[WorldTourAPI] 开始初始化当前赛季 {self.current_season_id} 数据...")
+        await self.get_board(self.current_season_id)
 
-            # 为构建索引预处理数据，将 'cashouts' 映射到 'rankScore'
-            for player in players:
-                player['rankScore'] = player.get('cashouts', 0)
-            
-            # 为当前赛季构建搜索索引
-            if is_current:
-                self.search_indexer.build_index(players)
-
-            # 1. 存储完整的排行榜
-            leaderboard_key = f"wt:{season}:leaderboard"
-            expire_time = settings.UPDATE_INTERVAL * 2 if is_current else None
-            await self.redis.set(leaderboard_key, players, expire=expire_time)
-
-            # 2. 存储每个玩家的独立数据
-            for player in players:
-                player_name = player.get("name", "").lower()
-                if player_name:
-                    player_key = f"wt:{season}:player:{player_name}"
-                    await self.redis.set(player_key, player, expire=expire_time)
+        # 历史赛季只在 Redis 中没有完整数据时才从 API 同步
+        bot_logger.info("[WorldTourAPI] 开始检查/初始化历史赛季数据...")
+        for season_id in self.historical_seasons:
+            await self.get_board(season_id)
+        bot_logger.info("[WorldTourAPI] 初始化完成")
 
-            bot_logger.debug(f"[WorldTourAPI] 赛季 {season} 数据更新到 Redis 完成")
+    async def _on_board_indexed(self, board: ModeBoard) -> None:
+        """当前赛季榜单更新后重建深度搜索索引"""
+        if not board.is_current:
+            return
+        # 为构建索引预处理数据，将 'cashouts' 映射到 'rankScore'；使用副本，不修改榜单索引中的数据
+        players = [{**p, 'rankScore': p.get('cashouts', 0)} for p in board.indexer.top(len(board.indexer))]
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.search_indexer.build_index, players)
 
-        except Exception as e:
-            bot_logger.error(f"[WorldTourAPI] 更新赛季 {season} 数据到 Redis 失败: {str(e)}", exc_info=True)
-            
     async def get_player_stats(self, player_name: str, season: str) -> Optional[dict]:
-        """使用 SearchIndexer 查询玩家在指定赛季的数据"""
+        """查询玩家在指定赛季的数据"""
         try:
-            await self.initialize()
-
-            # 1. 优先使用深度搜索索引器 (仅限当前赛季)
-            if SeasonConfig.is_current_season(season) and self.search_indexer.is_ready():
-                bot_logger.debug(f"[WorldTourAPI] 使用深度索引搜索玩家 '{player_name}'")
-                search_results = self.search_indexer.search(player_name, limit=1)
-                if search_results:
-                    best_match = search_results[0]
-                    exact_player_id = best_match.get("name")
-                    similarity = best_match.get("similarity_score", 0)
-                    bot_logger.info(f"[WorldTourAPI] 深度搜索找到最匹配玩家: '{exact_player_id}' (相似度: {similarity:.2f})")
-                    # 使用精确ID从Redis获取数据
-                    player_data = await self._get_player_data_from_redis(exact_player_id, season)
-                    if player_data:
-                        return player_data
-
-            # 2. 如果索引未命中或非当前赛季，回退到原有逻辑
-            bot_logger.debug(f"[WorldTourAPI] 索引搜索失败或非当前赛季，回退到Redis/API查询 '{player_name}'")
-            player_data = await self._get_player_data_from_redis(player_name, season)
-            if player_data:
-                return player_data
-            
-            # 3. Redis未命中，从API获取
-            return await self._get_player_data_from_api(player_name, season)
-
+            return await self.find_player(player_name, season)
         except Exception as e:
             bot_logger.error(f"[WorldTourAPI] 获取玩家 {player_name} 赛季 {season} 数据失败: {str(e)}", exc_info=True)
             return None
-            
-    async def _get_player_data_from_redis(self, player_id: str, season: str) -> Optional[Dict]:
-        """从Redis获取单个玩家数据"""
-        player_key = f"wt:{season}:player:{player_id.lower()}"
-        cached_data_str = await self.redis.get(player_key)
-        if cached_data_str:
-            bot_logger.debug(f"Redis 命中: {player_key}")
-            return json.loads(cached_data_str)
-        return None
 
-    async def _get_player_data_from_api(self, player_name: str, season: str) -> Optional[Dict]:
-        """从API获取单个玩家数据并缓存"""
-        bot_logger.debug(f"Redis 未命中，尝试从API获取 '{player_name}'...")
+    def _lookup(self, board: ModeBoard, player_name: str) -> Optional[dict]:
+        """当前赛季优先使用深度搜索索引，其余情况在快照中查找"""
+        if board.is_current and self.search_indexer.is_ready():
+            search_results = self.search_indexer.search(player_name, limit=1)
+            if search_results:
+                best_match = search_results[0]
+                player = board.indexer.find_exact(best_match.get("name", ""))
+                if player is not None:
+                    bot_logger.info(
+                        f"[WorldTourAPI] 深度搜索找到最匹配玩家: '{player['name']}' "
+                        f"(相似度: {best_match.get('similarity_score', 0):.2f})"
+                    )
+                    return player
+        return board.find(player_name)
+
+    async def _fetch_player(self, player_name: str, season: str) -> Optional[dict]:
+        """按名称查询上游 (快照未命中时的回退路径)"""
         url = f"/v1/leaderboard/{season}worldtour/{self.platform}?name={player_name}"
-        response = await self.get(url, headers=self.headers)
+        response = await self.get(url, headers=self.headers, hedge=self.HEDGE_FALLBACK)
         
         if not response or response.status_code != 200:
             return None
@@ -231,56 +101,15 @@ class WorldTourAPI(BaseAPI):
         if not data or not isinstance(data.get("data"), list) or not data["data"]:
             return None
 
-        result = data["data"][0]
-        
-        is_current = SeasonConfig.is_current_season(season)
-        expire_time = settings.UPDATE_INTERVAL * 2 if is_current else None
-        
-        new_player_key = f"wt:{season}:player:{result.get('name', '').lower()}"
-        await self.redis.set(new_player_key, result, expire=expire_time)
-        bot_logger.debug(f"新数据已写入Redis: {new_player_key}")
-        
         # 仅当API返回的玩家名与查询的玩家名匹配时，才返回数据
+        result = data["data"][0]
         if result.get("name", "").lower() == player_name.lower():
             return result
         return None
 
-    async def get_top_players(self, season: str, limit: int = 5) -> List[str]:
-        """获取指定赛季的顶部玩家列表 (从Redis获取)"""
-        await self.initialize()
-        
-        leaderboard_key = f"wt:{season}:leaderboard"
-        bot_logger.debug(f"[WorldTourAPI] 从Redis获取排行榜: {leaderboard_key}")
-        
-        try:
-            data_str = await self.redis.get(leaderboard_key)
-            if not data_str:
-                bot_logger.warning(f"[WorldTourAPI] Redis中未找到排行榜数据: {leaderboard_key}")
-                # 尝试一次同步更新
-                await self._update_season_data(season)
-                data_str = await self.redis.get(leaderboard_key)
-                if not data_str:
-                    return []
-
-            players = json.loads(data_str)
-            return [p.get("name", "N/A") for p in players[:limit]]
-            
-        except Exception as e:
-            bot_logger.error(f"[WorldTourAPI] 获取排行榜 {season} 失败: {str(e)}", exc_info=True)
-            return []
-            
     async def force_stop(self):
-        """强制停止更新循环"""
-        self._force_stop = True
-        self._stop_event.set()
-        
-        if self._update_task and not self._update_task.done():
-            self._update_task.cancel()
-            try:
-                await self._update_task
-            except asyncio.CancelledError:
-                pass
-            
+        """停止所有赛季榜单的后台同步"""
+        await self.stop()
         bot_logger.info("[WorldTourAPI] 更新任务已停止")
 
     def _get_season_icon(self, season_id: str) -> str:
@@ -3,6 +3,7 @@ from core.club import ClubQuery
 from core.deep_search import DeepSearch
 from utils.config import settings
 from utils.logger import bot_logger
+from utils.prerender import prerender_scheduler
 
 class ClubPlugin(Plugin):
     """俱乐部查询插件 - 使用全量缓存系统"""
@@ -19,6 +20,9 @@ class ClubPlugin(Plugin):
         try:
             bot_logger.info(f"[{self.name}] 开始初始化俱乐部缓存...")
             await self.club_query.initialize()
+            # 热门俱乐部卡片包含成员的排位分数，俱乐部数据与赛季数据刷新后都需要重新渲染
+            for source in ("club", "season"):
+                prerender_scheduler.register(source, "popular_clubs", self._prerender_popular_clubs)
             bot_logger.info(f"[{self.name}] 俱乐部缓存初始化完成")
         except Exception as e:
             bot_logger.error(f"[{self.name}] 初始化缓存失败: {str(e)}", exc_info=True)
@@ -28,6 +32,8 @@ class ClubPlugin(Plugin):
     
     async def on_unload(self):
         """插件卸载时清理缓存系统"""
+        for source in ("club", "season"):
+            prerender_scheduler.unregister(source, "popular_clubs")
         try:
             bot_logger.info(f"[{self.name}] 开始停止俱乐部缓存...")
             await self.club_query.api.stop()
@@ -38,6 +44,10 @@ class ClubPlugin(Plugin):
             # 调用父类的 on_unload
             await super().on_unload()
 
+    async def _prerender_popular_clubs(self):
+        """预渲染查询次数最多的俱乐部卡片"""
+        return await self.club_query.prerender_popular_clubs(settings.IMAGE_PRERENDER.get("popular_clubs", 5))
+
     @on_command("club", "查询俱乐部信息")
     async def handle_club_command(self, handler, content: str):
         """处理俱乐部查询命令
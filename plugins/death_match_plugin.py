@@ -19,7 +19,23 @@ class DeathMatchPlugin(Plugin):
         super().__init__()  # 调用父类初始化
         self.query = DeathMatchQuery()
         self.bind_manager = BindManager()
-        
+
+    async def on_load(self):
+        """插件加载时预热当前赛季的死亡竞赛榜单"""
+        try:
+            await self.query.api.initialize()
+        except Exception as e:
+            bot_logger.error(f"[{self.name}] 初始化死亡竞赛榜单失败: {str(e)}", exc_info=True)
+        finally:
+            await super().on_load()
+
+    async def on_unload(self):
+        """插件卸载时停止榜单后台同步"""
+        try:
+            await self.query.api.stop()
+        finally:
+            await super().on_unload()
+
     @on_command("dm", "查询死亡竞赛信息")
     async def query_death_match(self, handler: MessageHandler, content: str) -> None:
         """查询死亡竞赛信息"""
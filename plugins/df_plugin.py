@@ -2,6 +2,7 @@ from core.plugin import Plugin, on_command
 from utils.message_handler import MessageHandler
 from core.df import DFQueryManager
 from utils.logger import bot_logger
+from utils.prerender import prerender_scheduler
 import asyncio
 from utils.templates import SEPARATOR
 from utils.config import settings # Import settings to get current season
@@ -22,33 +23,40 @@ class DFPlugin(Plugin):
         bot_logger.debug(f"[{self.name}] 开始加载底分查询插件")
         await super().on_load()  # 等待父类的 on_load 完成
         await DFQueryManager.initialize()  # 初始化DFQuery（仅第一次有效）
+        # 底分卡片与请求者无关，实时数据刷新后预渲染
+        prerender_scheduler.register("df", "cutoff", self._prerender_cutoff)
         bot_logger.info(f"[{self.name}] 底分查询插件已加载")
         
     async def on_unload(self):
         """插件卸载时的处理"""
         # 不在这里调用stop，因为其他插件可能还在使用
         # 在整个应用关闭时由框架统一处理
+        prerender_scheduler.unregister("df", "cutoff")
         await super().on_unload()
         bot_logger.info(f"[{self.name}] 底分查询插件已卸载")
 
+    def _get_safe_score_line(self) -> str:
+        """从 SafeScoreManagerPlugin 获取安全分并构建显示文本"""
+        safe_score = None
+        safe_score_plugin = self._plugin_manager.plugins.get("SafeScoreManagerPlugin") if self._plugin_manager else None
+        if safe_score_plugin:
+            safe_score, _ = safe_score_plugin.get_safe_score()
+
+        if safe_score is not None:
+            return f"当前安全分: {safe_score:,}"
+        return "当前安全分: 暂未设置"
+
+    async def _prerender_cutoff(self):
+        """预渲染底分卡片，与 /df 命令使用相同的数据"""
+        return await self.df_query.generate_cutoff_image(self._get_safe_score_line())
+
         
     @on_command("df", "查询排行榜底分")
     async def handle_df(self, handler: MessageHandler, content: str) -> None:
         """处理底分查询命令"""
         try:
-            # 从 SafeScoreManagerPlugin 获取安全分
-            safe_score, safe_score_last_update = None, None
-            safe_score_plugin = self._plugin_manager.plugins.get("SafeScoreManagerPlugin")
-            if safe_score_plugin:
-                safe_score, safe_score_last_update = safe_score_plugin.get_safe_score()
-
-            # 构建安全分消息
-            safe_score_line = "当前安全分: 暂未设置"
-            if safe_score is not None:
-                safe_score_line = f"当前安全分: {safe_score:,}"
-
-            # 生成图片
-            image_bytes = await self.df_query.generate_cutoff_image(safe_score_line)
+            # 生成图片 (安全分来自 SafeScoreManagerPlugin)
+            image_bytes = await self.df_query.generate_cutoff_image(self._get_safe_score_line())
 
             if image_bytes:
                 if not await handler.send_image(image_bytes):
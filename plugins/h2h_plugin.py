@@ -119,10 +119,15 @@ class H2HPlugin(Plugin):
         await super().on_load()
         await self.load_data()  # 加载持久化数据
         await self.load_config()  # 加载配置
+        try:
+            await self.h2h_query.api.initialize()  # 预热当前赛季的榜单快照
+        except Exception as e:
+            bot_logger.error(f"[{self.name}] 初始化对对碰榜单失败: {str(e)}", exc_info=True)
         bot_logger.info(f"[{self.name}] 对对碰查询插件已加载")
         
     async def on_unload(self) -> None:
         """插件卸载时的处理"""
         await self.save_data()  # 保存数据
+        await self.h2h_query.api.stop()  # 停止榜单后台同步
         await super().on_unload()
         bot_logger.info(f"[{self.name}] 对对碰查询插件已卸载")
@@ -19,7 +19,23 @@ class QuickCashPlugin(Plugin):
         super().__init__()  # 调用父类初始化
         self.query = QuickCashQuery()
         self.bind_manager = BindManager()
-        
+
+    async def on_load(self):
+        """插件加载时预热当前赛季的快速提现榜单"""
+        try:
+            await self.query.api.initialize()
+        except Exception as e:
+            bot_logger.error(f"[{self.name}] 初始化快速提现榜单失败: {str(e)}", exc_info=True)
+        finally:
+            await super().on_load()
+
+    async def on_unload(self):
+        """插件卸载时停止榜单后台同步"""
+        try:
+            await self.query.api.stop()
+        finally:
+            await super().on_unload()
+
     @on_command("qc", "查询快速提现数据")
     async def handle_quick_cash_command(self, handler: MessageHandler, content: str):
         """处理快速提现查询命令"""
@@ -13,6 +13,7 @@ from botpy.message import Message
 from botpy.ext.command_util import Commands
 from core.rank import RankAPI
 from utils.config import settings
+from utils.prerender import prerender_scheduler
 from typing import Optional
 
 class RankPlugin(Plugin):
@@ -102,6 +103,8 @@ class RankPlugin(Plugin):
                 self.client.critical_init_event.set()
                 bot_logger.info(f"[{self.name}] 已发送关键服务就绪信号。")
                 
+            # 排行榜前几名的排位卡片查询最频繁，赛季数据刷新后预渲染
+            prerender_scheduler.register("season", "top_players", self._prerender_top_players)
             await super().on_load()
         except Exception as e:
             bot_logger.error(f"[{self.name}] 插件加载失败: {str(e)}", exc_info=True)
@@ -109,5 +112,10 @@ class RankPlugin(Plugin):
         
     async def on_unload(self) -> None:
         """插件卸载时的处理"""
+        prerender_scheduler.unregister("season", "top_players")
         await super().on_unload()
-        bot_logger.info(f"[{self.name}] 排名查询插件已卸载") 
\ No newline at end of file
+        bot_logger.info(f"[{self.name}] 排名查询插件已卸载")
+
+    async def _prerender_top_players(self):
+        """预渲染当前赛季前几名玩家的排位卡片"""
+        return await self.rank_query.prerender_top_players(settings.IMAGE_PRERENDER.get("top_players", 5)) 
\ No newline at end of file
@@ -10,6 +10,7 @@ from core.plugin import Plugin, on_command
 from utils.message_handler import MessageHandler
 from utils.logger import bot_logger
 from utils.json_utils import load_json, save_json
+from utils.prerender import prerender_scheduler
 
 class SafeScoreManagerPlugin(Plugin):
     """安全分手动管理插件"""
@@ -95,6 +96,7 @@ class SafeScoreManagerPlugin(Plugin):
             self.score_data['score'] = new_score
             self.score_data['last_update'] = time.time()
             await save_json(self.score_file_path, self.score_data)
+            prerender_scheduler.notify("df")  # 底分卡片包含安全分
             
             await self.reply(handler, f"\n✅ 安全分已成功更新为: `{new_score:,}`")
             bot_logger.info(f"用户 {user_id} 将安全分更新为 {new_score}")
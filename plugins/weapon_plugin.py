@@ -3,6 +3,8 @@ from core.weapon import WeaponData
 from utils.message_handler import MessageHandler
 from utils.logger import bot_logger
 from utils.templates import SEPARATOR
+from utils.config import settings
+from utils.prerender import prerender_scheduler
 
 class WeaponPlugin(Plugin):
     """武器信息插件"""
@@ -76,9 +78,15 @@ class WeaponPlugin(Plugin):
     async def on_load(self) -> None:
         """插件加载时的处理"""
         await super().on_load()
+        # 武器数据是静态的，没有刷新事件，定期重新渲染排行榜使其始终留在渲染缓存中
+        prerender_scheduler.register(
+            "weapon", "leaderboard", self.weapon_data.generate_weapon_leaderboard,
+            interval=settings.IMAGE_PRERENDER.get("static_interval", 300),
+        )
         bot_logger.info(f"[{self.name}] 武器信息插件已加载")
         
     async def on_unload(self) -> None:
         """插件卸载时的处理"""
+        prerender_scheduler.unregister("weapon", "leaderboard")
         await super().on_unload()
         bot_logger.info(f"[{self.name}] 武器信息插件已卸载")
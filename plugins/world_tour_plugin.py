@@ -132,6 +132,7 @@ class WorldTourPlugin(Plugin):
         
     async def on_unload(self) -> None:
         """插件卸载时的处理"""
+        await self.world_tour_query.api.stop()  # 停止榜单后台同步
         await self.save_data()  # 保存数据
         await super().on_unload()
         bot_logger.info(f"[{self.name}] 世界巡回赛查询插件已卸载") 
\ No newline at end of file
@@ -1,4 +1,4 @@
-import aiohttp
+import httpx
 import json
 import time
 import re
@@ -9,6 +9,7 @@ from core.events import GenericMessage
 from utils.config import settings
 from utils.logger import bot_logger
 from utils.image_manager import ImageManager
+from utils.http_client import http_clients
 
 class HeyBoxStrategy(IMessageStrategy):
     """
@@ -19,7 +20,6 @@ class HeyBoxStrategy(IMessageStrategy):
         super().__init__()
         self.generic_message = message
         self.token = settings.HEYBOX_TOKEN
-        self.http_session = aiohttp.ClientSession()
         self.base_api_url = "https://chat.xiaoheihe.cn"
         self.upload_api_url = "https://chat-upload.xiaoheihe.cn"
         self._image_manager = ImageManager()
@@ -35,10 +35,10 @@ class HeyBoxStrategy(IMessageStrategy):
         kwargs["headers"] = headers
         
         try:
-            async with self.http_session.request(method, url, **kwargs) as response:
-                response.raise_for_status()
-                return await response.json()
-        except aiohttp.ClientError as e:
+            response = await http_clients.get_client(url).request(method, url, **kwargs)
+            response.raise_for_status()
+            return response.json()
+        except httpx.HTTPError as e:
             bot_logger.error(f"[HeyBoxStrategy] 请求失败: {url} - {e}", exc_info=True)
             return None
 
@@ -105,10 +105,9 @@ class HeyBoxStrategy(IMessageStrategy):
         params = self._get_default_params()
         upload_url = f"{self.upload_api_url}/upload"
         
-        form_data = aiohttp.FormData()
-        form_data.add_field('file', image_data, filename='image.png', content_type='image/png')
+        files = {'file': ('image.png', image_data, 'image/png')}
         
-        upload_result = await self._send_request("POST", f"{upload_url}?{urlencode(params)}", data=form_data)
+        upload_result = await self._send_request("POST", f"{upload_url}?{urlencode(params)}", files=files)
 
         if not upload_result or upload_result.get("status") != "ok":
             bot_logger.error("[HeyBoxStrategy] 图片上传失败。")
@@ -149,4 +148,5 @@ class HeyBoxStrategy(IMessageStrategy):
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        await self.http_session.close() 
\ No newline at end of file
+        # HTTP 客户端由进程级注册表共享，这里无需关闭
+        pass 
\ No newline at end of file
@@ -0,0 +1,20 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from utils.browser import DEFAULT_VIEWPORT
+
+
+@pytest.fixture
+def fake_page():
+    """返回创建模拟 Playwright 页面的工厂函数，warmed_for 为页面已预热的模板"""
+    def factory(warmed_for=None):
+        page = MagicMock()
+        page.is_closed.return_value = False
+        page.viewport_size = dict(DEFAULT_VIEWPORT)
+        if warmed_for:
+            page._warmed_for = warmed_for
+        else:
+            del page._warmed_for
+        return page
+    return factory
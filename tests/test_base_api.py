@@ -5,10 +5,16 @@ import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import asyncio
+import time
+import pytest
 from utils.base_api import BaseAPI
 from unittest.mock import patch, AsyncMock
 import httpx
+import fakeredis
 from utils.config import settings
+from utils.cache_codec import MAGIC, cache_codec
+from utils.circuit_breaker import circuit_breakers
+from utils.hedging import hedge_policy
 
 
 
@@ -53,6 +59,191 @@ async def test_base_api_switch_to_backup():
         print("主备切换测试通过！")
     await BaseAPI.close_all_clients()
 
+@pytest.mark.asyncio
+async def test_base_api_singleflight_coalesces_concurrent_gets():
+    """并发的相同 GET 请求应只发出一次上游调用"""
+    api = BaseAPI(base_url=settings.API_STANDARD_URL)
+    endpoint = "/v1/leaderboard/s6worldtour/crossplay"
+    call_count = 0
+
+    async def fake_request(self, method, url, **kwargs):
+        nonlocal call_count
+        call_count += 1
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, json={"data": []}, request=httpx.Request(method, url))
+
+    stats_before = BaseAPI.get_singleflight_stats()
+    with patch.object(httpx.AsyncClient, "request", new=fake_request):
+        responses = await asyncio.gather(*[
+            api.get(endpoint, params={"name": "test"}, use_cache=False) for _ in range(5)
+        ])
+    stats_after = BaseAPI.get_singleflight_stats()
+
+    assert call_count == 1, f"上游请求次数异常: {call_count}"
+    assert all(r.status_code == 200 for r in responses)
+    assert len({id(r) for r in responses}) == 5, "每个调用方都应获得独立的响应对象"
+    assert stats_after["issued"] - stats_before["issued"] == 1
+    assert stats_after["coalesced"] - stats_before["coalesced"] == 4
+    assert stats_after["inflight"] == 0
+    await BaseAPI.close_all_clients()
+
+@pytest.mark.asyncio
+async def test_base_api_stale_while_revalidate():
+    """stale 窗口内应立即返回旧数据，并且每个缓存键只触发一次后台刷新"""
+    circuit_breakers.reset()
+    api = BaseAPI(base_url=settings.API_STANDARD_URL)
+    endpoint = "/v1/leaderboard/s6worldtour/crossplay"
+    fresh_ttl, stale_ttl = BaseAPI.get_cache_policy(endpoint)
+    stale_entry = (b'{"result": "stale"}', time.time() - fresh_ttl - 1, "Wed, 21 Oct 2015 07:28:00 GMT")
+    sent_headers = []
+    writes = []
+
+    async def fake_read(self, *keys):
+        return stale_entry
+
+    async def fake_write(self, *args):
+        writes.append(args)
+
+    async def fake_request(self, method, url, **kwargs):
+        sent_headers.append(kwargs.get("headers") or {})
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, json={"result": "fresh"}, request=httpx.Request(method, url))
+
+    with patch.object(BaseAPI, "_read_cache_entry", new=fake_read), \
+            patch.object(BaseAPI, "_write_cache_entry", new=fake_write), \
+            patch.object(httpx.AsyncClient, "request", new=fake_request):
+        first = await api.get(endpoint)
+        second = await api.get(endpoint)
+        assert BaseAPI.handle_response(first) == {"result": "stale"}
+        assert BaseAPI.handle_response(second) == {"result": "stale"}
+        await asyncio.gather(*BaseAPI._revalidation_tasks.values())
+
+        # 后台同步不接受 stale 数据，应直接发起条件请求
+        synced = await api.get(endpoint, allow_stale=False)
+        assert BaseAPI.handle_response(synced) == {"result": "fresh"}
+
+    assert len(sent_headers) == 2, f"上游请求次数异常: {len(sent_headers)}"
+    assert all(h.get("If-Modified-Since") == stale_entry[2] for h in sent_headers)
+    assert len(writes) == 2
+    await BaseAPI.close_all_clients()
+
+@pytest.mark.asyncio
+async def test_base_api_hedged_get_prefers_fast_backup():
+    """主源超过对冲延迟仍未响应时向备用源补发，先返回者胜出"""
+    circuit_breakers.reset()
+    api = BaseAPI(base_url="https://primary.test")
+    api.backup_url = "https://backup.test"
+    endpoint = "/v1/leaderboard/s6worldtour/crossplay"
+    requested = []
+
+    async def fake_request(self, method, url, **kwargs):
+        requested.append(url)
+        if url.startswith("https://primary.test"):
+            await asyncio.sleep(1)
+            return httpx.Response(200, json={"result": "primary"}, request=httpx.Request(method, url))
+        return httpx.Response(200, json={"result": "backup"}, request=httpx.Request(method, url))
+
+    stats_before = BaseAPI.get_hedge_stats()
+    with patch.object(hedge_policy, "default_delay", 0.05), \
+            patch.object(hedge_policy, "_budget", 1.0), \
+            patch.object(httpx.AsyncClient, "request", new=fake_request):
+        start = time.monotonic()
+        response = await api.get(endpoint, use_cache=False, hedge=True)
+        elapsed = time.monotonic() - start
+
+    assert BaseAPI.handle_response(response) == {"result": "backup"}
+    assert elapsed < 0.5, f"对冲未生效，耗时 {elapsed:.2f}s"
+    assert [u.split("/")[2] for u in requested] == ["primary.test", "backup.test"]
+    stats_after = BaseAPI.get_hedge_stats()
+    assert stats_after["hedged"] - stats_before["hedged"] == 1
+    assert stats_after["hedge_wins"] - stats_before["hedge_wins"] == 1
+    await BaseAPI.close_all_clients()
+
+@pytest.mark.asyncio
+async def test_base_api_hedge_budget_counts_only_upstream_requests():
+    """缓存命中的请求不积累对冲额度；补发的对冲请求失败时不重试"""
+    circuit_breakers.reset()
+    api = BaseAPI(base_url="https://primary.test")
+    api.backup_url = "https://backup.test"
+    endpoint = "/v1/leaderboard/s6worldtour/crossplay"
+    requested = []
+
+    async def cached_entry(self, *keys):
+        return b'{"result": "cached"}', time.time(), None
+
+    async def fake_request(self, method, url, **kwargs):
+        requested.append(url.split("/")[2])
+        if url.startswith("https://primary.test"):
+            await asyncio.sleep(0.2)
+            return httpx.Response(200, json={"result": "primary"}, request=httpx.Request(method, url))
+        raise httpx.ConnectError("mock backup down")
+
+    stats_before = BaseAPI.get_hedge_stats()
+    with patch.object(hedge_policy, "default_delay", 0.05), \
+            patch.object(hedge_policy, "_budget", 1.0), \
+            patch("utils.base_api.asyncio.sleep", new=AsyncMock()):
+        with patch.object(BaseAPI, "_read_cache_entry", new=cached_entry):
+            for _ in range(3):
+                response = await api.get(endpoint, hedge=True)
+                assert BaseAPI.handle_response(response) == {"result": "cached"}
+        assert BaseAPI.get_hedge_stats()["eligible"] == stats_before["eligible"]
+
+    with patch.object(hedge_policy, "default_delay", 0.05), \
+            patch.object(hedge_policy, "_budget", 1.0), \
+            patch.object(httpx.AsyncClient, "request", new=fake_request):
+        response = await api.get(endpoint, use_cache=False, hedge=True)
+
+    assert BaseAPI.handle_response(response) == {"result": "primary"}
+    assert requested == ["primary.test", "backup.test"], f"对冲请求不应重试: {requested}"
+    stats_after = BaseAPI.get_hedge_stats()
+    assert stats_after["eligible"] - stats_before["eligible"] == 1
+    assert stats_after["hedged"] - stats_before["hedged"] == 1
+    circuit_breakers.reset()
+    await BaseAPI.close_all_clients()
+
+@pytest.mark.asyncio
+async def test_base_api_treats_corrupt_cache_value_as_miss():
+    """带压缩标记但无法解压的缓存值按未命中处理：删除后回源，降级读取时也不抛出解压异常"""
+    circuit_breakers.reset()
+    api = BaseAPI(base_url="https://primary.test")
+    endpoint = "/v1/corrupt-cache-test"
+    keys = (api.get_cache_key(endpoint), api.get_cache_timestamp_key(endpoint), api.get_last_modified_cache_key(endpoint))
+    redis = fakeredis.aioredis.FakeRedis()
+    sent_headers = []
+
+    async def write_corrupt_entry():
+        await redis.mset({keys[0]: MAGIC + b"z" + b"corrupt", keys[1]: repr(time.time()), keys[2]: "Wed, 21 Oct 2015 07:28:00 GMT"})
+
+    async def fake_request(self, method, url, **kwargs):
+        sent_headers.append(kwargs.get("headers") or {})
+        return httpx.Response(200, json={"result": "upstream"}, request=httpx.Request(method, url))
+
+    async def failing_request(self, method, url, **kwargs):
+        raise httpx.ConnectError("mock upstream down")
+
+    BaseAPI._l0_cache.clear()
+    errors_before = BaseAPI.get_cache_layer_stats()["redis"]["decode_errors"]
+    with patch("utils.base_api.redis_manager._get_binary_client", new=lambda: redis):
+        await write_corrupt_entry()
+        with patch.object(httpx.AsyncClient, "request", new=fake_request):
+            response = await api.get(endpoint)
+        assert BaseAPI.handle_response(response) == {"result": "upstream"}
+        assert "If-Modified-Since" not in sent_headers[0]
+        assert cache_codec.decode(await redis.get(keys[0])) == response.content
+
+        # 上游不可用时降级读取同样跳过损坏的值，抛出的是原始的网络异常
+        BaseAPI._l0_cache.clear()
+        await write_corrupt_entry()
+        with patch.object(httpx.AsyncClient, "request", new=failing_request), \
+                patch("utils.base_api.asyncio.sleep", new=AsyncMock()):
+            with pytest.raises(httpx.ConnectError):
+                await api.get(endpoint, use_cache=True, allow_stale=False)
+        assert await redis.exists(keys[0]) == 0
+    assert BaseAPI.get_cache_layer_stats()["redis"]["decode_errors"] - errors_before >= 2
+    BaseAPI._l0_cache.clear()
+    circuit_breakers.reset()
+    await BaseAPI.close_all_clients()
+
 async def main():
     print("\n--- 主API可用性测试 ---")
     try:
@@ -64,6 +255,31 @@ async def main():
         await test_base_api_switch_to_backup()
     except Exception as e:
         print(f"主备切换mock测试失败: {e}")
+    print("\n--- 请求合并mock测试 ---")
+    try:
+        await test_base_api_singleflight_coalesces_concurrent_gets()
+    except Exception as e:
+        print(f"请求合并mock测试失败: {e}")
+    print("\n--- stale-while-revalidate mock测试 ---")
+    try:
+        await test_base_api_stale_while_revalidate()
+    except Exception as e:
+        print(f"stale-while-revalidate mock测试失败: {e}")
+    print("\n--- 损坏缓存值回源测试 ---")
+    try:
+        await test_base_api_treats_corrupt_cache_value_as_miss()
+    except Exception as e:
+        print(f"损坏缓存值回源测试失败: {e}")
+    print("\n--- 对冲请求mock测试 ---")
+    try:
+        await test_base_api_hedged_get_prefers_fast_backup()
+    except Exception as e:
+        print(f"对冲请求mock测试失败: {e}")
+    print("\n--- 对冲额度mock测试 ---")
+    try:
+        await test_base_api_hedge_budget_counts_only_upstream_requests()
+    except Exception as e:
+        print(f"对冲额度mock测试失败: {e}")
 
 if __name__ == "__main__":
     asyncio.run(main()) 
\ No newline at end of file
@@ -0,0 +1,231 @@
+import asyncio
+import time
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from core.image_generator import ImageGenerator
+from utils.browser import BrowserManager, DEFAULT_VIEWPORT
+from utils.render_queue import RenderDropped
+
+
+@pytest.mark.asyncio
+async def test_page_pool_prefers_pages_warmed_for_template(fake_page):
+    """页面池优先返回已为目标模板预热的页面，未命中时改用冷门模板的页面，归还后保留预热状态"""
+    manager = BrowserManager()
+    manager.initialized = True
+    rank_a, rank_b, cutoff = fake_page("t/rank.html"), fake_page("t/rank.html"), fake_page("t/df.html")
+    manager.idle_pages = [rank_a, cutoff, rank_b]
+    manager.total_pages = manager.max_pages = 3
+    for _ in range(5):
+        manager._record_demand("t/rank.html")
+
+    page = await manager.acquire_page("t/rank.html")
+    assert page in (rank_a, rank_b) and manager.pool_stats["warm_hits"] == 1
+    await manager.release_page(page)
+    assert page._warmed_for == "t/rank.html" and page in manager.idle_pages
+
+    # 新模板占用最冷门模板 (df) 的页面，热门模板的预热页面保持不动
+    page = await manager.acquire_page("t/me.html")
+    assert page is cutoff and manager.pool_stats["rebalanced"] == 1
+
+    # 池空时等待，归还的页面直接交给等待者
+    others = [await manager.acquire_page("t/rank.html") for _ in range(2)]
+    waiter = asyncio.create_task(manager.acquire_page("t/rank.html"))
+    await asyncio.sleep(0)
+    assert manager.get_stats()["waiting"] == 1
+    await manager.release_page(others[0])
+    assert await waiter is others[0] and manager.idle_pages == []
+
+
+@pytest.mark.asyncio
+async def test_page_pool_prefers_unwarmed_pages_and_resets_viewport_on_release(fake_page):
+    """目标模板没有预热页面时优先使用未预热的页面；归还时重置视口，已关闭且无法补充的页面从池中扣除"""
+    manager = BrowserManager()
+    manager.initialized = True
+    warmed, cold = fake_page("t/rank.html"), fake_page()
+    manager.idle_pages = [cold, warmed]
+    manager.total_pages = manager.max_pages = 2
+
+    page = await manager.acquire_page("t/me.html")
+    assert page is cold and manager.pool_stats["warm_misses"] == 1 and manager.pool_stats["rebalanced"] == 0
+
+    page.viewport_size = {"width": 1200, "height": 3000}
+    page.set_viewport_size = AsyncMock()
+    await manager.release_page(page)
+    page.set_viewport_size.assert_awaited_once_with(DEFAULT_VIEWPORT)
+    assert page in manager.idle_pages
+
+    page = await manager.acquire_page("t/rank.html")
+    page.is_closed.return_value = True
+    manager.browsers = []
+    await manager.release_page(page)
+    assert manager.total_pages == 1 and page not in manager.idle_pages
+
+
+@pytest.mark.asyncio
+async def test_page_pool_drops_expired_requests(fake_page):
+    """已过期的请求直接丢弃；排队等待超过截止时间时抛出 RenderDropped 并离开队列"""
+    manager = BrowserManager()
+    manager.initialized = True
+    manager.idle_pages = [fake_page()]
+    manager.total_pages = manager.max_pages = 1
+
+    with pytest.raises(RenderDropped):
+        await manager.acquire_page(deadline=time.monotonic() - 1)
+    busy = await manager.acquire_page()
+    with pytest.raises(RenderDropped):
+        await manager.acquire_page(deadline=time.monotonic() + 0.05)
+    await manager.release_page(busy)
+    assert manager.idle_pages == [busy] and manager.get_stats()["waiting"] == 0
+
+
+@pytest.mark.asyncio
+async def test_data_injection_reuses_loaded_template(tmp_path, fake_page):
+    """同一页面再次渲染相同模板时只注入新的 body，外壳变化时回退到 set_content"""
+    (tmp_path / "card.html").write_text(
+        "<html><head><style>.a{color:{{ color }}}</style></head><body><p>{{ name }}</p></body></html>"
+    )
+    generator = ImageGenerator(str(tmp_path))
+    page = fake_page()
+    page.set_content = AsyncMock()
+    page.evaluate = AsyncMock(return_value=None)
+    page.screenshot = AsyncMock(return_value=b"jpeg")
+    page.set_viewport_size = AsyncMock()
+    page.goto = AsyncMock()
+
+    async def acquire(template_key=None, **kwargs):
+        return page
+
+    with patch("core.image_generator.browser_manager") as manager:
+        manager.acquire_page = acquire
+        manager.release_page = AsyncMock()
+        render = lambda data: generator.generate_image(data, "card.html", use_cache=False, data_injection=True)
+
+        assert await render({"color": "red", "name": "a"}) == b"jpeg"
+        assert page.set_content.await_count == 1 and page.goto.await_count == 1
+
+        await render({"color": "red", "name": "b"})
+        assert page.set_content.await_count == 1 and page.goto.await_count == 1
+        injected = [c for c in page.evaluate.await_args_list if len(c.args) == 2]
+        assert injected[-1].args[1] == {"body": "<p>b</p>"}
+
+        # head 中的样式变化，外壳不同，重新 set_content
+        await render({"color": "blue", "name": "b"})
+        assert page.set_content.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_data_injection_falls_back_to_set_content(tmp_path, fake_page):
+    """注入脚本出错、文档没有 body 或未启用数据注入时整页 set_content"""
+    assert ImageGenerator._split_document("<div>no body</div>") is None
+    assert ImageGenerator._split_document('<body class="x"><p>a</p></body>') == ('<body class="x"></body>', "<p>a</p>")
+
+    (tmp_path / "card.html").write_text("<html><body><p>{{ name }}</p></body></html>")
+    generator = ImageGenerator(str(tmp_path))
+    page = fake_page()
+    page.set_content = AsyncMock()
+    page.screenshot = AsyncMock(return_value=b"jpeg")
+    page.set_viewport_size = AsyncMock()
+    page.goto = AsyncMock()
+
+    async def evaluate(script, arg=None):
+        if arg is not None:
+            raise RuntimeError("page crashed")
+        return None
+
+    page.evaluate = evaluate
+
+    async def acquire(template_key=None, **kwargs):
+        return page
+
+    with patch("core.image_generator.browser_manager") as manager:
+        manager.acquire_page = acquire
+        manager.release_page = AsyncMock()
+        render = lambda data, injection: generator.generate_image(data, "card.html", use_cache=False, data_injection=injection)
+
+        await render({"name": "a"}, True)
+        assert await render({"name": "b"}, True) == b"jpeg"
+        assert page.set_content.await_count == 2
+        await render({"name": "c"}, False)
+        assert page.set_content.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_page_pool_scales_with_wait_time_and_memory(fake_page):
+    """等待页面超过阈值时扩容 (不超过上限)，长时间未用满或内存紧张时缩容到下限"""
+    manager = BrowserManager()
+    manager.initialized = True
+    manager.idle_pages = [fake_page()]
+    manager.total_pages, manager.min_pages, manager.max_pages = 1, 1, 2
+    manager.scale_up_wait = 0.01
+    created = []
+
+    async def new_page():
+        page = fake_page()
+        page.close = AsyncMock()
+        created.append(page)
+        return page
+
+    with patch.object(manager, "_new_page", new=new_page), \
+            patch.object(manager, "_memory_pressure", return_value=False) as pressure:
+        first = await manager.acquire_page("t/a.html")
+        second = await asyncio.wait_for(manager.acquire_page("t/a.html"), 1)
+        assert second is created[0] and manager.total_pages == 2
+        assert manager.get_stats()["utilization"] == 1.0 and manager.pool_stats["scale_ups"] == 1
+
+        # 已达上限：等待者拿到归还的页面，不再扩容
+        third = asyncio.create_task(manager.acquire_page("t/a.html"))
+        await asyncio.sleep(0.05)
+        await manager.release_page(first)
+        assert await third is first and manager.total_pages == 2 and len(created) == 1
+
+        await manager.release_page(second)
+        await manager.release_page(first)
+        await manager._shrink_idle()
+        assert manager.total_pages == 2  # 刚刚用满过，暂不缩容
+        manager._last_saturated -= 3600
+        await manager._shrink_idle()
+        assert manager.total_pages == 1 and manager.pool_stats["scale_downs"] == 1
+
+        # 内存紧张时不扩容，等待者只能等归还的页面
+        pressure.return_value = True
+        page = await manager.acquire_page("t/a.html")
+        waiter = asyncio.create_task(manager.acquire_page("t/a.html"))
+        await asyncio.sleep(0.05)
+        assert manager.total_pages == 1 and manager.get_stats()["waiting"] == 1
+        await manager.release_page(page)
+        assert await waiter is page
+    assert manager.get_stats()["avg_wait_ms"] > 0
+
+
+@pytest.mark.asyncio
+async def test_page_pool_scale_up_failures_and_memory_pressure_shrink(fake_page):
+    """扩容失败时等待者继续等待归还的页面；内存紧张时即使刚用满过也缩容到下限"""
+    manager = BrowserManager()
+    manager.initialized = True
+    manager.idle_pages = [fake_page()]
+    manager.total_pages, manager.min_pages, manager.max_pages = 1, 1, 3
+    manager.scale_up_wait = 0.01
+
+    with patch.object(manager, "_new_page", new=AsyncMock(side_effect=RuntimeError("browser gone"))), \
+            patch.object(manager, "_memory_pressure", return_value=False) as pressure:
+        page = await manager.acquire_page()
+        waiter = asyncio.create_task(manager.acquire_page())
+        await asyncio.sleep(0.05)
+        assert not waiter.done() and manager.total_pages == 1 and manager._growing == 0
+        await manager.release_page(page)
+        assert await waiter is page
+        await manager.release_page(page)
+
+        extra = [fake_page(), fake_page()]
+        for extra_page in extra:
+            extra_page.close = AsyncMock()
+        manager.idle_pages.extend(extra)
+        manager.total_pages = 3
+        manager._last_saturated = time.monotonic()
+        pressure.return_value = True
+        await manager._shrink_idle()
+        assert manager.total_pages == 1 and len(manager.idle_pages) == 1
+        assert manager.pool_stats["scale_downs"] == 2 and manager.pool_stats["scale_ups"] == 0
+
@@ -0,0 +1,51 @@
+import zlib
+from unittest.mock import patch
+
+import pytest
+
+import utils.cache_codec as cache_codec_module
+from utils.cache_codec import CODEC_ZSTD, CacheCodec, MAGIC
+
+
+def test_cache_codec_roundtrip_and_legacy_values():
+    """大响应体压缩后可还原，小响应体与旧缓存值原样读取"""
+    codec = CacheCodec(codec="zlib", threshold=1024)
+    body = b'{"data": [' + b",".join(b'{"rank": %d, "name": "player#%04d"}' % (i, i) for i in range(500)) + b"]}"
+    small = b'{"data": []}'
+
+    stored = codec.encode(body)
+    assert len(stored) < len(body)
+    assert codec.decode(stored) == body
+    assert codec.encode(small) == small
+    assert codec.decode(small) == small
+
+    stats = codec.get_stats()
+    assert stats["compressed"] == 1 and stats["skipped"] == 1
+    assert stats["ratio"] > 1
+
+def test_cache_codec_skips_incompressible_and_disabled():
+    """压缩无收益时保留原始内容；关闭压缩时任何大小都原样写入，但仍能读取已压缩的旧值"""
+    codec = CacheCodec(codec="zlib", threshold=16)
+    noise = bytes(range(256)) * 2
+    assert codec.encode(zlib.compress(noise)) == zlib.compress(noise)
+    assert codec.get_stats()["compressed"] == 0
+
+    stored = codec.encode(b"a" * 4096)
+    disabled = CacheCodec(enabled=False, codec="zlib", threshold=16)
+    assert disabled.encode(b"a" * 4096) == b"a" * 4096
+    assert disabled.decode(stored) == b"a" * 4096
+    assert disabled.decode(None) is None and disabled.decode(b"") == b""
+
+def test_cache_codec_rejects_corrupt_or_unreadable_values():
+    """带标记但内容损坏、格式未知或缺少 zstandard 时抛出异常，由调用方按缓存未命中处理"""
+    codec = CacheCodec(codec="zlib")
+    with pytest.raises(zlib.error):
+        codec.decode(MAGIC + b"z" + b"not zlib")
+    with pytest.raises(ValueError):
+        codec.decode(MAGIC + b"?" + b"payload")
+
+    with patch.object(cache_codec_module, "zstandard", None):
+        without_zstd = CacheCodec(codec="zstd")
+        assert without_zstd.codec == "zlib"
+        with pytest.raises(RuntimeError):
+            without_zstd.decode(MAGIC + CODEC_ZSTD + b"payload")
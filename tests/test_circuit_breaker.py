@@ -0,0 +1,72 @@
+import time
+
+from utils.circuit_breaker import CircuitBreaker, CircuitBreakerRegistry
+
+
+def test_circuit_breaker_opens_and_recovers():
+    """连续失败后熔断，冷却结束放行探测，探测成功后恢复"""
+    breaker = CircuitBreaker("primary.test", failure_threshold=2, open_timeout=0.05, success_threshold=1)
+    assert breaker.allow_request()
+    breaker.record(False, 0.1)
+    breaker.record(False, 0.1)
+    assert breaker.state == "open"
+    assert not breaker.allow_request()
+
+    time.sleep(0.06)
+    assert breaker.allow_request(), "冷却结束后应放行探测请求"
+    assert breaker.state == "half_open"
+    assert not breaker.allow_request(), "半开状态同时只放行一个探测"
+    breaker.record(True, 0.1)
+    assert breaker.state == "closed"
+
+    # 慢调用率超过阈值同样熔断
+    slow = CircuitBreaker("slow.test", slow_call_duration=1.0, slow_rate_threshold=0.8, min_calls=5)
+    for _ in range(5):
+        slow.record(True, 2.0)
+    assert slow.get_stats()["state"] == "open"
+
+def test_circuit_breaker_half_open_failure_reopens():
+    """半开探测失败或仍然很慢时重新熔断，并重新开始冷却"""
+    breaker = CircuitBreaker("flaky.test", failure_threshold=1, open_timeout=0.05, slow_call_duration=1.0)
+    breaker.record(False, 0.1)
+    assert breaker.state == "open" and breaker.get_stats()["open_count"] == 1
+
+    time.sleep(0.06)
+    assert breaker.allow_request()
+    breaker.record(False, 0.1)
+    assert breaker.state == "open" and breaker.get_stats()["open_count"] == 2
+    assert not breaker.allow_request(), "重新熔断后需要再次等待冷却"
+
+    time.sleep(0.06)
+    assert breaker.allow_request()
+    breaker.record(True, 2.0)
+    assert breaker.state == "open" and breaker.get_stats()["open_count"] == 3
+
+def test_circuit_breaker_half_open_needs_success_threshold_and_release():
+    """半开状态需要连续多次探测成功才恢复；被取消的探测归还名额"""
+    breaker = CircuitBreaker("probe.test", failure_threshold=1, open_timeout=0.0, success_threshold=2)
+    breaker.record(False, 0.1)
+    assert breaker.allow_request() and breaker.state == "half_open"
+    breaker.release()
+    assert breaker.allow_request(), "取消的探测应归还名额"
+    breaker.record(True, 0.1)
+    assert breaker.state == "half_open"
+    assert breaker.allow_request()
+    breaker.record(True, 0.1)
+    assert breaker.state == "closed" and breaker.get_stats()["window_calls"] == 0
+
+def test_circuit_breaker_error_rate_and_registry_per_host():
+    """窗口内错误率超过阈值时熔断 (即使没有连续失败)；注册表按主机区分熔断器"""
+    breaker = CircuitBreaker("rate.test", failure_threshold=10, error_rate_threshold=0.5, min_calls=4)
+    for success in (False, True, False, True):
+        breaker.record(success, 0.1)
+    assert breaker.state == "open"
+
+    registry = CircuitBreakerRegistry(failure_threshold=1)
+    primary = registry.get("https://primary.test/v1/a")
+    assert registry.get("https://primary.test/v1/b") is primary
+    primary.record(False, 0.1)
+    assert registry.get("https://backup.test/v1/a").state == "closed"
+    assert registry.get_stats()["primary.test"]["state"] == "open"
+    registry.reset()
+    assert registry.get_stats() == {}
@@ -0,0 +1,88 @@
+from unittest.mock import MagicMock, patch
+
+import fakeredis
+import httpx
+import orjson as json
+import pytest
+
+from core.club_cache import ClubCache, ClubIndexer
+
+
+def _recording_client(writes):
+    """返回记录 pipeline 中 HSET/HDEL 调用的 fakeredis 客户端"""
+    client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    make_pipeline = client.pipeline
+
+    def pipeline(*args, **kwargs):
+        pipe = make_pipeline(*args, **kwargs)
+        for command in ("hset", "hdel"):
+            original = getattr(pipe, command)
+
+            def record(*cmd_args, _command=command, _original=original, **cmd_kwargs):
+                writes.append((_command, cmd_args, cmd_kwargs))
+                return _original(*cmd_args, **cmd_kwargs)
+
+            setattr(pipe, command, record)
+        return pipe
+
+    client.pipeline = pipeline
+    return client
+
+
+@pytest.mark.asyncio
+async def test_club_cache_second_sync_writes_only_changes():
+    """第二次同步只 HSET 变化/新增的俱乐部、HDEL 消失的俱乐部，摘要与内容一致，内存索引增量更新"""
+    first = [
+        {"clubTag": "KEEP", "members": [{"name": "A#1"}]},
+        {"clubTag": "EDIT", "members": [{"name": "B#2"}]},
+        {"clubTag": "GONE", "members": [{"name": "C#3"}]},
+    ]
+    second = [
+        {"clubTag": "KEEP", "members": [{"name": "A#1"}]},
+        {"clubTag": "EDIT", "members": [{"name": "B#2"}, {"name": "D#4"}]},
+        {"clubTag": "NEW", "members": [{"name": "E#5"}]},
+    ]
+    responses = [first, second]
+    writes = []
+    redis = _recording_client(writes)
+    api = MagicMock()
+
+    async def fake_get(*args, **kwargs):
+        return httpx.Response(200, content=json.dumps(responses.pop(0)))
+
+    api.get = fake_get
+    indexer = ClubIndexer()
+    cache = ClubCache(api, {}, indexer)
+
+    with patch("core.club_cache.redis_manager._get_client", new=lambda: redis), \
+            patch("core.club_cache.prerender_scheduler"):
+        await cache._update_data(force_update=True)
+        assert set(await redis.hkeys("clubs:all")) == {"KEEP", "EDIT", "GONE"}
+
+        writes.clear()
+        with patch.object(indexer, "build_index", wraps=indexer.build_index) as build_index:
+            await cache._update_data(force_update=True)
+        assert not build_index.called  # 增量更新，不重建索引
+
+    hset_fields = {
+        key: set(kwargs["mapping"]) for command, (key, *_), kwargs in writes if command == "hset"
+    }
+    hdel_fields = {key: set(fields) for command, (key, *fields), _ in writes if command == "hdel"}
+    assert hset_fields == {
+        "clubs:all": {"EDIT", "NEW"},
+        "clubs:digests": {"EDIT", "NEW"},
+        "clubs:tags_lower": {"edit", "new"},
+    }
+    assert hdel_fields == {"clubs:all": {"GONE"}, "clubs:digests": {"GONE"}, "clubs:tags_lower": {"gone"}}
+
+    stored = await redis.hgetall("clubs:all")
+    digests = await redis.hgetall("clubs:digests")
+    assert set(stored) == set(digests) == {"KEEP", "EDIT", "NEW"}
+    for tag, club_json in stored.items():
+        assert digests[tag] == ClubCache._compute_digest(club_json.encode())
+    assert json.loads(stored["EDIT"]) == second[1]
+    assert await redis.smembers("clubs:tags") == {"KEEP", "EDIT", "NEW"}
+
+    assert indexer.search_exact("new") == second[2]
+    assert indexer.search_exact("GONE") is None and indexer.search_fuzzy("gon") == []
+    assert indexer.search_exact("edit") == second[1]
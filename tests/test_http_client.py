@@ -0,0 +1,51 @@
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from utils.http_client import HTTPClientRegistry
+
+
+@pytest.mark.asyncio
+async def test_registry_shares_one_client_per_origin_and_verify(monkeypatch):
+    """同一主机 (scheme + host + port) 共用一个客户端，verify 不同时分开；close_all 后重新创建"""
+    monkeypatch.delenv("HTTP_PROXY", raising=False)
+    monkeypatch.delenv("HTTPS_PROXY", raising=False)
+    registry = HTTPClientRegistry(http2=False)
+
+    client = registry.get_client("https://api.test/v1/leaderboard/s6/crossplay?name=a")
+    assert registry.get_client("https://api.test/v1/clubs") is client
+    assert registry.get_client("https://api.test:8443/v1/clubs") is not client
+    assert registry.get_client("http://api.test/v1/clubs") is not client
+    unverified = registry.get_client("https://api.test/v1/clubs", verify=False)
+    assert unverified is not client and registry.get_client("https://api.test/", verify=False) is unverified
+    assert set(registry._clients) == {
+        ("https://api.test", True), ("https://api.test:8443", True),
+        ("http://api.test", True), ("https://api.test", False),
+    }
+
+    await registry.close_all()
+    assert client.is_closed and unverified.is_closed and registry._clients == {}
+    reopened = registry.get_client("https://api.test/v1/clubs")
+    assert reopened is not client and not reopened.is_closed
+    await registry.close_all()
+
+
+@pytest.mark.asyncio
+async def test_registry_routes_through_proxy_from_environment(monkeypatch):
+    """HTTP_PROXY 优先于 HTTPS_PROXY，作为所有上游客户端的代理；未设置时不使用代理"""
+    registry = HTTPClientRegistry(http2=False)
+    monkeypatch.setenv("HTTP_PROXY", "http://proxy.test:3128")
+    monkeypatch.setenv("HTTPS_PROXY", "http://other.test:3128")
+    with patch("utils.http_client.httpx.AsyncClient", wraps=httpx.AsyncClient) as factory:
+        registry.get_client("https://api.test/v1/clubs")
+        assert factory.call_args.kwargs["proxy"] == "http://proxy.test:3128"
+
+        monkeypatch.delenv("HTTP_PROXY")
+        registry.get_client("https://backup.test/v1/clubs")
+        assert factory.call_args.kwargs["proxy"] == "http://other.test:3128"
+
+        monkeypatch.delenv("HTTPS_PROXY")
+        registry.get_client("https://direct.test/v1/clubs")
+        assert "proxy" not in factory.call_args.kwargs
+    await registry.close_all()
@@ -0,0 +1,69 @@
+import asyncio
+import time
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from core.me import MeAPI, MeQuery
+
+
+@pytest.mark.asyncio
+async def test_me_renders_partial_results_within_deadlines():
+    """/me 各数据源并行获取，超过截止时间的部分不阻塞整体响应，并在模板数据中标记"""
+    api = MeAPI()
+    api.source_timeouts = {"rank": 0.5, "world_tour": 0.05, "quick_cash": 0.5, "chart": 0.5}
+
+    async def slow_world_tour(*args, **kwargs):
+        await asyncio.sleep(0.3)
+        return {"rank": 9, "cashouts": 1}
+
+    rank = {"name": "Alpha#0001", "league": "Gold 1", "rankScore": 2100, "rank": 7, "change": 2}
+    with patch.object(api.season_manager, "get_player_data", new=AsyncMock(return_value=rank)), \
+            patch.object(api.world_tour_api, "get_player_stats", new=slow_world_tour), \
+            patch.object(api.quick_cash_api, "get_quick_cash_data", new=AsyncMock(return_value={"rank": 3, "points": 10})), \
+            patch.object(api.leaderboard_core, "fetch_player_history", new=AsyncMock(side_effect=ValueError("玩家不存在"))):
+        start = time.perf_counter()
+        data = await api.get_player_data("Alpha#0001")
+        assert time.perf_counter() - start < 0.25
+    assert data["missing"] == ["world_tour", "chart"] and data["timed_out"] == ["world_tour"]
+    assert data["quick_cash_data"]["rank"] == 3 and data["chart_data"] == []
+
+    template_data = api.prepare_template_data(data)
+    assert template_data["missing_sections"] == ["world_tour", "chart"]
+    assert template_data["chart_title"] == "走势 (暂不可用)"
+    assert template_data["league_icon_url"] == "../images/rank_icons/gold-1.png"
+    assert api._get_rank_icon("Unknown League") == "../images/rank_icons/bronze-4.png"
+
+
+@pytest.mark.asyncio
+async def test_me_returns_none_when_player_not_on_rank_board():
+    """排位数据按时返回但为空时视为玩家不存在，不等待其余数据源的截止时间"""
+    api = MeAPI()
+    api.source_timeouts = {"rank": 0.5, "world_tour": 0.5, "quick_cash": 0.5, "chart": 0.5}
+    with patch.object(api.season_manager, "get_player_data", new=AsyncMock(return_value=None)), \
+            patch.object(api.world_tour_api, "get_player_stats", new=AsyncMock(return_value=None)), \
+            patch.object(api.quick_cash_api, "get_quick_cash_data", new=AsyncMock(return_value=None)), \
+            patch.object(api.leaderboard_core, "fetch_player_history", new=AsyncMock(return_value=[])):
+        assert await api.get_player_data("Nobody#0000") is None
+
+
+@pytest.mark.asyncio
+async def test_me_command_tells_rank_timeout_from_rank_failure():
+    """排位数据超时与查询失败分别给出对应的提示"""
+    query = MeQuery()
+    api = query.api
+    api.source_timeouts = {"rank": 0.05, "world_tour": 0.5, "quick_cash": 0.5, "chart": 0.5}
+
+    async def slow_rank(*args, **kwargs):
+        await asyncio.sleep(0.1)
+        return {"name": "Alpha#0001"}
+
+    with patch.object(api, "initialize", new=AsyncMock()), \
+            patch.object(api.world_tour_api, "get_player_stats", new=AsyncMock(return_value=None)), \
+            patch.object(api.quick_cash_api, "get_quick_cash_data", new=AsyncMock(return_value=None)), \
+            patch.object(api.leaderboard_core, "fetch_player_history", new=AsyncMock(return_value=[])):
+        with patch.object(api.season_manager, "get_player_data", new=slow_rank):
+            assert await query.process_me_command("Alpha#0001") == (None, "\n⚠️ 排位数据获取超时，请稍后重试")
+        with patch.object(api.season_manager, "get_player_data", new=AsyncMock(side_effect=ValueError("boom"))):
+            assert await query.process_me_command("Alpha#0001") == (None, "\n⚠️ 排位数据查询失败，请稍后重试")
+        await asyncio.sleep(0.1)  # 等待超时的排位查询在后台结束
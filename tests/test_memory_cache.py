@@ -0,0 +1,154 @@
+import asyncio
+import time
+from unittest.mock import patch
+
+import pytest
+
+from utils.base_api import BaseAPI
+from utils.config import settings
+from utils.memory_cache import LRUCache, async_cached, get_all_cache_stats
+
+
+@pytest.mark.asyncio
+async def test_base_api_l0_cache_skips_redis_round_trip():
+    """L0 命中时不再访问 Redis，条目过期时间对齐 fresh + stale 窗口"""
+    api = BaseAPI(base_url=settings.API_STANDARD_URL)
+    keys = ("api_cache:/v1/l0-test", "api_cache_ts:/v1/l0-test", "api_cache_lm:/v1/l0-test")
+    mget_calls = 0
+
+    class FakeRedis:
+        async def mget(self, *args):
+            nonlocal mget_calls
+            mget_calls += 1
+            return [b'{"result": "cached"}', repr(time.time() - 10).encode(), None]
+
+    BaseAPI._l0_cache.clear()
+    with patch("utils.base_api.redis_manager._get_binary_client", new=lambda: FakeRedis()):
+        first = await api._read_cache_entry(*keys, 60)
+        second = await api._read_cache_entry(*keys, 60)
+        # 已超出窗口的条目不进入 L0
+        BaseAPI._l0_cache.clear()
+        await api._read_cache_entry(*keys, 5)
+        await api._read_cache_entry(*keys, 5)
+
+    assert first == second and first[0] == b'{"result": "cached"}'
+    assert mget_calls == 3, f"Redis 访问次数异常: {mget_calls}"
+    assert BaseAPI.get_cache_layer_stats()["l0"]["hits"] >= 1
+    BaseAPI._l0_cache.clear()
+
+def test_lru_cache_expires_and_limits_bytes():
+    """过期条目按未命中处理；总字节超限时淘汰最久未使用的条目，超过上限的单个条目不缓存"""
+    cache = LRUCache(max_entries=10, max_bytes=100)
+    cache.set("short", b"x", ttl=0.01, size=1)
+    cache.set("zero", b"x", ttl=0, size=1)
+    time.sleep(0.02)
+    assert cache.get("short") is None and cache.get("zero") is None
+
+    cache.set("a", b"a", ttl=60, size=40)
+    cache.set("b", b"b", ttl=60, size=40)
+    assert cache.get("a") == b"a"  # a 变为最近使用
+    cache.set("c", b"c", ttl=60, size=40)
+    assert cache.peek("b") is None and cache.peek("a") == b"a" and cache.peek("c") == b"c"
+    cache.set("huge", b"h", ttl=60, size=101)
+    assert cache.peek("huge") is None and len(cache) == 2
+
+    stats = cache.get_stats()
+    assert stats["bytes"] == 80 and stats["evictions"] == 1
+    cache.set("a", b"a2", ttl=60, size=10)
+    assert cache.get_stats()["bytes"] == 50
+
+@pytest.mark.asyncio
+async def test_base_api_l0_follows_writes_and_304_refresh():
+    """写入新内容时替换 L0 条目；304 只刷新时间戳时沿用 L0 中的内容；L0 中没有内容时删除条目"""
+    api = BaseAPI(base_url=settings.API_STANDARD_URL)
+    keys = ("api_cache:/v1/l0-write", "api_cache_ts:/v1/l0-write", "api_cache_lm:/v1/l0-write")
+
+    class FakePipeline:
+        def __getattr__(self, name):
+            return lambda *args, **kwargs: None
+
+        async def execute(self):
+            return []
+
+    class FakeRedis:
+        def pipeline(self):
+            return FakePipeline()
+
+    BaseAPI._l0_cache.clear()
+    with patch("utils.base_api.redis_manager._get_binary_client", new=lambda: FakeRedis()):
+        await api._write_cache_entry(*keys, b'{"v": 1}', "lm-1", 60, 60)
+        assert BaseAPI._l0_cache.peek(keys[0])[0] == b'{"v": 1}'
+        before = BaseAPI._l0_cache.peek(keys[0])[1]
+        await asyncio.sleep(0.01)
+        await api._write_cache_entry(*keys, None, "lm-1", 60, 60)
+        content, cached_at, last_modified = BaseAPI._l0_cache.peek(keys[0])
+        assert content == b'{"v": 1}' and cached_at > before and last_modified == "lm-1"
+
+        BaseAPI._l0_cache.clear()
+        await api._write_cache_entry(*keys, None, None, 60, 60)
+        assert BaseAPI._l0_cache.peek(keys[0]) is None
+    BaseAPI._l0_cache.clear()
+
+@pytest.mark.asyncio
+async def test_async_cached_single_flight_and_lru():
+    """并发的相同查询只加载一次；键函数去掉 self 后各实例共享缓存；超出容量时淘汰最久未使用的条目"""
+    calls = []
+
+    class Loader:
+        @async_cached(ttl=60, key=lambda self, name: name.lower(), max_entries=2, name="test_loader")
+        async def load(self, name):
+            calls.append(name)
+            await asyncio.sleep(0.01)
+            if name == "boom":
+                raise ValueError(name)
+            return {"name": name}
+
+    results = await asyncio.gather(*(Loader().load("Alpha") for _ in range(5)), Loader().load("alpha"))
+    assert len(calls) == 1 and all(r is results[0] for r in results)
+
+    await Loader().load("bravo")
+    await Loader().load("alpha")  # alpha 变为最近使用
+    await Loader().load("charlie")  # 淘汰 bravo
+    await Loader().load("bravo")
+    assert calls == ["Alpha", "bravo", "charlie", "bravo"]
+
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            await Loader().load("boom")
+    assert calls[-2:] == ["boom", "boom"]  # 异常不缓存
+
+    stats = get_all_cache_stats()["test_loader"]
+    assert stats["entries"] == 2 and stats["evictions"] == 2
+    assert stats["coalesced"] == 5 and stats["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_async_cached_skips_none_survives_cancellation_and_invalidates():
+    """None 不缓存；单个调用方被取消不影响共享的加载任务；invalidate 后重新加载"""
+    calls = []
+    release = asyncio.Event()
+
+    @async_cached(ttl=60, max_entries=4)
+    async def load(name):
+        calls.append(name)
+        if name == "slow":
+            await release.wait()
+        return None if name == "none" else {"name": name}
+
+    assert await load("none") is None and await load("none") is None
+    assert calls == ["none", "none"]
+
+    cancelled = asyncio.create_task(load("slow"))
+    waiter = asyncio.create_task(load("slow"))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+    await asyncio.sleep(0)
+    release.set()
+    assert (await waiter)["name"] == "slow" and cancelled.cancelled()
+    assert calls.count("slow") == 1 and load.cache.get_stats()["inflight"] == 0
+
+    assert await load("slow") is await load("slow")
+    load.cache.invalidate((("slow",), ()))
+    await load("slow")
+    assert calls.count("slow") == 2 and len(load.cache) == 1
+
@@ -0,0 +1,83 @@
+from unittest.mock import AsyncMock, patch
+
+import httpx
+import pytest
+
+from tools.mock_upstream import MockConfig, MockUpstream
+from utils.base_api import BaseAPI
+from utils.circuit_breaker import circuit_breakers
+from utils.metrics import Histogram, UpstreamMetrics, endpoint_template, upstream_metrics
+
+
+@pytest.mark.asyncio
+async def test_upstream_metrics_per_endpoint_template():
+    """按端点模板记录状态码、重试次数、传输字节与缓存结果"""
+    assert endpoint_template("/v1/leaderboard/s6quickcash/crossplay?name=x") == "/v1/leaderboard/{season}quickcash/{platform}"
+    circuit_breakers.reset()
+    upstream_metrics.reset()
+    mock = MockUpstream(MockConfig(board_size=50))
+    base_url = await mock.start()
+    try:
+        api = BaseAPI(base_url=base_url)
+        await api.get("/v1/leaderboard/s6quickcash/crossplay", use_cache=False)
+        await api.get("/v1/leaderboard/s7quickcash/steam", use_cache=False)
+
+        mock.config.error_rate = 1.0
+        with patch("utils.base_api.asyncio.sleep", new=AsyncMock()):
+            with pytest.raises(httpx.HTTPStatusError):
+                await api.get("/v1/leaderboard/s6quickcash/crossplay", use_cache=False)
+        upstream_metrics.observe_cache("/v1/leaderboard/s6quickcash/crossplay", "stale")
+
+        stats = BaseAPI.get_upstream_metrics("/v1/leaderboard/s5quickcash/psn")
+        board = stats["/v1/leaderboard/{season}quickcash/{platform}"]
+        assert board["requests"] == 5
+        assert board["status"] == {"200": 2, "503": 3}
+        assert board["retries"] == 2
+        assert board["bytes"] > 0
+        assert board["cache"]["stale"] == 1 and board["cache_hit_ratio"] == 1.0
+        text = upstream_metrics.render_prometheus()
+        assert 'upstream_retries_total{endpoint="/v1/leaderboard/{season}quickcash/{platform}"} 2' in text
+    finally:
+        await mock.stop()
+        await BaseAPI.close_all_clients()
+        circuit_breakers.reset()
+
+
+def test_endpoint_template_normalizes_seasons_platforms_and_ids():
+    """赛季前缀 (含 cb)、平台与纯数字路径段被替换，其他路径段原样保留"""
+    assert endpoint_template("/v1/leaderboard/cb2/xbox") == "/v1/leaderboard/{season}/{platform}"
+    assert endpoint_template("/v1/leaderboard/s6worldtour") == "/v1/leaderboard/{season}worldtour"
+    assert endpoint_template("/v1/clubs/12345?x=1") == "/v1/clubs/{id}"
+    assert endpoint_template("/v1/seasons") == "/v1/seasons"
+    assert endpoint_template("") == "/"
+
+
+def test_histogram_buckets_and_quantiles():
+    """边界值落入对应桶，超出最大上限的值计入 +Inf，分位数返回所在桶的上限"""
+    histogram = Histogram((0.1, 1.0))
+    assert histogram.quantile(0.5) == 0.0
+    for value in (0.1, 0.5, 0.5, 5.0):
+        histogram.observe(value)
+    assert histogram.cumulative() == [("0.1", 1), ("1.0", 3), ("+Inf", 4)]
+    assert histogram.quantile(0.5) == 1.0
+    assert histogram.quantile(0.99) == 1.0
+    assert histogram.total == pytest.approx(6.1)
+
+
+def test_upstream_metrics_errors_and_empty_lookups():
+    """未拿到响应的请求记为 error；没有缓存查询时命中率为 0，未知端点不出现在结果中"""
+    metrics = UpstreamMetrics(buckets=(1.0,))
+    metrics.observe_error("/v1/leaderboard/s6/steam", 2.0)
+    metrics.observe_response("/v1/leaderboard/s7/psn", 304, 0.5)
+
+    stats = metrics.get_stats()["/v1/leaderboard/{season}/{platform}"]
+    assert stats["requests"] == 2
+    assert stats["status"] == {"error": 1, "304": 1}
+    assert stats["not_modified_ratio"] == 0.5
+    assert stats["cache_hit_ratio"] == 0.0
+    assert metrics.get_stats("/v1/clubs") == {}
+
+    text = metrics.render_prometheus()
+    assert 'upstream_request_duration_seconds_bucket{endpoint="/v1/leaderboard/{season}/{platform}",le="+Inf"} 2' in text
+    metrics.reset()
+    assert metrics.get_stats() == {}
@@ -0,0 +1,90 @@
+import orjson as json
+import pytest
+
+from tools.mock_upstream import MockConfig, MockUpstream
+from utils.base_api import BaseAPI
+from utils.circuit_breaker import circuit_breakers
+from utils.http_client import http_clients
+
+
+@pytest.mark.asyncio
+async def test_base_api_against_mock_upstream():
+    """BaseAPI 指向本地模拟上游：按 name 过滤、Last-Modified/304 与错误注入"""
+    circuit_breakers.reset()
+    mock = MockUpstream(MockConfig(board_size=200))
+    base_url = await mock.start()
+    try:
+        api = BaseAPI(base_url=base_url)
+        response = await api.get(
+            "/v1/leaderboard/s6quickcash/crossplay", params={"name": "player00042"}, use_cache=False
+        )
+        data = BaseAPI.handle_response(response)
+        assert data["count"] == 1 and data["data"][0]["name"].startswith("Player00042#")
+
+        client = http_clients.get_client(base_url)
+        board_url = f"{base_url}/v1/leaderboard/s6/crossplay"
+        full = await client.get(board_url)
+        assert len(full.json()["data"]) == 200
+        conditional = await client.get(board_url, headers={"If-Modified-Since": full.headers["Last-Modified"]})
+        assert conditional.status_code == 304
+
+        mock.config.error_rate = 1.0
+        failed = await client.get(board_url)
+        assert failed.status_code == 503
+        assert mock.stats["not_modified"] == 1 and mock.stats["errors_injected"] == 1
+    finally:
+        await mock.stop()
+        await BaseAPI.close_all_clients()
+
+
+@pytest.mark.asyncio
+async def test_mock_upstream_replays_fixture_before_synthetic_data(tmp_path):
+    """fixtures 目录中存在录制文件时优先回放，其他端点仍使用合成数据"""
+    recorded = {"count": 1, "data": [{"rank": 1, "name": "Recorded#0001", "rankScore": 1}]}
+    (tmp_path / "v1_leaderboard_s6_crossplay.json").write_bytes(json.dumps(recorded))
+    mock = MockUpstream(MockConfig(board_size=10, fixtures_dir=str(tmp_path)))
+    base_url = await mock.start()
+    try:
+        client = http_clients.get_client(base_url)
+        replayed = await client.get(f"{base_url}/v1/leaderboard/s6/crossplay")
+        assert replayed.json() == recorded
+
+        filtered = await client.get(f"{base_url}/v1/leaderboard/s6/crossplay", params={"name": "recorded"})
+        assert filtered.json()["count"] == 1
+
+        synthetic = await client.get(f"{base_url}/v1/leaderboard/s6worldtour/crossplay")
+        rows = synthetic.json()["data"]
+        assert len(rows) == 10 and all("cashouts" in row for row in rows)
+    finally:
+        await mock.stop()
+        await BaseAPI.close_all_clients()
+
+
+@pytest.mark.asyncio
+async def test_mock_upstream_runtime_config_and_conditional_requests():
+    """运行时修改配置后重新生成数据；关闭 Last-Modified 时不再返回 304，无法解析的日期按普通请求处理"""
+    mock = MockUpstream(MockConfig(board_size=5))
+    base_url = await mock.start()
+    try:
+        client = http_clients.get_client(base_url)
+        board_url = f"{base_url}/v1/leaderboard/s6/crossplay"
+        assert len((await client.get(board_url)).json()["data"]) == 5
+
+        updated = await client.post(f"{base_url}/__mock__/config", json={"board_size": 8, "unknown": 1})
+        assert updated.json()["board_size"] == 8
+        full = await client.get(board_url)
+        assert len(full.json()["data"]) == 8
+
+        garbage = await client.get(board_url, headers={"If-Modified-Since": "not a date"})
+        assert garbage.status_code == 200
+
+        mock.config.last_modified = False
+        unconditional = await client.get(board_url, headers={"If-Modified-Since": full.headers["Last-Modified"]})
+        assert unconditional.status_code == 200 and "Last-Modified" not in unconditional.headers
+
+        stats = (await client.get(f"{base_url}/__mock__/stats")).json()
+        assert stats["not_modified"] == 0
+        assert stats["by_path"]["/v1/leaderboard/s6/crossplay"] == 4
+    finally:
+        await mock.stop()
+        await BaseAPI.close_all_clients()
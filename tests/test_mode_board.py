@@ -0,0 +1,237 @@
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock, call, patch
+
+import fakeredis
+import httpx
+import orjson as json
+import pytest
+
+from core.death_match import DeathMatchAPI
+from core.h2h import H2HAPI
+from core.mode_board import WRITE_BATCH_SIZE, BoardIndexer, ModeBoard, compact_player
+from core.plugin import Plugin
+from core.season import SeasonConfig
+from core.world_tour import WorldTourAPI
+from plugins.death_match_plugin import DeathMatchPlugin
+
+
+def test_board_indexer_matches_linear_scan():
+    """索引查找与原先的线性扫描一致：任一名称字段包含查询词时返回排名最靠前的玩家"""
+    players = [
+        {"rank": 1, "name": "Alpha#0001", "steamName": "alpha_steam"},
+        {"rank": 2, "name": "Bobby#0002", "psnName": "bob"},
+        {"rank": 3, "name": "Bob#0003", "xboxName": "Xbob"},
+        {"rank": 4, "name": "Al#0004"},
+    ]
+    indexer = BoardIndexer()
+    assert indexer.find("bob") is None
+    indexer.build_index(players)
+
+    def scan(query):
+        query = query.lower()
+        for player in players:
+            fields = [str(player.get(k) or "").lower() for k in ("name", "steamName", "psnName", "xboxName")]
+            if any(query in field for field in fields):
+                return player
+        return None
+
+    for query in ("bob", "BOB#0003", "al", "steam", "xbob", "#000", "a", "missing", "lpha#0"):
+        assert indexer.find(query) is scan(query), query
+    assert indexer.find("bob#0003")["rank"] == 3
+
+
+def test_board_indexer_short_queries_exact_lookup_and_rebuild():
+    """短于 3 个字符的查询走顺序扫描；精确查找不区分大小写；重建后旧数据不再命中"""
+    indexer = BoardIndexer()
+    assert indexer.top(3) == [] and indexer.find_exact("Alpha#0001") is None
+
+    indexer.build_index([
+        {"rank": 1, "name": "Alpha#0001"},
+        {"rank": 2, "name": "", "steamName": "xy"},
+        {"rank": 3, "name": "Gamma#0003", "psnName": None},
+    ])
+    assert indexer.find("") is None
+    assert indexer.find("XY")["rank"] == 2
+    assert indexer.find("a")["rank"] == 1
+    assert indexer.find_exact("GAMMA#0003")["rank"] == 3
+    assert indexer.find_exact("Gamma") is None
+    assert [p["rank"] for p in indexer.top(2)] == [1, 2] and len(indexer) == 3
+
+    indexer.build_index([{"rank": 1, "name": "Delta#0004"}])
+    assert indexer.find("alpha") is None and indexer.find_exact("alpha#0001") is None
+    assert indexer.find("delta#0004")["rank"] == 1
+
+
+def test_compact_player_keeps_only_present_fields():
+    """只保留指定且存在的字段；fields 为 None 时原样返回"""
+    player = {"rank": 1, "name": "A#1", "points": 10, "extra": "x"}
+    assert compact_player(player, ("rank", "name", "points", "clubTag")) == {"rank": 1, "name": "A#1", "points": 10}
+    assert compact_player(player, None) is player
+
+
+def test_mode_board_writes_only_changed_players():
+    """同步时只保留模式所需字段，并且只写入变化的玩家、删除下榜的玩家"""
+    fields = WorldTourAPI.stored_fields()
+    raw = {"rank": 1, "name": "Alpha#0001", "cashouts": 100, "fame": 5, "leagueNumber": 9}
+    assert compact_player(raw, fields) == {"rank": 1, "name": "Alpha#0001", "cashouts": 100}
+    assert compact_player(raw, None) is raw
+
+    board = ModeBoard(WorldTourAPI.MODE, "s5", None, {}, key_prefix="wt", stored_fields=fields)
+    assert board.redis_key_players == "wt:s5:players"
+    board._stored = {"alpha#0001": "a1", "bravo#0002": "b1", "charlie#0003": "c1"}
+    pipeline = MagicMock()
+    stats = board._queue_diff(pipeline, {"alpha#0001": "a1", "bravo#0002": "b2", "delta#0004": "d1"})
+    assert stats == {"players": 3, "written": 2, "removed": 1, "full": False}
+    pipeline.hset.assert_called_once_with("wt:s5:players", mapping={"bravo#0002": "b2", "delta#0004": "d1"})
+    pipeline.hdel.assert_called_once_with("wt:s5:players", "charlie#0003")
+
+
+def test_mode_board_full_write_batches_and_replaces_atomically():
+    """没有上次写入的内容时分批写入临时键后 RENAME，并清理旧格式遗留的键；增量写入同样分批"""
+    board = ModeBoard("quickcash", "s5", None, {}, legacy_keys=("quickcash:{season}:legacy",))
+    mapping = {f"p{i}": str(i) for i in range(WRITE_BATCH_SIZE + 1)}
+    pipeline = MagicMock()
+    stats = board._queue_full_write(pipeline, mapping)
+    assert stats == {"players": WRITE_BATCH_SIZE + 1, "written": WRITE_BATCH_SIZE + 1, "removed": 0, "full": True}
+    assert pipeline.hset.call_count == 2
+    assert pipeline.hset.call_args_list[1] == call("quickcash:s5:players:staging", mapping={f"p{WRITE_BATCH_SIZE}": str(WRITE_BATCH_SIZE)})
+    pipeline.rename.assert_called_once_with("quickcash:s5:players:staging", "quickcash:s5:players")
+    assert pipeline.delete.call_args_list == [call("quickcash:s5:players:staging"), call("quickcash:s5:legacy")]
+
+    board._stored = mapping
+    pipeline = MagicMock()
+    stats = board._queue_diff(pipeline, {})
+    assert stats["removed"] == WRITE_BATCH_SIZE + 1 and stats["written"] == 0
+    assert pipeline.hdel.call_count == 2 and not pipeline.hset.called
+
+
+
+@pytest.mark.asyncio
+async def test_world_tour_search_index_does_not_mutate_board_players():
+    """深度搜索索引使用带 rankScore 的副本，榜单快照中的玩家数据保持原样"""
+    api = WorldTourAPI()
+    board = ModeBoard(WorldTourAPI.MODE, api.current_season_id, api, api.headers)
+    board.indexer.build_index([{"rank": 1, "name": "Alpha#0001", "cashouts": 100}, {"rank": 2, "name": "Bravo#0002"}])
+    with patch.object(api.search_indexer, "build_index") as build_index:
+        await api._on_board_indexed(board)
+    indexed = build_index.call_args.args[0]
+    assert [p["rankScore"] for p in indexed] == [100, 0]
+    assert board.indexer.top(2) == [{"rank": 1, "name": "Alpha#0001", "cashouts": 100}, {"rank": 2, "name": "Bravo#0002"}]
+
+
+@pytest.mark.asyncio
+async def test_mode_board_falls_back_to_upstream_on_miss():
+    """快照命中时不请求上游；未命中时回退到单次查询，并分别计入命中/回退统计"""
+    api = H2HAPI()
+    board = ModeBoard(H2HAPI.MODE, api.current_season, api, api.headers)
+    board.indexer.build_index([{"rank": 1, "name": "Alpha#0001"}, {"rank": 2, "name": "Bravo#0002"}])
+    H2HAPI._boards[api.current_season] = board
+    before = H2HAPI.get_lookup_stats()
+    fetched = {"rank": 3, "name": "Charlie#0003"}
+    try:
+        with patch.object(H2HAPI, "_fetch_player", new=AsyncMock(return_value=fetched)) as fetch:
+            assert (await api.get_player_h2h_data("alpha#0001"))["rank"] == 1
+            # 对对碰只接受精确匹配，片段不会命中快照
+            assert await api.get_player_h2h_data("Charlie#0003") is fetched
+            assert fetch.await_count == 1
+        stats = H2HAPI.get_lookup_stats()
+        assert stats["hits"] - before["hits"] == 1
+        assert stats["fallbacks"] - before["fallbacks"] == 1
+        assert stats["fallback_hits"] - before["fallback_hits"] == 1
+    finally:
+        H2HAPI._boards.clear()
+
+
+@pytest.mark.asyncio
+async def test_h2h_fallback_checks_name_and_counts_misses():
+    """快照不可用时直接回退；上游按名称模糊返回的其他玩家不算命中，计入未找到"""
+    api = H2HAPI()
+    before = H2HAPI.get_lookup_stats()
+    other = {"count": 1, "data": [{"rank": 5, "name": "Alpha#00012"}]}
+    with patch.object(H2HAPI, "get_board", new=AsyncMock(return_value=None)), \
+            patch.object(H2HAPI, "get_h2h_data", new=AsyncMock(return_value=other)) as fetch:
+        assert await api.get_player_h2h_data("Alpha#0001") is None
+        assert await api.get_player_h2h_data("alpha#00012") is other["data"][0]
+        assert fetch.await_count == 2
+    stats = H2HAPI.get_lookup_stats()
+    assert stats["hits"] - before["hits"] == 0
+    assert stats["fallbacks"] - before["fallbacks"] == 2
+    assert stats["fallback_hits"] - before["fallback_hits"] == 1
+    assert stats["misses"] - before["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_get_board_backs_off_after_failed_init_without_blocking_other_seasons():
+    """某赛季初始化期间其他赛季的查询不被阻塞；初始化失败后在退避窗口内不再重试"""
+    api = H2HAPI()
+    release = asyncio.Event()
+    calls = []
+
+    async def fake_initialize(board):
+        calls.append(board.season_id)
+        if board.season_id == "s1":
+            await release.wait()  # 同步失败，索引未就绪
+        else:
+            board.indexer.build_index([{"rank": 1, "name": "Alpha#0001"}])
+
+    try:
+        with patch.object(ModeBoard, "initialize", new=fake_initialize):
+            slow = asyncio.create_task(api.get_board("s1"))
+            await asyncio.sleep(0)
+            other = await asyncio.wait_for(api.get_board("s2"), timeout=0.5)
+            assert other is not None and not slow.done()
+
+            waiter = asyncio.create_task(api.get_board("s1"))
+            release.set()
+            assert await slow is None and await waiter is None
+            assert calls == ["s1", "s2"]  # 等待中的查询不会再次初始化
+
+            assert await api.get_board("s1") is None
+            assert calls == ["s1", "s2"]
+
+            H2HAPI._boards["s1"].init_failed_at = time.monotonic() - H2HAPI.INIT_RETRY_BACKOFF
+            assert await api.get_board("s1") is None
+            assert calls == ["s1", "s2", "s1"]
+    finally:
+        H2HAPI._boards.clear()
+
+
+@pytest.mark.asyncio
+async def test_death_match_plugin_warms_up_board_and_serves_lookups():
+    """插件加载时同步当前赛季的死亡竞赛榜单，查询直接读取快照，卸载时停止后台同步"""
+    season = SeasonConfig.CURRENT_SEASON
+    redis = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    rows = [
+        {"rank": 1, "name": "Alpha#0001", "points": 900, "fame": 7},
+        {"rank": 2, "name": "Bravo#0002", "steamName": "bravo_steam", "points": 800},
+    ]
+    requested = []
+
+    async def fake_get(self, url, **kwargs):
+        requested.append(url)
+        return httpx.Response(200, content=json.dumps({"data": rows}))
+
+    with patch("core.mode_board.redis_manager._get_client", new=lambda: redis), \
+            patch.object(DeathMatchAPI, "get", new=fake_get), \
+            patch.object(Plugin, "on_load", new=AsyncMock()), \
+            patch.object(Plugin, "on_unload", new=AsyncMock()), \
+            patch("plugins.death_match_plugin.BindManager"):
+        plugin = DeathMatchPlugin()
+        try:
+            await plugin.on_load()
+            board = DeathMatchAPI._boards[season]
+            assert requested == [f"/v1/leaderboard/{season}teamdeathmatch/crossplay"]
+            assert board.indexer.is_ready() and board._update_task is not None
+            stored = await redis.hget(f"teamdeathmatch:{season}:players", "alpha#0001")
+            assert json.loads(stored) == {"rank": 1, "name": "Alpha#0001", "points": 900}
+
+            assert (await plugin.query.api.get_death_match_data("BRAVO_STEAM"))["points"] == 800
+            # 全量榜单的未命中即为不在榜，不回退到上游
+            assert await plugin.query.api.get_death_match_data("charlie") is None
+            assert len(requested) == 1
+            update_task = board._update_task
+        finally:
+            await plugin.on_unload()
+        await asyncio.sleep(0)
+    assert update_task.done() and DeathMatchAPI._boards == {}
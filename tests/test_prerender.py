@@ -0,0 +1,107 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from core.image_generator import ImageGenerator
+from utils.prerender import PrerenderScheduler
+from utils.render_cache import render_cache
+from utils.render_queue import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, current_priority, render_context
+
+
+@pytest.mark.asyncio
+async def test_prerender_fills_render_cache_at_background_priority(tmp_path):
+    """数据刷新通知合并后以后台优先级预渲染，之后相同的用户查询直接命中缓存"""
+    (tmp_path / "card.html").write_text("<p>{{ name }}</p>")
+    generator = ImageGenerator(str(tmp_path))
+    renders = []
+
+    async def fake_render(template_data, *args, **kwargs):
+        renders.append((template_data["name"], current_priority()))
+        await asyncio.sleep(0.01)
+        return None if template_data["name"] == "dropped" else f"jpeg:{template_data['name']}".encode()
+
+    scheduler = PrerenderScheduler(debounce=0.01)
+    scheduler.register("season", "top", lambda: generator.generate_image({"name": "top"}, "card.html"))
+    render_cache.clear()
+    with patch.object(render_cache, "use_redis", False), patch.object(generator, "_render_image", new=fake_render):
+        scheduler.notify("season")
+        scheduler.notify("season")
+        scheduler.notify("club")  # 没有任务的数据源
+        await asyncio.sleep(0.05)
+        assert renders == [("top", PRIORITY_BACKGROUND)]
+        assert await generator.generate_image({"name": "top"}, "card.html") == b"jpeg:top"
+        assert len(renders) == 1
+
+        # 交互请求合并到未生成图片的后台渲染上时自行渲染
+        with render_context(priority=PRIORITY_BACKGROUND):
+            background = asyncio.create_task(generator.generate_image({"name": "dropped"}, "card.html"))
+        await asyncio.sleep(0)
+        assert await generator.generate_image({"name": "dropped"}, "card.html") is None
+        assert await background is None
+        assert renders[1:] == [("dropped", PRIORITY_BACKGROUND), ("dropped", PRIORITY_INTERACTIVE)]
+    render_cache.clear()
+    stats = scheduler.get_stats()
+    assert stats["runs"] == 1 and stats["notifications"] == 2 and stats["coalesced"] == 1 and stats["pending"] == 0
+    await scheduler.stop()
+
+
+@pytest.mark.asyncio
+async def test_prerender_reruns_after_notify_during_run_and_isolates_failures():
+    """执行期间收到的通知在本轮结束后再执行一轮；单个任务失败不影响同一数据源的其他任务"""
+    runs = []
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def slow():
+        runs.append("slow")
+        started.set()
+        await release.wait()
+        return b"jpeg"
+
+    async def broken():
+        runs.append("broken")
+        raise RuntimeError("template missing")
+
+    scheduler = PrerenderScheduler(debounce=0)
+    scheduler.register("season", "slow", slow)
+    scheduler.register("season", "broken", broken)
+    scheduler.notify("season")
+    await started.wait()
+    scheduler.notify("season")
+    scheduler.notify("season")
+    release.set()
+    await asyncio.sleep(0.05)
+
+    assert runs == ["slow", "broken", "slow", "broken"]
+    stats = scheduler.get_stats()
+    assert stats["runs"] == 2 and stats["failures"] == 2 and stats["coalesced"] == 2 and stats["pending"] == 0
+    await scheduler.stop()
+
+
+@pytest.mark.asyncio
+async def test_prerender_periodic_jobs_and_disabled_scheduler():
+    """带 interval 的任务定期执行，注销后停止；禁用时注册与通知都不执行任务"""
+    runs = []
+
+    async def job():
+        runs.append(current_priority())
+        return b"jpeg"
+
+    scheduler = PrerenderScheduler(debounce=0)
+    scheduler.register("weapons", "all", job, interval=0.01)
+    await asyncio.sleep(0.05)
+    assert len(runs) >= 2 and set(runs) == {PRIORITY_BACKGROUND}
+    scheduler.unregister("weapons", "all")
+    await asyncio.sleep(0.02)
+    count = len(runs)
+    await asyncio.sleep(0.03)
+    assert len(runs) == count and scheduler.get_stats()["jobs"] == 0
+
+    disabled = PrerenderScheduler(enabled=False, debounce=0)
+    disabled.register("season", "top", job, interval=0.01)
+    disabled.notify("season")
+    await asyncio.sleep(0.03)
+    assert len(runs) == count and disabled.get_stats()["notifications"] == 0
+    await scheduler.stop()
+    await disabled.stop()
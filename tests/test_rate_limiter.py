@@ -0,0 +1,68 @@
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+
+from utils.rate_limiter import HostRateLimiter, TokenBucket, parse_retry_after
+
+
+@pytest.mark.asyncio
+async def test_host_rate_limiter_isolates_hosts_and_honors_retry_after():
+    """不同主机的令牌桶互不阻塞，429/Retry-After 只暂停对应主机"""
+    limiter = HostRateLimiter(rate=5, burst=2)
+    slow_url = "https://slow.example.com/v1/a"
+    fast_url = "https://fast.example.com/v1/a"
+
+    # 突发额度内不等待
+    assert await limiter.acquire(slow_url) < 0.01
+    assert await limiter.acquire(slow_url) < 0.01
+
+    limiter.penalize(slow_url, parse_retry_after("0.2"))
+    start = time.monotonic()
+    assert await limiter.acquire(fast_url) < 0.01, "其他主机不应受影响"
+    await limiter.acquire(slow_url)
+    assert time.monotonic() - start >= 0.2
+
+    stats = limiter.get_stats()
+    assert stats["slow.example.com"]["penalties"] == 1
+    assert stats["fast.example.com"]["throttled"] == 0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after("invalid", default=3.0) == 3.0
+
+def test_parse_retry_after_http_date_in_future_and_clamping():
+    """HTTP 日期形式按距今的秒数计算，超过上限时截断，负数按 0 处理"""
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+    seconds = parse_retry_after(format_datetime(retry_at, usegmt=True))
+    assert 28 <= seconds <= 30
+
+    far = datetime.now(timezone.utc) + timedelta(hours=1)
+    assert parse_retry_after(format_datetime(far, usegmt=True), maximum=60.0) == 60.0
+    assert parse_retry_after("120", maximum=60.0) == 60.0
+    assert parse_retry_after("-5") == 0.0
+    assert parse_retry_after(None, default=2.0) == 2.0
+    assert parse_retry_after("   ", default=2.0) == 2.0
+
+@pytest.mark.asyncio
+async def test_token_bucket_refills_at_rate_and_longer_penalty_wins():
+    """突发额度用完后按速率补充；较短的退避不会缩短已有的退避"""
+    bucket = TokenBucket(rate=20, burst=1)
+    assert await bucket.acquire() < 0.01
+    waited = await bucket.acquire()
+    assert 0.03 <= waited < 0.2
+    assert bucket.get_stats()["throttled"] == 1
+
+    bucket.penalize(0.2)
+    bucket.penalize(0.01)
+    start = time.monotonic()
+    await bucket.acquire()
+    assert time.monotonic() - start >= 0.19
+    assert bucket.get_stats()["penalties"] == 2
+
+def test_host_overrides_apply_per_host_with_or_without_port():
+    """主机级覆盖同时匹配带端口与不带端口的主机名，其他主机使用默认值"""
+    limiter = HostRateLimiter(rate=5, burst=2, host_overrides={"api.test": {"rate": 1, "burst": 10}})
+    assert limiter.get_bucket("https://api.test:8443/v1").capacity == 10
+    assert limiter.get_bucket("https://api.test/v1").rate == 1
+    assert limiter.get_bucket("https://other.test/v1").capacity == 2
+    assert limiter.get_bucket("https://api.test/v1/a") is limiter.get_bucket("https://api.test/v1/b")
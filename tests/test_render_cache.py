@@ -0,0 +1,85 @@
+import asyncio
+import os
+from unittest.mock import patch
+
+import fakeredis
+import pytest
+
+from core.image_generator import ImageGenerator
+from utils.render_cache import RenderCache, render_cache
+
+
+@pytest.mark.asyncio
+async def test_render_cache_skips_browser_on_identical_cards(tmp_path):
+    """模板与数据相同的卡片只渲染一次 (含并发请求)；数据或模板变化时重新渲染"""
+    template = tmp_path / "card.html"
+    template.write_text("<div>{{ name }}</div>")
+    generator = ImageGenerator(str(tmp_path))
+    renders = []
+
+    async def fake_render(template_data, *args, **kwargs):
+        renders.append(template_data["name"])
+        await asyncio.sleep(0.01)
+        return f"jpeg:{template_data['name']}".encode()
+
+    render_cache.clear()
+    with patch.object(render_cache, "use_redis", False), patch.object(generator, "_render_image", new=fake_render):
+        results = await asyncio.gather(*(generator.generate_image({"name": "a"}, "card.html") for _ in range(3)))
+        assert results == [b"jpeg:a"] * 3 and renders == ["a"]
+        assert await generator.generate_image({"name": "a"}, "card.html", image_quality=85) == b"jpeg:a"
+        assert renders == ["a"]
+
+        await generator.generate_image({"name": "b"}, "card.html")
+        await generator.generate_image({"name": "a"}, "card.html", image_quality=60)
+        os.utime(template, ns=(template.stat().st_atime_ns, template.stat().st_mtime_ns + 10**9))
+        await generator.generate_image({"name": "a"}, "card.html")
+        await generator.generate_image({"name": "a"}, "card.html", use_cache=False)
+        assert renders == ["a", "b", "a", "a", "a"]
+    stats = render_cache.get_stats()
+    assert stats["coalesced"] >= 2 and stats["l1_hits"] >= 1
+    render_cache.clear()
+
+
+@pytest.mark.asyncio
+async def test_render_cache_l2_backfill_and_redis_errors():
+    """L2 命中时回填 L1；Redis 出错时按未命中处理并计数"""
+    redis = fakeredis.aioredis.FakeRedis()
+    with patch("utils.render_cache.redis_manager._get_binary_client", new=lambda: redis):
+        writer = RenderCache(ttl=60)
+        await writer.set("card", b"jpeg")
+        assert await redis.ttl("render:card") > 0
+
+        reader = RenderCache(ttl=60)
+        assert await reader.get("card") == b"jpeg"
+        assert await reader.get("card") == b"jpeg"
+        stats = reader.get_stats()
+        assert stats["l2_hits"] == 1 and stats["l1_hits"] == 1 and stats["hit_ratio"] == 1.0
+
+    def broken_client():
+        raise ConnectionError("redis down")
+
+    with patch("utils.render_cache.redis_manager._get_binary_client", new=broken_client):
+        cache = RenderCache()
+        assert await cache.get("card") is None
+        await cache.set("card", b"jpeg")
+        assert await cache.get("card") == b"jpeg"
+        assert cache.get_stats()["redis_errors"] == 2
+
+
+@pytest.mark.asyncio
+async def test_render_cache_skips_failed_and_oversized_renders():
+    """渲染失败 (返回 None) 与超过单条上限的截图不缓存，下次重新渲染"""
+    cache = RenderCache(use_redis=False, max_item_bytes=4)
+    renders = []
+
+    async def render(data):
+        renders.append(data)
+        return data
+
+    assert await cache.get_or_render("failed", lambda: render(None)) is None
+    assert await cache.get_or_render("failed", lambda: render(b"ok")) == b"ok"
+    assert await cache.get_or_render("failed", lambda: render(b"again")) == b"ok"
+    assert await cache.get_or_render("large", lambda: render(b"too large")) == b"too large"
+    assert await cache.get_or_render("large", lambda: render(b"too large")) == b"too large"
+    assert renders == [None, b"ok", b"too large", b"too large"]
+    assert cache.get_stats()["stores"] == 1 and cache.get_stats()["inflight"] == 0
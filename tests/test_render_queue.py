@@ -0,0 +1,87 @@
+import asyncio
+import time
+from unittest.mock import patch
+
+import pytest
+
+from core.image_generator import ImageGenerator
+from utils.browser import BrowserManager
+from utils.render_queue import (
+    PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, RenderDropped, RenderQueue,
+    current_deadline, current_priority, render_context,
+)
+
+
+@pytest.mark.asyncio
+async def test_render_queue_priority_deadline_and_backpressure(tmp_path, fake_page):
+    """页面优先交给交互请求；过期请求在拿到页面前丢弃；队列满时直接拒绝"""
+    manager = BrowserManager()
+    manager.initialized = True
+    page = fake_page()
+    manager.idle_pages = []
+    manager.total_pages = manager.max_pages = 1
+    manager.render_queue = RenderQueue(max_length=3, max_background=1)
+
+    background = asyncio.create_task(manager.acquire_page(priority=PRIORITY_BACKGROUND))
+    await asyncio.sleep(0)
+    with pytest.raises(RenderDropped) as dropped:
+        await manager.acquire_page(priority=PRIORITY_BACKGROUND)
+    assert dropped.value.reason == "full"
+
+    expiring = asyncio.create_task(manager.acquire_page(deadline=time.monotonic() + 0.02))
+    interactive = asyncio.create_task(manager.acquire_page())
+    await asyncio.sleep(0.05)
+    with pytest.raises(RenderDropped):
+        await expiring
+
+    await manager.release_page(page)
+    assert await interactive is page and not background.done()
+    await manager.release_page(page)
+    assert await background is page
+    await manager.release_page(page)
+
+    stats = manager.render_queue.get_stats()
+    assert stats["dropped_expired"] == 1 and stats["dropped_full"] == 1 and stats["depth"] == 0
+
+    # 截止时间已过的渲染不占用页面，直接返回 None
+    (tmp_path / "card.html").write_text("<p>{{ name }}</p>")
+    generator = ImageGenerator(str(tmp_path))
+    with patch("core.image_generator.browser_manager", manager), render_context(timeout=-1):
+        assert await generator.generate_image({"name": "a"}, "card.html", use_cache=False) is None
+    assert manager.render_queue.get_stats()["dropped_expired"] == 2 and manager.idle_pages == [page]
+
+
+@pytest.mark.asyncio
+async def test_render_queue_orders_by_priority_deadline_then_arrival():
+    """同优先级先按截止时间再按入队顺序分配；已取消的等待者被跳过，fail_all 让剩余等待者失败"""
+    loop = asyncio.get_running_loop()
+    queue = RenderQueue(max_length=5, max_background=5)
+    now = time.monotonic()
+    late, early, first, second, background = (loop.create_future() for _ in range(5))
+    queue.push(background, PRIORITY_BACKGROUND, None)
+    queue.push(first, PRIORITY_INTERACTIVE, None)
+    queue.push(late, PRIORITY_INTERACTIVE, now + 60)
+    queue.push(early, PRIORITY_INTERACTIVE, now + 30)
+    queue.push(second, PRIORITY_INTERACTIVE, None)
+    with pytest.raises(RenderDropped):
+        queue.push(loop.create_future(), PRIORITY_INTERACTIVE, None)
+
+    early.cancel()
+    assert [queue.pop() for _ in range(3)] == [late, first, second]
+    assert queue.get_stats()["depth_background"] == 1
+
+    queue.fail_all(RuntimeError("closing"))
+    assert isinstance(background.exception(), RuntimeError)
+    assert queue.pop() is None and len(queue) == 0
+
+
+def test_render_context_nests_and_restores():
+    """render_context 嵌套时内层覆盖外层，退出后恢复；只设置优先级时保留外层截止时间"""
+    assert current_deadline() is None and current_priority() == PRIORITY_INTERACTIVE
+    with render_context(timeout=10, priority=PRIORITY_BACKGROUND):
+        outer = current_deadline()
+        with render_context(priority=PRIORITY_INTERACTIVE):
+            assert current_deadline() == outer and current_priority() == PRIORITY_INTERACTIVE
+        assert current_priority() == PRIORITY_BACKGROUND
+    assert current_deadline() is None and current_priority() == PRIORITY_INTERACTIVE
+
@@ -0,0 +1,69 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from utils.browser import BrowserManager
+from utils.template_assets import ASSET_ORIGIN, TemplateAssetStore
+
+
+@pytest.mark.asyncio
+async def test_template_assets_served_from_memory(tmp_path):
+    """模板静态资源从内存返回 (带强缓存头)，模板目录映射到虚拟源，不允许访问根目录之外的文件"""
+    (tmp_path / "templates").mkdir()
+    (tmp_path / "images").mkdir()
+    (tmp_path / "images" / "s6.jpg").write_bytes(b"jpeg")
+    (tmp_path.parent / "secret.txt").write_text("secret")
+    store = TemplateAssetStore(str(tmp_path))
+    store.load()
+
+    base_url = store.base_url(str(tmp_path / "templates"))
+    assert base_url == "http://finals.assets/templates/"
+    assert store.base_url(str(tmp_path.parent)) is None
+    assert store.resolve(base_url)[1].startswith("text/html")
+    assert store.resolve("http://finals.assets/images/s6.jpg") == (b"jpeg", "image/jpeg")
+    assert store.resolve("http://finals.assets/../secret.txt") is None
+
+    # 启动后新增的文件从磁盘读取一次，之后常驻内存
+    (tmp_path / "images" / "s7.png").write_bytes(b"png")
+    store.resolve("http://finals.assets/images/s7.png")
+    store.resolve("http://finals.assets/images/s7.png")
+    assert store.get_stats()["disk_reads"] == 1 and store.get_stats()["hits"] == 2
+
+    route = MagicMock()
+    route.request.url = "http://finals.assets/images/s6.jpg"
+    route.fulfill = AsyncMock()
+    with patch("utils.browser.template_assets", store):
+        await BrowserManager()._serve_asset(route)
+    kwargs = route.fulfill.await_args.kwargs
+    assert kwargs["body"] == b"jpeg" and "immutable" in kwargs["headers"]["Cache-Control"]
+
+
+def test_template_assets_skip_oversized_files_and_decode_paths(tmp_path):
+    """超过单文件上限的文件不常驻内存，每次从磁盘读取；URL 编码的路径按文件名解析"""
+    (tmp_path / "fonts").mkdir()
+    (tmp_path / "fonts" / "big font.woff2").write_bytes(b"x" * 16)
+    (tmp_path / "fonts" / "small.otf").write_bytes(b"otf")
+    store = TemplateAssetStore(str(tmp_path), max_file_bytes=8)
+    store.load()
+    assert store.get_stats()["files"] == 1
+    assert store.base_url(str(tmp_path)) == f"{ASSET_ORIGIN}/"
+
+    assert store.resolve(f"{ASSET_ORIGIN}/fonts/small.otf") == (b"otf", "font/otf")
+    for _ in range(2):
+        assert store.resolve(f"{ASSET_ORIGIN}/fonts/big%20font.woff2") == (b"x" * 16, "font/woff2")
+    assert store.resolve(f"{ASSET_ORIGIN}/fonts/missing.otf") is None
+    stats = store.get_stats()
+    assert stats["files"] == 1 and stats["disk_reads"] == 2 and stats["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_serve_asset_returns_404_for_unknown_files(tmp_path):
+    """虚拟源下找不到的文件返回 404"""
+    store = TemplateAssetStore(str(tmp_path))
+    store.load()
+    route = MagicMock()
+    route.request.url = f"{ASSET_ORIGIN}/images/none.png"
+    route.fulfill = AsyncMock()
+    with patch("utils.browser.template_assets", store):
+        await BrowserManager()._serve_asset(route)
+    route.fulfill.assert_awaited_once_with(status=404, body=b"")
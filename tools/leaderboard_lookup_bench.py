@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+模式榜单查询延迟基准测试
+
+以死亡竞赛为例，在本地模拟上游 (tools/mock_upstream.py) 上对比三种查询方式的单次延迟：
+* 旧实现 (未命中缓存)：每次查询下载整个榜单、解析并线性扫描
+* 旧实现 (命中缓存)：每次查询解析缓存中的整个榜单并线性扫描，省去网络往返
+* 快照索引：在后台同步的榜单快照上通过名称索引查找
+
+用法:
+    python tools/leaderboard_lookup_bench.py --board-size 10000 --queries 500 --latency 80
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+import orjson as json
+
+# 添加项目根目录到sys.path
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if root_dir not in sys.path:
+    sys.path.insert(0, root_dir)
+
+from core.mode_board import BoardIndexer, NAME_FIELDS
+from tools.mock_upstream import MockUpstream, MockConfig
+from utils.http_client import http_clients
+
+
+def _scan(players, query):
+    """旧实现的线性扫描"""
+    query = query.lower()
+    for player in players:
+        if any(query in str(player.get(field) or "").lower() for field in NAME_FIELDS):
+            return player
+    return None
+
+
+def _summary(samples):
+    ordered = sorted(samples)
+    p95 = ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)]
+    return statistics.median(ordered) * 1000, p95 * 1000
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="模式榜单查询延迟基准测试")
+    parser.add_argument("--board-size", type=int, default=10000, help="榜单玩家数")
+    parser.add_argument("--queries", type=int, default=500, help="查询次数")
+    parser.add_argument("--network-queries", type=int, default=20, help="未命中缓存场景的查询次数")
+    parser.add_argument("--latency", type=float, default=80, help="模拟的上游延迟(毫秒)")
+    parser.add_argument("--season", default="s6", help="赛季ID")
+    args = parser.parse_args()
+
+    mock = MockUpstream(MockConfig(board_size=args.board_size, latency_ms=args.latency))
+    base_url = await mock.start()
+    url = f"{base_url}/v1/leaderboard/{args.season}teamdeathmatch/crossplay"
+    client = http_clients.get_client(url)
+    try:
+        body = (await client.get(url)).content
+        players = json.loads(body)["data"]
+        rng = random.Random(7)
+        # 混合查询：完整 ID、名称片段与不存在的名称
+        queries = []
+        for _ in range(args.queries):
+            player = rng.choice(players)
+            kind = rng.random()
+            if kind < 0.4:
+                queries.append(player["name"])
+            elif kind < 0.9:
+                queries.append(player["name"].split("#")[0][2:9])
+            else:
+                queries.append(f"nobody{rng.randint(0, 99999)}")
+
+        network = []
+        for query in queries[:args.network_queries]:
+            start = time.perf_counter()
+            response = await client.get(url)
+            _scan(json.loads(response.content)["data"], query)
+            network.append(time.perf_counter() - start)
+
+        cached = []
+        for query in queries:
+            start = time.perf_counter()
+            _scan(json.loads(body)["data"], query)
+            cached.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        indexer = BoardIndexer()
+        indexer.build_index(players)
+        build_time = time.perf_counter() - start
+
+        indexed = []
+        for query in queries:
+            start = time.perf_counter()
+            result = indexer.find(query)
+            indexed.append(time.perf_counter() - start)
+            assert result is _scan(players, query)
+    finally:
+        await mock.stop()
+        await http_clients.close_all()
+
+    print(f"榜单玩家数: {args.board_size}, 查询次数: {args.queries}, 模拟上游延迟: {args.latency:.0f}ms")
+    print(f"{'查询方式':<20}{'p50(ms)':>10}{'p95(ms)':>10}{'上游请求':>10}")
+    for label, samples, upstream in (
+        ("旧实现 (未命中缓存)", network, len(network)),
+        ("旧实现 (命中缓存)", cached, 0),
+        ("快照索引", indexed, 0),
+    ):
+        p50, p95 = _summary(samples)
+        print(f"{label:<20}{p50:>10.3f}{p95:>10.3f}{upstream:>10}")
+    print(f"索引构建耗时 (每次同步一次): {build_time * 1000:.1f}ms")
+    print(f"命中缓存时加速比 (p50): {_summary(cached)[0] / max(_summary(indexed)[0], 1e-6):.0f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,402 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+上游 API 离线模拟器 (record / replay)
+
+在本地提供机器人用到的所有上游端点，用于可复现的性能测试与集成测试:
+    /v1/leaderboard/{season}[/{platform}]          排位赛季榜
+    /v1/leaderboard/{season}worldtour/{platform}   世界巡回赛
+    /v1/leaderboard/{season}quickcash/{platform}   快速提现
+    /v1/leaderboard/{season}teamdeathmatch/{platform}
+    /v1/leaderboard/{season}powershift/{platform}
+    /v1/leaderboard/{season}head2head/{platform}
+    /v1/clubs                                      俱乐部
+    /player-history?id=&range=                     玩家历史走势 (LeaderboardCore)
+
+数据来源优先级: fixtures 目录中的录制文件 > 按 board_size 确定性生成的合成数据。
+支持可配置的延迟/长尾、错误注入、Last-Modified/304 行为；record 模式会把真实响应写入 fixtures。
+
+命令行用法:
+    python tools/mock_upstream.py --port 8900 --latency 30 --jitter 20 --board-size 10000
+    python tools/mock_upstream.py --record --fixtures tests/fixtures/upstream
+
+在测试/基准中使用:
+    mock = MockUpstream(MockConfig(board_size=500))
+    base_url = await mock.start()
+    api = BaseAPI(base_url=base_url)
+    ...
+    await mock.stop()
+
+LeaderboardCore 的历史走势地址不走 BaseAPI，测试时将其 base_url 属性指向模拟器即可。
+
+运行时可通过 POST /__mock__/config 修改配置，GET /__mock__/stats 查看请求统计。
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+from dataclasses import dataclass, asdict, field
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import orjson as json
+from aiohttp import web
+
+# 添加项目根目录到sys.path
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if root_dir not in sys.path:
+    sys.path.insert(0, root_dir)
+
+HISTORY_PATHS = (
+    "/player-history",
+    "/app/the-finals-leaderboard-tracker/api/vaiiya/player-history",
+)
+DEFAULT_UPSTREAM = "https://api.the-finals-leaderboard.com"
+DEFAULT_HISTORY_UPSTREAM = "https://www.davg25.com/app/the-finals-leaderboard-tracker/api/vaiiya"
+LEAGUES = ["Bronze", "Silver", "Gold", "Platinum", "Diamond"]
+
+
+@dataclass
+class MockConfig:
+    """模拟器配置，运行时可修改"""
+    board_size: int = 10000          # 每个榜单的玩家数
+    latency_ms: float = 0.0          # 基础延迟
+    jitter_ms: float = 0.0           # 在基础延迟上叠加的均匀随机抖动
+    slow_rate: float = 0.0           # 长尾请求比例
+    slow_latency_ms: float = 2000.0  # 长尾请求的延迟
+    error_rate: float = 0.0          # 错误注入比例
+    error_status: int = 503          # 注入错误时返回的状态码
+    last_modified: bool = True       # 是否返回 Last-Modified 并支持 If-Modified-Since/304
+    seed: int = 42                   # 合成数据随机种子
+    fixtures_dir: Optional[str] = None
+    record: bool = False
+    upstream: str = DEFAULT_UPSTREAM
+    history_upstream: str = DEFAULT_HISTORY_UPSTREAM
+
+
+@dataclass
+class _Board:
+    body: bytes
+    rows: List[Dict[str, Any]] = field(default_factory=list)
+    last_modified: datetime = field(default_factory=lambda: datetime.now(timezone.utc).replace(microsecond=0))
+
+
+class MockUpstream:
+    """可嵌入测试与基准的上游模拟服务器"""
+
+    def __init__(self, config: Optional[MockConfig] = None):
+        self.config = config or MockConfig()
+        self._boards: Dict[str, _Board] = {}
+        self._runner: Optional[web.AppRunner] = None
+        self.base_url: Optional[str] = None
+        self.stats: Dict[str, Any] = {"requests": 0, "not_modified": 0, "errors_injected": 0, "by_path": {}}
+
+        self.app = web.Application()
+        self.app.router.add_get("/v1/leaderboard/{board}", self._handle_leaderboard)
+        self.app.router.add_get("/v1/leaderboard/{board}/{platform}", self._handle_leaderboard)
+        self.app.router.add_get("/v1/clubs", self._handle_clubs)
+        for path in HISTORY_PATHS:
+            self.app.router.add_get(path, self._handle_history)
+        self.app.router.add_get("/__mock__/stats", self._handle_stats)
+        self.app.router.add_post("/__mock__/config", self._handle_config)
+
+    # ------------------------------------------------------------------
+    # 生命周期
+    # ------------------------------------------------------------------
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """启动服务器，返回可直接传给 BaseAPI 的 base_url"""
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://{host}:{bound_port}"
+        return self.base_url
+
+    async def stop(self) -> None:
+        """停止服务器"""
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def touch(self, key: Optional[str] = None) -> None:
+        """使榜单数据失效：下次请求重新生成并更新 Last-Modified（key 为空时全部失效）"""
+        if key is None:
+            self._boards.clear()
+        else:
+            self._boards.pop(key, None)
+
+    # ------------------------------------------------------------------
+    # 公共行为: 延迟、错误注入、条件请求
+    # ------------------------------------------------------------------
+    async def _simulate(self, request: web.Request) -> Optional[web.Response]:
+        cfg = self.config
+        self.stats["requests"] += 1
+        by_path = self.stats["by_path"]
+        by_path[request.path] = by_path.get(request.path, 0) + 1
+
+        delay = cfg.latency_ms + random.uniform(0, cfg.jitter_ms)
+        if cfg.slow_rate and random.random() < cfg.slow_rate:
+            delay = cfg.slow_latency_ms
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+
+        if cfg.error_rate and random.random() < cfg.error_rate:
+            self.stats["errors_injected"] += 1
+            return web.json_response({"error": "injected"}, status=cfg.error_status)
+        return None
+
+    def _respond(self, request: web.Request, body: bytes, last_modified: datetime) -> web.Response:
+        headers = {}
+        if self.config.last_modified:
+            headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+            since = request.headers.get("If-Modified-Since")
+            if since:
+                try:
+                    if last_modified <= parsedate_to_datetime(since):
+                        self.stats["not_modified"] += 1
+                        return web.Response(status=304, headers=headers)
+                except (TypeError, ValueError):
+                    pass
+        return web.Response(body=body, content_type="application/json", headers=headers)
+
+    # ------------------------------------------------------------------
+    # fixtures 与录制
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _fixture_name(path: str, query: Dict[str, str]) -> str:
+        name = path.strip("/").replace("/", "_")
+        if query:
+            name += "__" + "_".join(f"{k}-{v}" for k, v in sorted(query.items()))
+        return "".join(c if c.isalnum() or c in "-_#." else "_" for c in name) + ".json"
+
+    def _load_fixture(self, name: str) -> Optional[bytes]:
+        if not self.config.fixtures_dir:
+            return None
+        path = os.path.join(self.config.fixtures_dir, name)
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                return f.read()
+        return None
+
+    async def _record(self, upstream_url: str, params: Dict[str, str], name: str) -> Optional[bytes]:
+        from utils.http_client import http_clients
+
+        response = await http_clients.get_client(upstream_url).get(upstream_url, params=params, timeout=60)
+        if response.status_code != 200:
+            return None
+        if self.config.fixtures_dir:
+            os.makedirs(self.config.fixtures_dir, exist_ok=True)
+            with open(os.path.join(self.config.fixtures_dir, name), "wb") as f:
+                f.write(response.content)
+            print(f"[mock_upstream] 已录制 {upstream_url} -> {name} ({len(response.content)} bytes)")
+        return response.content
+
+    async def _get_board(self, key: str, path: str, query: Dict[str, str], upstream_url: str, generate) -> _Board:
+        board = self._boards.get(key)
+        if board is not None:
+            return board
+
+        name = self._fixture_name(path, query)
+        body = None
+        if self.config.record:
+            body = await self._record(upstream_url, query, name)
+        if body is None:
+            body = self._load_fixture(name)
+        if body is None:
+            body = json.dumps(generate())
+
+        parsed = json.loads(body)
+        rows = parsed.get("data", []) if isinstance(parsed, dict) else parsed
+        board = _Board(body=body, rows=rows if isinstance(rows, list) else [])
+        self._boards[key] = board
+        return board
+
+    # ------------------------------------------------------------------
+    # 合成数据
+    # ------------------------------------------------------------------
+    def _player_name(self, i: int) -> str:
+        return f"Player{i:05d}#{(i * 7919) % 10000:04d}"
+
+    def _platform_names(self, rng: random.Random, name: str) -> Dict[str, str]:
+        base = name.split("#")[0]
+        return {
+            "steamName": base if rng.random() < 0.7 else "",
+            "psnName": base if rng.random() < 0.2 else "",
+            "xboxName": base if rng.random() < 0.1 else "",
+        }
+
+    def _generate_board(self, board: str) -> Dict[str, Any]:
+        rng = random.Random(f"{self.config.seed}:{board}")
+        rows = []
+        for i in range(1, self.config.board_size + 1):
+            name = self._player_name(i)
+            row = {
+                "rank": i,
+                "change": rng.randint(-50, 50),
+                "name": name,
+                "clubTag": f"C{rng.randint(0, max(self.config.board_size // 20, 1)):03d}" if rng.random() < 0.6 else "",
+                **self._platform_names(rng, name),
+            }
+            if board.endswith("worldtour"):
+                row["cashouts"] = max(10_000_000 - i * 997, 0)
+            elif board.endswith(("quickcash", "teamdeathmatch", "powershift", "head2head")):
+                row["points"] = max(500_000 - i * 37, 0)
+            else:
+                score = max(60_000 - i * 3, 0)
+                league_index = min(i * len(LEAGUES) // max(self.config.board_size, 1), len(LEAGUES) - 1)
+                league = LEAGUES[len(LEAGUES) - 1 - league_index]
+                row.update({
+                    "rankScore": score,
+                    "leagueNumber": league_index,
+                    "league": f"{league} {rng.randint(1, 4)}",
+                })
+            rows.append(row)
+        return {"meta": {"leaderboardVersion": board}, "count": len(rows), "data": rows}
+
+    def _generate_clubs(self) -> List[Dict[str, Any]]:
+        rng = random.Random(f"{self.config.seed}:clubs")
+        clubs = []
+        for c in range(max(self.config.board_size // 20, 1)):
+            members = [{"name": self._player_name(c * 5 + m + 1)} for m in range(rng.randint(1, 5))]
+            clubs.append({
+                "clubTag": f"C{c:03d}",
+                "members": members,
+                "leaderboards": [
+                    {"leaderboard": "s6", "rank": c + 1, "totalValue": rng.randint(1000, 500_000)},
+                ],
+            })
+        return clubs
+
+    def _generate_history(self, player_id: str, time_range: int) -> List[Dict[str, Any]]:
+        rng = random.Random(f"{self.config.seed}:history:{player_id}")
+        now = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+        hours = max(min(time_range // 3600, 24 * 30), 1)
+        points, rank = rng.randint(20_000, 50_000), rng.randint(1, self.config.board_size)
+        history = []
+        for h in range(hours, 0, -1):
+            points = max(points + rng.randint(-300, 350), 0)
+            rank = max(rank + rng.randint(-20, 20), 1)
+            history.append({
+                "timestamp": (now - timedelta(hours=h)).isoformat().replace("+00:00", "Z"),
+                "points": points,
+                "rank": rank,
+            })
+        return history
+
+    # ------------------------------------------------------------------
+    # 路由
+    # ------------------------------------------------------------------
+    async def _handle_leaderboard(self, request: web.Request) -> web.Response:
+        error = await self._simulate(request)
+        if error is not None:
+            return error
+
+        board_id = request.match_info["board"]
+        path = request.path
+        board = await self._get_board(
+            path, path, {}, f"{self.config.upstream}{path}", lambda: self._generate_board(board_id)
+        )
+
+        name = request.query.get("name")
+        if not name:
+            return self._respond(request, board.body, board.last_modified)
+
+        # name 参数按不区分大小写的包含关系过滤
+        needle = name.lower()
+        rows = [row for row in board.rows if needle in row.get("name", "").lower()]
+        body = json.dumps({"count": len(rows), "data": rows})
+        return self._respond(request, body, board.last_modified)
+
+    async def _handle_clubs(self, request: web.Request) -> web.Response:
+        error = await self._simulate(request)
+        if error is not None:
+            return error
+        board = await self._get_board(
+            "clubs", request.path, {}, f"{self.config.upstream}{request.path}", self._generate_clubs
+        )
+        return self._respond(request, board.body, board.last_modified)
+
+    async def _handle_history(self, request: web.Request) -> web.Response:
+        error = await self._simulate(request)
+        if error is not None:
+            return error
+        player_id = request.query.get("id", "")
+        time_range = int(request.query.get("range", 604800))
+        query = {"id": player_id, "range": str(time_range)}
+        board = await self._get_board(
+            f"history:{player_id}:{time_range}", "/player-history", query,
+            f"{self.config.history_upstream}/player-history",
+            lambda: self._generate_history(player_id, time_range),
+        )
+        return self._respond(request, board.body, board.last_modified)
+
+    async def _handle_stats(self, request: web.Request) -> web.Response:
+        return web.json_response({**self.stats, "config": asdict(self.config)})
+
+    async def _handle_config(self, request: web.Request) -> web.Response:
+        updates = await request.json()
+        for key, value in updates.items():
+            if hasattr(self.config, key):
+                setattr(self.config, key, value)
+        if "board_size" in updates or "seed" in updates:
+            self.touch()
+        return web.json_response(asdict(self.config))
+
+
+def _parse_args() -> Tuple[argparse.Namespace, MockConfig]:
+    parser = argparse.ArgumentParser(description="上游 API 离线模拟器")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--board-size", type=int, default=10000, help="每个榜单的玩家数")
+    parser.add_argument("--latency", type=float, default=0.0, help="基础延迟(毫秒)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="随机抖动(毫秒)")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="长尾请求比例")
+    parser.add_argument("--slow-latency", type=float, default=2000.0, help="长尾请求延迟(毫秒)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="错误注入比例")
+    parser.add_argument("--error-status", type=int, default=503, help="注入错误的状态码")
+    parser.add_argument("--no-last-modified", action="store_true", help="不返回 Last-Modified，禁用 304")
+    parser.add_argument("--seed", type=int, default=42, help="合成数据随机种子")
+    parser.add_argument("--fixtures", default=None, help="fixtures 目录 (回放/录制)")
+    parser.add_argument("--record", action="store_true", help="录制模式：转发到真实上游并保存响应")
+    parser.add_argument("--upstream", default=DEFAULT_UPSTREAM, help="录制时使用的排行榜上游")
+    parser.add_argument("--history-upstream", default=DEFAULT_HISTORY_UPSTREAM, help="录制时使用的历史走势上游")
+    args = parser.parse_args()
+
+    config = MockConfig(
+        board_size=args.board_size,
+        latency_ms=args.latency,
+        jitter_ms=args.jitter,
+        slow_rate=args.slow_rate,
+        slow_latency_ms=args.slow_latency,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        last_modified=not args.no_last_modified,
+        seed=args.seed,
+        fixtures_dir=args.fixtures,
+        record=args.record,
+        upstream=args.upstream.rstrip("/"),
+        history_upstream=args.history_upstream.rstrip("/"),
+    )
+    return args, config
+
+
+async def main() -> None:
+    args, config = _parse_args()
+    mock = MockUpstream(config)
+    base_url = await mock.start(args.host, args.port)
+    print(f"[mock_upstream] 已启动: {base_url} (board_size={config.board_size}, record={config.record})")
+    print(f"[mock_upstream] 将 api.standard.base_url 指向 {base_url} 即可让机器人使用模拟上游")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await mock.stop()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
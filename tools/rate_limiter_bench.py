@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+限流器吞吐基准测试
+
+对比旧的全局串行限流（单锁 + 0.1s 最小间隔）与按主机划分的令牌桶，
+在多个上游主机并发请求时的总吞吐量。上游延迟通过 asyncio.sleep 模拟。
+
+用法:
+    python tools/rate_limiter_bench.py --hosts 3 --requests 60 --latency 0.05
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+# 添加项目根目录到sys.path
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if root_dir not in sys.path:
+    sys.path.insert(0, root_dir)
+
+from utils.rate_limiter import HostRateLimiter
+
+
+class GlobalIntervalLimiter:
+    """旧实现：所有主机共用一把锁，两次请求间至少间隔 interval 秒"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._last = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, url: str) -> None:
+        async with self._lock:
+            now = time.time()
+            if now - self._last < self.interval:
+                await asyncio.sleep(self.interval - (now - self._last))
+            self._last = time.time()
+
+
+async def _run(limiter, urls, latency: float, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(url: str):
+        await limiter.acquire(url)
+        async with semaphore:
+            await asyncio.sleep(latency)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(u) for u in urls))
+    return time.perf_counter() - start
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="限流器吞吐基准测试")
+    parser.add_argument("--hosts", type=int, default=3, help="上游主机数量")
+    parser.add_argument("--requests", type=int, default=60, help="每个主机的请求数")
+    parser.add_argument("--latency", type=float, default=0.05, help="模拟的上游延迟(秒)")
+    parser.add_argument("--concurrency", type=int, default=50, help="最大并发请求数")
+    parser.add_argument("--rate", type=float, default=10, help="令牌桶每秒补充的令牌数")
+    parser.add_argument("--burst", type=int, default=20, help="令牌桶容量")
+    args = parser.parse_args()
+
+    urls = [
+        f"https://host{h}.example.com/v1/item/{i}"
+        for i in range(args.requests)
+        for h in range(args.hosts)
+    ]
+    total = len(urls)
+
+    legacy = await _run(GlobalIntervalLimiter(0.1), urls, args.latency, args.concurrency)
+    per_host = HostRateLimiter(rate=args.rate, burst=args.burst)
+    bucket = await _run(per_host, urls, args.latency, args.concurrency)
+
+    print(f"主机数: {args.hosts}, 总请求数: {total}, 模拟延迟: {args.latency * 1000:.0f}ms")
+    print(f"{'限流方式':<20}{'耗时(s)':>10}{'吞吐(req/s)':>14}")
+    print(f"{'全局锁 0.1s 间隔':<20}{legacy:>10.2f}{total / legacy:>14.1f}")
+    print(f"{'按主机令牌桶':<20}{bucket:>10.2f}{total / bucket:>14.1f}")
+    print(f"加速比: {legacy / bucket:.2f}x")
+    for host, stats in per_host.get_stats().items():
+        print(f"  {host}: acquired={stats['acquired']} throttled={stats['throttled']} wait={stats['total_wait_s']}s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+卡片渲染方式基准测试
+
+在真实浏览器中连续渲染同一模板 (每次数据不同，不使用渲染缓存)，对比两种渲染方式：
+* set_content：每次把完整 HTML 交给页面重新解析、应用样式并加载字体与图片
+* 数据注入：页面已加载该模板时，只把新的 body 原地合并到 DOM (core/image_generator.py)
+输出每种方式的单次总耗时 (中位数 / p95) 与各步骤耗时的中位数。需要已安装 Playwright Chromium。
+
+用法:
+    python tools/render_mode_bench.py --template world_tour.html --renders 50
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+from collections import defaultdict
+
+# 添加项目根目录到sys.path
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if root_dir not in sys.path:
+    sys.path.insert(0, root_dir)
+
+import core.image_generator as image_generator_module
+from core.image_generator import ImageGenerator, PerfLogger
+from utils.browser import browser_manager
+
+TEMPLATE_DIR = os.path.join(root_dir, "resources", "templates")
+
+# 每个模板的示例数据，数值字段在每次渲染时随机变化
+SAMPLE_DATA = {
+    "world_tour.html": lambda rng: {
+        "player_name": f"Player{rng.randint(1, 9999)}", "player_tag": f"{rng.randint(0, 9999):04d}",
+        "club_tag": rng.choice(["", "ABC", "FIN"]), "platform": "Steam", "rank": rng.randint(1, 10000),
+        "rank_change": rng.choice(["", "↑3", "↓5"]), "rank_change_class": rng.choice(["", "up", "down"]),
+        "cashouts": f"{rng.randint(0, 5_000_000):,}", "season_name": "S6", "season_bg": "s6.jpg",
+    },
+    "club_info.html": lambda rng: {
+        "club_tag": rng.choice(["ABC", "FIN", "XYZ"]), "member_count": 8,
+        "members": [
+            {"class": "", "index": i + 1, "name": f"Member{rng.randint(1, 999)}#{i:04d}",
+             "score_display": f"{rng.randint(0, 50000):,}"}
+            for i in range(8)
+        ],
+        "rankings": [{"mode": "Quick Cash", "rank": rng.randint(1, 500), "score": f"{rng.randint(0, 9999):,}"}],
+    },
+}
+
+_steps = defaultdict(list)
+_current_mode = None
+
+
+class _RecordingPerfLogger(PerfLogger):
+    """在输出性能日志的同时按当前渲染方式记录各步骤耗时"""
+
+    def flush_total(self, extra=None):
+        for step in self.steps:
+            _steps[(_current_mode, step["step"])].append(step["latency_ms"])
+        return super().flush_total(extra)
+
+
+async def _run(generator, template, renders, data_injection, rng):
+    timings = []
+    for _ in range(renders):
+        data = SAMPLE_DATA[template](rng)
+        start = time.perf_counter()
+        image = await generator.generate_image(
+            data, template, use_cache=False, data_injection=data_injection,
+        )
+        timings.append((time.perf_counter() - start) * 1000)
+        if not image:
+            raise RuntimeError("渲染失败")
+    return timings
+
+
+async def main() -> None:
+    global _current_mode
+    parser = argparse.ArgumentParser(description="卡片渲染方式基准测试")
+    parser.add_argument("--template", default="world_tour.html", choices=sorted(SAMPLE_DATA), help="模板文件")
+    parser.add_argument("--renders", type=int, default=50, help="每种方式的渲染次数")
+    args = parser.parse_args()
+
+    image_generator_module.PerfLogger = _RecordingPerfLogger
+    generator = ImageGenerator(TEMPLATE_DIR)
+    rng = random.Random(7)
+    results = {}
+    try:
+        await browser_manager.initialize()
+        for label, data_injection in (("set_content", False), ("数据注入", True)):
+            _current_mode = label
+            # 首次渲染包含页面导航与资源加载，不计入结果
+            await _run(generator, args.template, 2, data_injection, rng)
+            for key in [k for k in _steps if k[0] == label]:
+                del _steps[key]
+            results[label] = await _run(generator, args.template, args.renders, data_injection, rng)
+    finally:
+        await browser_manager.cleanup()
+
+    print(f"模板: {args.template}, 每种方式渲染 {args.renders} 次")
+    print(f"{'渲染方式':<14}{'中位数(ms)':>12}{'p95(ms)':>12}")
+    for label, timings in results.items():
+        timings.sort()
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        print(f"{label:<14}{statistics.median(timings):>12.1f}{p95:>12.1f}")
+    print("\n各步骤耗时中位数 (ms):")
+    for (label, step), values in sorted(_steps.items()):
+        if values:
+            print(f"  {label:<14}{step:<32}{statistics.median(values):>10.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+世界巡回赛 Redis 存储基准测试
+
+对比旧的存储方式（整表 JSON + 每个玩家一个 SET，逐条 await）与模式榜单引擎 (core/mode_board.py)
+的写入方式：按赛季一个只保留所需字段的 Hash，首次全量写入，之后只写入变化的玩家，均通过单次 pipeline 完成。
+输出单次刷新的耗时、Redis 往返次数、写入字段数与内存占用 (MEMORY USAGE)。
+使用配置文件中的 Redis，测试键位于 wtbench 前缀下，结束后自动删除。
+
+用法:
+    python tools/world_tour_storage_bench.py --players 10000 --rounds 3 --churn 0.05
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+import orjson as json
+from redis.exceptions import ResponseError
+
+# 添加项目根目录到sys.path
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if root_dir not in sys.path:
+    sys.path.insert(0, root_dir)
+
+from tools.mock_upstream import MockUpstream, MockConfig
+from utils.redis_manager import redis_manager
+from core.mode_board import ModeBoard, compact_player
+from core.world_tour import WorldTourAPI
+
+PREFIX = "wtbench"
+
+
+async def _legacy_refresh(players, expire):
+    """旧实现：整表 JSON 一次 SET，再逐个玩家 SET"""
+    await redis_manager.set(f"{PREFIX}:legacy:leaderboard", players, expire=expire)
+    for player in players:
+        player_name = player.get("name", "").lower()
+        if player_name:
+            await redis_manager.set(f"{PREFIX}:legacy:player:{player_name}", player, expire=expire)
+    return len(players) + 1, len(players) + 1
+
+
+async def _board_refresh(board: ModeBoard, players, expire):
+    """引擎实现：有上次写入内容时增量写入，否则全量写入临时键后 RENAME"""
+    mapping = {
+        p["name"].lower(): json.dumps(compact_player(p, board.stored_fields)).decode()
+        for p in players if p.get("name")
+    }
+    pipeline = redis_manager._get_client().pipeline(transaction=False)
+    if board._stored is not None:
+        board.last_sync = board._queue_diff(pipeline, mapping)
+    else:
+        board.last_sync = board._queue_full_write(pipeline, mapping)
+    if expire:
+        pipeline.expire(board.redis_key_players, expire)
+    await pipeline.execute()
+    board._stored = mapping
+    return 1, board.last_sync["written"] + board.last_sync["removed"]
+
+
+def _churn(players, ratio, rng):
+    """模拟两次同步之间的榜单变化：随机一部分玩家的奖金与排名变化"""
+    for player in rng.sample(players, int(len(players) * ratio)):
+        player["cashouts"] = player.get("cashouts", 0) + rng.randint(1, 5000)
+        player["change"] = rng.randint(-50, 50)
+
+
+async def _memory_usage(client, match: str) -> int:
+    """统计匹配键的 MEMORY USAGE；不支持该命令时以 DUMP 序列化长度加键名长度估算"""
+    total = 0
+    async for key in client.scan_iter(match=match, count=1000):
+        try:
+            total += await client.memory_usage(key, samples=0) or 0
+        except ResponseError:
+            total += len(await redis_manager._get_binary_client().dump(key) or b"") + len(key)
+    return total
+
+
+async def _cleanup(client) -> None:
+    keys = [key async for key in client.scan_iter(match=f"{PREFIX}*", count=1000)]
+    for i in range(0, len(keys), 1000):
+        await client.delete(*keys[i:i + 1000])
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="世界巡回赛 Redis 存储基准测试")
+    parser.add_argument("--players", type=int, default=10000, help="榜单玩家数")
+    parser.add_argument("--rounds", type=int, default=3, help="每种方式的刷新次数 (取中位数)")
+    parser.add_argument("--churn", type=float, default=0.05, help="增量写入场景中每次变化的玩家比例")
+    parser.add_argument("--expire", type=int, default=120, help="键过期时间(秒)")
+    args = parser.parse_args()
+
+    mock = MockUpstream(MockConfig(board_size=args.players))
+    players = mock._generate_board("s6worldtour")["data"]
+    rng = random.Random(7)
+
+    await redis_manager.initialize()
+    client = redis_manager._get_client()
+    api = WorldTourAPI()
+    board = ModeBoard(
+        api.MODE, f"{PREFIX}-s6", api, api.headers, key_prefix=f"{PREFIX}-new",
+        stored_fields=api.stored_fields(),
+    )
+    try:
+        results = {}
+
+        async def measure(label, refresh, before=None):
+            timings, round_trips, writes = [], 0, 0
+            for _ in range(args.rounds):
+                if before:
+                    before()
+                start = time.perf_counter()
+                round_trips, writes = await refresh()
+                timings.append(time.perf_counter() - start)
+            timings.sort()
+            results[label] = (timings[len(timings) // 2], round_trips, writes)
+
+        await measure("旧实现 (整表 + 逐键 SET)", lambda: _legacy_refresh(players, args.expire))
+
+        def reset():
+            board._stored = None
+        await measure("引擎 (全量写入)", lambda: _board_refresh(board, players, args.expire), reset)
+        await measure(
+            f"引擎 (增量写入, {args.churn:.0%} 变化)", lambda: _board_refresh(board, players, args.expire),
+            lambda: _churn(players, args.churn, rng),
+        )
+
+        legacy_memory = await _memory_usage(client, f"{PREFIX}:legacy:*")
+        board_memory = await _memory_usage(client, f"{PREFIX}-new:*")
+    finally:
+        await _cleanup(client)
+        await redis_manager.close()
+
+    print(f"玩家数: {args.players}, 刷新次数: {args.rounds}")
+    print(f"{'存储方式':<28}{'刷新耗时(ms)':>14}{'Redis往返':>12}{'写入条数':>10}")
+    for label, (elapsed, round_trips, writes) in results.items():
+        print(f"{label:<28}{elapsed * 1000:>14.1f}{round_trips:>12}{writes:>10}")
+    print(f"内存占用: 旧实现 {legacy_memory / 1024:.1f}KB, 引擎 {board_memory / 1024:.1f}KB")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
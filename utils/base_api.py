@@ -2,53 +2,85 @@ import httpx
 import asyncio
 import time
 import pickle
-from typing import Any, AsyncGenerator, Dict, Optional, Union, Tuple, ClassVar, List
+from typing import Any, AsyncGenerator, Callable, Dict, Optional, Union, Tuple, ClassVar, List
 from utils.logger import bot_logger
 from utils.config import settings
 from functools import wraps
 from contextlib import asynccontextmanager
 from datetime import datetime
-import os
+from fnmatch import fnmatch
 from utils.redis_manager import redis_manager
+from utils.rate_limiter import host_rate_limiter, parse_retry_after
+from utils.cache_codec import cache_codec
+from utils.circuit_breaker import circuit_breakers, CircuitBreaker, STATE_CLOSED
+from utils.hedging import hedge_policy
+from utils.memory_cache import LRUCache
+from utils.http_client import get_proxy_url, http_clients
+from utils.metrics import upstream_metrics
 
-def async_retry(max_retries: int = 3, delay: float = 1.0):
-    """异步重试装饰器"""
+def async_retry(max_retries: int = 3, delay: float = 1.0, on_retry: Optional[Callable] = None):
+    """异步重试装饰器
+
+    on_retry(args, kwargs) 在每次重试前调用，用于统计重试次数；
+    调用时传入 _no_retry=True 则只执行一次 (该参数不会传给被装饰的函数)
+    """
     def decorator(func):
         @wraps(func)
         async def wrapper(*args, **kwargs):
+            attempts = 1 if kwargs.pop("_no_retry", False) else max_retries
             last_exception = None
-            for attempt in range(max_retries):
+            for attempt in range(attempts):
                 try:
                     return await func(*args, **kwargs)
                 except Exception as e:
                     last_exception = e
-                    if attempt < max_retries - 1:
+                    if attempt < attempts - 1:
                         wait_time = delay * (2 ** attempt)  # 指数退避
                         bot_logger.warning(f"请求失败，{wait_time}秒后重试: {str(e)}", exc_info=True)
+                        if on_retry is not None:
+                            on_retry(args, kwargs)
                         await asyncio.sleep(wait_time)
             raise last_exception
         return wrapper
     return decorator
 
+def _count_retry(args: tuple, kwargs: dict) -> None:
+    """记录 _send_request(self, method, endpoint, ...) 的重试"""
+    endpoint = kwargs.get("endpoint", args[2] if len(args) > 2 else "")
+    upstream_metrics.observe_retry(endpoint)
+
 class BaseAPI:
     """API基类，提供通用的HTTP请求处理"""
     
-    # 全局共享的HTTP客户端池
-    _client_pool: ClassVar[List[httpx.AsyncClient]] = []
-    _pool_size: ClassVar[int] = 5  # 连接池大小
-    _client_lock: ClassVar[asyncio.Lock] = asyncio.Lock()
-    _pool_semaphore: ClassVar[asyncio.Semaphore] = asyncio.Semaphore(_pool_size)
-    
     # 请求限制
     _request_semaphore: ClassVar[asyncio.Semaphore] = asyncio.Semaphore(50)  # 最大并发请求数
-    _rate_limit: ClassVar[float] = 0.1  # 请求间隔(秒)
-    _last_request_time: ClassVar[float] = 0
-    _rate_limit_lock: ClassVar[asyncio.Lock] = asyncio.Lock()
+    # 请求频率由 utils.rate_limiter 中按主机划分的令牌桶控制 (api.rate_limit)
     
     # API 缓存的 TTL (秒)
     _cache_ttl: ClassVar[int] = 60
     _cache_ttl_long: ClassVar[int] = 86400 # 24 hours for conditional caching
     
+    # stale-while-revalidate 缓存窗口 (秒)：fresh 内直接返回，stale 内返回旧数据并在后台刷新
+    # 按顺序匹配端点 (fnmatch 模式)，未匹配的端点使用默认窗口
+    _cache_policies: ClassVar[List[Tuple[str, int, int]]] = [
+        ("/v1/leaderboard/*", 60, 600),
+        ("/v1/clubs*", 60, 600),
+    ]
+    _default_cache_policy: ClassVar[Tuple[int, int]] = (_cache_ttl, 120)
+    _revalidation_tasks: ClassVar[Dict[str, asyncio.Task]] = {}
+    
+    # 进程内 L0 缓存：key 同 api_cache:*，值为 (解压后的内容, 写入时间, Last-Modified)，过期时间对齐 fresh + stale 窗口
+    _l0_cache: ClassVar[LRUCache] = LRUCache(
+        max_entries=settings.API_L0_CACHE_MAX_ENTRIES,
+        max_bytes=settings.API_L0_CACHE_MAX_BYTES,
+        name="api_l0",
+    )
+    _redis_cache_stats: ClassVar[Dict[str, int]] = {"hits": 0, "misses": 0, "decode_errors": 0}
+    
+    # 相同 GET 请求的合并 (single-flight)
+    _inflight_requests: ClassVar[Dict[Tuple, asyncio.Task]] = {}
+    _singleflight_stats: ClassVar[Dict[str, int]] = {"issued": 0, "coalesced": 0}
+    
     def __init__(self, base_url: str = "", timeout: int = 5):
         # 兼容旧的 base_url 参数，但优先使用配置文件中的设置
         self.standard_url = (base_url or settings.api.standard.base_url).rstrip('/')
@@ -60,82 +92,53 @@ class BaseAPI:
     
     @staticmethod
     def _get_proxy_url():
-        proxy_url = os.getenv('HTTP_PROXY') or os.getenv('HTTPS_PROXY')
-        if not proxy_url:
-            return None
-        return proxy_url
+        return get_proxy_url()
     
     @classmethod
     @asynccontextmanager
-    async def get_client(cls) -> AsyncGenerator[httpx.AsyncClient, None]:
-        """从连接池获取客户端"""
-        async with cls._pool_semaphore:
-            async with cls._client_lock:
-                if not cls._client_pool:
-                    # 获取代理配置
-                    proxy_url = cls._get_proxy_url()
-                    
-                    # 创建基本客户端配置
-                    client_config = {
-                        "timeout": 30,
-                        "limits": httpx.Limits(
-                            max_keepalive_connections=20,
-                            max_connections=100,
-                            keepalive_expiry=30
-                        ),
-                        "verify": False,  # 禁用SSL验证,避免代理证书问题
-                        "follow_redirects": True  # 启用重定向
-                    }
-                    
-                    # 防御性处理代理配置
-                    if proxy_url:
-                        try:
-                            # 新版本httpx的代理配置方式
-                            client_config["proxy"] = proxy_url
-                            client = httpx.AsyncClient(**client_config)
-                        except TypeError:
-                            try:
-                                # 旧版本httpx的代理配置方式
-                                client_config["proxies"] = proxy_url
-                                client = httpx.AsyncClient(**client_config)
-                            except Exception as e:
-                                bot_logger.error(f"代理配置失败: {e}")
-                                # 如果代理配置都失败，尝试不使用代理
-                                client_config.pop("proxy", None)
-                                client_config.pop("proxies", None)
-                                client = httpx.AsyncClient(**client_config)
-                    else:
-                        client = httpx.AsyncClient(**client_config)
-                    
-                    cls._client_pool.append(client)
-                else:
-                    client = cls._client_pool.pop()
-            
-            try:
-                yield client
-            finally:
-                if not client.is_closed:
-                    async with cls._client_lock:
-                        cls._client_pool.append(client)
+    async def get_client(cls, url: str) -> AsyncGenerator[httpx.AsyncClient, None]:
+        """从进程级注册表获取目标主机的共享客户端"""
+        # 禁用SSL验证,避免代理证书问题
+        yield http_clients.get_client(url, verify=False)
     
     @classmethod
     async def close_all_clients(cls):
         """关闭所有客户端连接"""
-        async with cls._client_lock:
-            while cls._client_pool:
-                client = cls._client_pool.pop()
-                await client.aclose()
-            bot_logger.debug("所有HTTP客户端已关闭")
+        await http_clients.close_all()
+    
+    @classmethod
+    def get_connection_stats(cls) -> Dict[str, Dict[str, Any]]:
+        """返回各上游主机的连接复用统计"""
+        return http_clients.get_stats()
     
     @classmethod
-    async def _enforce_rate_limit(cls):
-        """强制请求频率限制"""
-        async with cls._rate_limit_lock:
-            current_time = time.time()
-            time_since_last = current_time - cls._last_request_time
-            if time_since_last < cls._rate_limit:
-                await asyncio.sleep(cls._rate_limit - time_since_last)
-            cls._last_request_time = time.time()
+    async def _enforce_rate_limit(cls, url: str):
+        """按目标主机的令牌桶限制请求频率，不同主机之间互不阻塞"""
+        waited = await host_rate_limiter.acquire(url)
+        if waited > 0.001:
+            bot_logger.debug(f"[BaseAPI] 限流等待 {waited:.3f}s: {host_rate_limiter.get_host(url)}")
+
+    @classmethod
+    def get_cache_layer_stats(cls) -> Dict[str, Dict[str, Any]]:
+        """返回 L0 (进程内) 与 Redis 两层缓存的命中统计"""
+        redis_total = cls._redis_cache_stats["hits"] + cls._redis_cache_stats["misses"]
+        return {
+            "l0": cls._l0_cache.get_stats(),
+            "redis": {
+                **cls._redis_cache_stats,
+                "hit_ratio": round(cls._redis_cache_stats["hits"] / redis_total, 4) if redis_total else 0.0,
+            },
+        }
+
+    @classmethod
+    def get_cache_compression_stats(cls) -> Dict[str, float]:
+        """返回缓存压缩率与压缩/解压耗时统计"""
+        return cache_codec.get_stats()
+
+    @classmethod
+    def get_rate_limit_stats(cls) -> Dict[str, Dict[str, float]]:
+        """返回各主机令牌桶的统计信息"""
+        return host_rate_limiter.get_stats()
     
     @classmethod
     def get_last_modified_cache_key(cls, endpoint: str, params: Optional[Dict] = None) -> str:
@@ -146,7 +149,29 @@ class BaseAPI:
             key += ":" + ":".join(f"{k}={v}" for k, v in sorted_params)
         return key
 
-    @async_retry(max_retries=3)
+    @classmethod
+    def _get_inflight_key(
+        cls, method: str, url: str, params: Optional[Dict], use_cache: bool, allow_stale: bool = True
+    ) -> Tuple:
+        """生成在途请求的合并键"""
+        sorted_params = tuple(sorted((str(k), str(v)) for k, v in params.items())) if params else ()
+        return (method.upper(), url, sorted_params, use_cache, allow_stale)
+
+    @classmethod
+    def get_singleflight_stats(cls) -> Dict[str, int]:
+        """返回请求合并统计：issued 为实际发出的请求数，coalesced 为被合并的请求数"""
+        return {**cls._singleflight_stats, "inflight": len(cls._inflight_requests)}
+
+    @staticmethod
+    def _clone_response(response: httpx.Response) -> httpx.Response:
+        """为每个合并的调用方复制一份响应，避免共享同一个对象"""
+        return httpx.Response(
+            response.status_code,
+            headers=response.headers,
+            content=response.content,
+            request=response.request,
+        )
+
     async def _request(
         self,
         method: str,
@@ -157,101 +182,375 @@ class BaseAPI:
         headers: Optional[Dict] = None,
         use_cache: bool = True,
         cache_ttl: Optional[int] = None,
+        allow_stale: bool = True,
+        hedge: bool = False,
+        **kwargs
+    ) -> httpx.Response:
+        """发送HTTP请求，并发的相同 GET 请求会合并为一次上游调用"""
+        if method.upper() != "GET":
+            return await self._send_request(
+                method, endpoint, params, data, json, headers, use_cache, cache_ttl, allow_stale, **kwargs
+            )
+
+        key = self._get_inflight_key(method, self._build_url(endpoint), params, use_cache, allow_stale)
+        task = self._inflight_requests.get(key)
+        if task is None:
+            self._singleflight_stats["issued"] += 1
+            if hedge:
+                coro = self._send_hedged(method, endpoint, params, headers, use_cache, cache_ttl, allow_stale, **kwargs)
+            else:
+                coro = self._send_request(
+                    method, endpoint, params, data, json, headers, use_cache, cache_ttl, allow_stale, **kwargs
+                )
+            task = asyncio.ensure_future(coro)
+            self._inflight_requests[key] = task
+
+            def _on_done(t: asyncio.Task, key=key):
+                if self._inflight_requests.get(key) is t:
+                    del self._inflight_requests[key]
+                # 所有调用方都已取消时，避免出现 "exception was never retrieved"
+                if not t.cancelled():
+                    t.exception()
+
+            task.add_done_callback(_on_done)
+        else:
+            self._singleflight_stats["coalesced"] += 1
+            bot_logger.debug(f"[BaseAPI] 合并在途请求: {method} {key[1]}")
+
+        # shield: 单个调用方被取消时不影响共享的上游请求
+        response = await asyncio.shield(task)
+        return self._clone_response(response)
+
+    async def _send_hedged(
+        self,
+        method: str,
+        endpoint: str,
+        params: Optional[Dict],
+        headers: Optional[Dict],
+        use_cache: bool,
+        cache_ttl: Optional[int],
+        allow_stale: bool,
+        **kwargs
+    ) -> httpx.Response:
+        """对冲请求：主请求超过 p95 延迟仍未返回时向备用源补发，先成功者胜出"""
+        # 只有主源健康时才对冲；主源熔断时请求本就走备用源
+        eligible = bool(self.backup_url) and circuit_breakers.get(self.standard_url).state == STATE_CLOSED
+        # 主请求在缓存未命中、确实发往上游时才计入对冲额度 (见 _send_request)
+        primary = asyncio.ensure_future(self._send_request(
+            method, endpoint, params, None, None, headers, use_cache, cache_ttl, allow_stale,
+            _hedge_eligible=eligible, **kwargs
+        ))
+        if not eligible:
+            return await primary
+
+        done, _ = await asyncio.wait({primary}, timeout=hedge_policy.get_delay(self.standard_url))
+        if done or not hedge_policy.try_acquire():
+            return await primary
+
+        bot_logger.debug(f"[BaseAPI] 主请求超过对冲延迟，向备用源补发: {method} {endpoint}")
+        # 对冲请求本身不重试，一次补发最多只产生一次额外的上游调用
+        hedged = asyncio.ensure_future(self._send_request(
+            method, endpoint, params, None, None, headers, False, cache_ttl, allow_stale,
+            _is_hedge=True, _no_retry=True, **kwargs
+        ))
+        pending = {primary, hedged}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedged:
+                            hedge_policy.note_hedge_win()
+                        return task.result()
+            # 两个请求都失败时，以主请求的异常为准
+            return primary.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    @classmethod
+    def get_cache_policy(cls, endpoint: str, cache_ttl: Optional[int] = None) -> Tuple[int, int]:
+        """返回端点的 (fresh, stale) 缓存窗口，cache_ttl 可覆盖 fresh 窗口"""
+        fresh, stale = cls._default_cache_policy
+        for pattern, policy_fresh, policy_stale in cls._cache_policies:
+            if fnmatch(endpoint, pattern):
+                fresh, stale = policy_fresh, policy_stale
+                break
+        if cache_ttl is not None:
+            fresh = cache_ttl
+        return fresh, stale
+
+    async def _read_cache_entry(
+        self, content_cache_key: str, ts_cache_key: str, lm_cache_key: str, window: float = 0
+    ) -> Tuple[Optional[bytes], Optional[float], Optional[str]]:
+        """读取缓存内容、写入时间与 Last-Modified：先查 L0，未命中时一次往返读取 Redis
+
+        window 为 fresh + stale 窗口长度，从 Redis 读到的条目在窗口剩余时间内放入 L0。
+        """
+        entry = self._l0_cache.get(content_cache_key)
+        if entry is not None:
+            return entry
+
+        content, cached_at, last_modified = await redis_manager._get_binary_client().mget(
+            content_cache_key, ts_cache_key, lm_cache_key
+        )
+        try:
+            cached_at = float(cached_at) if cached_at else None
+        except ValueError:
+            cached_at = None
+        content = await self._decode_cached_content(content, content_cache_key, ts_cache_key, lm_cache_key)
+        entry = (content, cached_at, last_modified.decode() if last_modified and content is not None else None)
+
+        if content is None:
+            self._redis_cache_stats["misses"] += 1
+        else:
+            self._redis_cache_stats["hits"] += 1
+            if cached_at is not None:
+                self._l0_cache.set(content_cache_key, entry, window - (time.time() - cached_at), len(entry[0]))
+        return entry
+
+    async def _read_cached_content(self, content_cache_key: str) -> Optional[bytes]:
+        """读取并解压缓存的响应体"""
+        entry = self._l0_cache.get(content_cache_key)
+        if entry is not None:
+            return entry[0]
+        content = await redis_manager._get_binary_client().get(content_cache_key)
+        decoded = await self._decode_cached_content(content, content_cache_key)
+        if content is not None and decoded is None:
+            self._redis_cache_stats["misses"] += 1
+        return decoded
+
+    async def _decode_cached_content(self, content: Optional[bytes], *cache_keys: str) -> Optional[bytes]:
+        """解压缓存值；损坏或无法解压 (如缺少 zstandard) 时删除 cache_keys 并按未命中处理"""
+        try:
+            return cache_codec.decode(content)
+        except Exception as e:
+            bot_logger.warning(f"[BaseAPI] 缓存值无法解压，已删除并回源, key: {cache_keys[0]}: {type(e).__name__} - {e}")
+            self._redis_cache_stats["decode_errors"] += 1
+            try:
+                await redis_manager._get_binary_client().delete(*cache_keys)
+            except Exception as delete_error:
+                bot_logger.debug(f"[BaseAPI] 删除损坏的缓存值失败: {delete_error}")
+            return None
+
+    async def _write_cache_entry(
+        self,
+        content_cache_key: str,
+        ts_cache_key: str,
+        lm_cache_key: str,
+        content: Optional[bytes],
+        last_modified: Optional[str],
+        fresh_ttl: int,
+        stale_ttl: int,
+    ) -> None:
+        """写入缓存内容与写入时间；content 为 None 时只刷新时间戳与过期时间 (304)"""
+        # 保留时长 = fresh + stale；带 Last-Modified 的响应保留更久，以便过期后仍可用条件请求廉价地重新验证
+        retention = fresh_ttl + stale_ttl
+        if last_modified:
+            retention = max(retention, self._cache_ttl_long)
+        pipeline = redis_manager._get_binary_client().pipeline()
+        if content is not None:
+            pipeline.set(content_cache_key, cache_codec.encode(content), ex=retention)
+        else:
+            pipeline.expire(content_cache_key, retention)
+        pipeline.set(ts_cache_key, repr(time.time()), ex=retention)
+        if last_modified:
+            pipeline.set(lm_cache_key, last_modified, ex=retention)
+        else:
+            pipeline.delete(lm_cache_key)  # 确保删除旧的lm值
+        await pipeline.execute()
+
+        # 刷新 L0：新内容直接替换；304 时沿用 L0 中的内容并重置写入时间
+        if content is None:
+            entry = self._l0_cache.peek(content_cache_key)
+            content = entry[0] if entry is not None else None
+        if content is not None:
+            self._l0_cache.set(
+                content_cache_key, (content, time.time(), last_modified), fresh_ttl + stale_ttl, len(content)
+            )
+        else:
+            self._l0_cache.delete(content_cache_key)
+
+    def _schedule_revalidation(
+        self, content_cache_key: str, method: str, endpoint: str, params: Optional[Dict],
+        headers: Optional[Dict], cache_ttl: Optional[int], **kwargs
+    ) -> None:
+        """在后台重新验证过期缓存，每个缓存键同一时间最多一个刷新任务"""
+        if content_cache_key in self._revalidation_tasks:
+            return
+
+        async def _revalidate():
+            try:
+                await self._send_request(
+                    method, endpoint, params, None, None, headers, True, cache_ttl,
+                    _is_revalidation=True, **kwargs
+                )
+                bot_logger.debug(f"[BaseAPI] 后台刷新完成, key: {content_cache_key}")
+            except Exception as e:
+                bot_logger.warning(f"[BaseAPI] 后台刷新失败, key: {content_cache_key}: {type(e).__name__} - {e}")
+
+        task = asyncio.create_task(_revalidate())
+        self._revalidation_tasks[content_cache_key] = task
+        task.add_done_callback(lambda t: self._revalidation_tasks.pop(content_cache_key, None))
+
+    @async_retry(max_retries=3, on_retry=_count_retry)
+    async def _send_request(
+        self,
+        method: str,
+        endpoint: str,
+        params: Optional[Dict] = None,
+        data: Optional[Dict] = None,
+        json: Optional[Dict] = None,
+        headers: Optional[Dict] = None,
+        use_cache: bool = True,
+        cache_ttl: Optional[int] = None,
+        allow_stale: bool = True,
         _is_retry_for_304: bool = False, # 内部参数，用于处理304后缓存丢失的情况
+        _is_revalidation: bool = False, # 内部参数，后台刷新时跳过缓存读取
+        _is_hedge: bool = False, # 内部参数，对冲请求直接发往备用源
+        _hedge_eligible: bool = False, # 内部参数，可对冲的主请求，发往上游时积累对冲额度
         **kwargs
     ) -> httpx.Response:
-        """发送HTTP请求，支持主备切换、高效缓存和条件请求(If-Modified-Since)"""
+        """发送HTTP请求，支持主备切换、stale-while-revalidate 缓存和条件请求(If-Modified-Since)"""
         url = self._build_url(endpoint)
         bot_logger.debug(f"[BaseAPI] 准备请求: {method} {url}")
 
-        use_cache_effective = use_cache and not self.is_using_backup and method.upper() == "GET"
+        use_cache_effective = use_cache and method.upper() == "GET"
         content_cache_key = None
         lm_cache_key = None
+        ts_cache_key = None
+        fresh_ttl, stale_ttl = self.get_cache_policy(endpoint, cache_ttl)
         
         # 1. 如果支持缓存，则处理缓存逻辑
         if use_cache_effective:
             content_cache_key = self.get_cache_key(endpoint, params)
             lm_cache_key = self.get_last_modified_cache_key(endpoint, params)
+            ts_cache_key = self.get_cache_timestamp_key(endpoint, params)
+            request_headers = headers.copy() if headers else {}
 
-            # 如果不是304重试，则尝试从缓存中获取数据
+            # 304重试时不再携带 If-Modified-Since，强制获取完整内容
             if not _is_retry_for_304:
-                cached_content = await redis_manager.get(content_cache_key)
-                if cached_content:
-                    bot_logger.debug(f"[BaseAPI] L1 缓存命中, key: {content_cache_key}")
-                    return httpx.Response(200, content=cached_content, request=httpx.Request(method, url))
+                cached_content, cached_at, last_modified = await self._read_cache_entry(
+                    content_cache_key, ts_cache_key, lm_cache_key, fresh_ttl + stale_ttl
+                )
+                if cached_content and cached_at is not None and not _is_revalidation:
+                    age = time.time() - cached_at
+                    if age < fresh_ttl:
+                        bot_logger.debug(f"[BaseAPI] 缓存命中 (fresh, age={age:.1f}s), key: {content_cache_key}")
+                        upstream_metrics.observe_cache(endpoint, "hit")
+                        return httpx.Response(200, content=cached_content, request=httpx.Request(method, url))
+                    if allow_stale and age < fresh_ttl + stale_ttl:
+                        bot_logger.debug(f"[BaseAPI] 缓存命中 (stale, age={age:.1f}s)，后台刷新, key: {content_cache_key}")
+                        upstream_metrics.observe_cache(endpoint, "stale")
+                        self._schedule_revalidation(
+                            content_cache_key, method, endpoint, params, headers, cache_ttl, **kwargs
+                        )
+                        return httpx.Response(200, content=cached_content, request=httpx.Request(method, url))
 
-            # L1 缓存未命中，准备网络请求，并检查是否存在 Last-Modified 值 (L2 缓存)
-            request_headers = headers.copy() if headers else {}
-            last_modified = await redis_manager.get(lm_cache_key)
-            if last_modified and isinstance(last_modified, bytes):
-                request_headers['If-Modified-Since'] = last_modified.decode()
-                bot_logger.debug(f"[BaseAPI] L2 缓存发现 Last-Modified, key: {lm_cache_key}")
+                if not _is_revalidation:
+                    upstream_metrics.observe_cache(endpoint, "miss")
+
+                # 缓存已过期，但仍保留内容和 Last-Modified 时，使用条件请求重新验证
+                if cached_content and last_modified:
+                    request_headers['If-Modified-Since'] = last_modified
+                    bot_logger.debug(f"[BaseAPI] 使用 Last-Modified 进行条件请求, key: {lm_cache_key}")
         else:
             request_headers = headers
 
-        # 2. 执行网络请求
+        if _hedge_eligible:
+            hedge_policy.note_request()
+
+        # 2. 由熔断器选择上游：主源熔断时走备用源，冷却后自动探测并切回主源
+        base_url, breaker = self._select_base_url(force_backup=_is_hedge)
+        url = self._build_url(endpoint, base_url)
+        # 备用源的数据不写入缓存
+        write_cache = use_cache_effective and base_url == self.standard_url
+        recorded = breaker is None
+        started = time.monotonic()
+
+        # 3. 执行网络请求 (先取令牌再占用并发槽位，被限流的主机不会占满信号量)
+        try:
+            await self._enforce_rate_limit(url)
+        except BaseException:
+            if breaker is not None:
+                breaker.release()
+            raise
         async with self._request_semaphore:
-            await self._enforce_rate_limit()
             try:
                 async with asyncio.timeout(self.timeout):
-                    async with self.get_client() as client:
+                    async with self.get_client(url) as client:
                         bot_logger.debug(f"[BaseAPI] 发送网络请求: {method} {url}, Headers: {request_headers}")
                         request_timeout = kwargs.pop('timeout', self.timeout + 5)
+                        started = time.monotonic()
                         response = await client.request(
                             method=method, url=url, params=params, data=data, json=json,
                             headers=request_headers, timeout=request_timeout, **kwargs
                         )
+                        # 5xx 计为主机故障；4xx 说明主机可达，不影响熔断
+                        latency = time.monotonic() - started
+                        upstream_metrics.observe_response(endpoint, response.status_code, latency, len(response.content))
+                        if not recorded:
+                            breaker.record(response.status_code < 500, latency)
+                            recorded = True
+                        if response.status_code < 500:
+                            hedge_policy.observe(url, latency)
 
                         # 如果是304，特殊处理
                         if response.status_code == 304:
                             bot_logger.debug(f"[BaseAPI] 收到 304 Not Modified, key: {content_cache_key}")
-                            cached_content = await redis_manager.get(content_cache_key)
+                            cached_content = await self._read_cached_content(content_cache_key) if content_cache_key else None
                             if cached_content:
-                                # 刷新长周期缓存
-                                await redis_manager.redis.expire(content_cache_key, self._cache_ttl_long)
-                                await redis_manager.redis.expire(lm_cache_key, self._cache_ttl_long)
+                                # 内容未变化，重新开始 fresh 窗口
+                                await self._write_cache_entry(
+                                    content_cache_key, ts_cache_key, lm_cache_key, None,
+                                    request_headers.get('If-Modified-Since'), fresh_ttl, stale_ttl
+                                )
                                 return httpx.Response(200, content=cached_content, request=httpx.Request(method, url))
                             else:
                                 # 缓存不一致，重新请求
                                 bot_logger.warning(f"[BaseAPI] 收到304但缓存丢失, key: {content_cache_key}, 将强制重新获取")
-                                return await self._request(method, endpoint, params, data, json, headers, use_cache, cache_ttl, _is_retry_for_304=True, **kwargs)
+                                return await self._send_request(method, endpoint, params, data, json, headers, use_cache, cache_ttl, allow_stale, _is_retry_for_304=True, **kwargs)
+
+                        # 上游限流：按 Retry-After 暂停该主机的令牌桶，重试时会自动等待
+                        if response.status_code == 429:
+                            host_rate_limiter.penalize(url, parse_retry_after(response.headers.get('Retry-After')))
 
                         response.raise_for_status()
 
-                # 3. 处理成功的响应 (2xx)
+                # 4. 处理成功的响应 (2xx)
                 bot_logger.debug(f"[BaseAPI] 请求成功: {response.status_code}")
-                if use_cache_effective:
+                if write_cache:
                     new_last_modified = response.headers.get('Last-Modified')
-                    if new_last_modified:
-                        # 使用长周期缓存
-                        ttl = self._cache_ttl_long
-                        await redis_manager.set(content_cache_key, response.content, expire=ttl)
-                        await redis_manager.set(lm_cache_key, new_last_modified, expire=ttl)
-                        bot_logger.debug(f"[BaseAPI] 响应已长周期缓存, key: {content_cache_key}, lm_key: {lm_cache_key}, ttl: {ttl}s")
-                    else:
-                        # 使用默认短周期缓存
-                        ttl = cache_ttl if cache_ttl is not None else self._cache_ttl
-                        await redis_manager.set(content_cache_key, response.content, expire=ttl)
-                        await redis_manager.delete(lm_cache_key) # 确保删除旧的lm值
-                        bot_logger.debug(f"[BaseAPI] 响应已短周期缓存, key: {content_cache_key}, ttl: {ttl}s")
+                    await self._write_cache_entry(
+                        content_cache_key, ts_cache_key, lm_cache_key, response.content,
+                        new_last_modified, fresh_ttl, stale_ttl
+                    )
+                    bot_logger.debug(
+                        f"[BaseAPI] 响应已缓存, key: {content_cache_key}, fresh: {fresh_ttl}s, stale: {stale_ttl}s, "
+                        f"last_modified: {new_last_modified}"
+                    )
 
                 return response
 
             except (httpx.TimeoutException, httpx.ConnectError, asyncio.TimeoutError, httpx.RequestError) as e:
-                bot_logger.error(f"[BaseAPI] 请求失败 ({self.current_url}): {type(e).__name__} - {e}", exc_info=True)
+                bot_logger.error(f"[BaseAPI] 请求失败 ({base_url}): {type(e).__name__} - {e}", exc_info=True)
+                upstream_metrics.observe_error(endpoint, time.monotonic() - started)
+                if not recorded:
+                    breaker.record(False, time.monotonic() - started)
+                    recorded = True
 
                 # 尝试从缓存中返回旧数据作为降级方案
                 if use_cache_effective and content_cache_key:
-                    cached_content = await redis_manager.get(content_cache_key)
+                    cached_content = await self._read_cached_content(content_cache_key)
                     if cached_content:
                         bot_logger.warning(f"[BaseAPI] API请求失败，返回缓存的旧数据, key: {content_cache_key}")
+                        upstream_metrics.observe_cache(endpoint, "fallback")
                         return httpx.Response(200, content=cached_content, request=httpx.Request(method, url))
-
-                if not self.is_using_backup and self.backup_url:
-                    self.current_url = self.backup_url
-                    self.is_using_backup = True
-                    bot_logger.warning(f"[BaseAPI] 主API请求失败，自动切换到备用API: {self.backup_url}")
                 raise
+            finally:
+                if not recorded:
+                    # 请求被取消等非主机原因，只归还半开状态下的探测名额
+                    breaker.release()
     
     @classmethod
     def get_cache_key(cls, endpoint: str, params: Optional[Dict] = None) -> str:
@@ -261,6 +560,15 @@ class BaseAPI:
             sorted_params = sorted(params.items())
             key += ":" + ":".join(f"{k}={v}" for k, v in sorted_params)
         return key
+
+    @classmethod
+    def get_cache_timestamp_key(cls, endpoint: str, params: Optional[Dict] = None) -> str:
+        """生成缓存写入时间的缓存键"""
+        key = f"api_cache_ts:{endpoint}"
+        if params:
+            sorted_params = sorted(params.items())
+            key += ":" + ":".join(f"{k}={v}" for k, v in sorted_params)
+        return key
     
     async def get(
         self,
@@ -268,15 +576,23 @@ class BaseAPI:
         params: Optional[Dict] = None,
         use_cache: bool = True,
         cache_ttl: Optional[int] = None,
+        allow_stale: bool = True,
+        hedge: bool = False,
         **kwargs
     ) -> httpx.Response:
-        """发送GET请求"""
+        """发送GET请求
+        
+        allow_stale 为 False 时不返回 stale 窗口内的旧数据（用于后台数据同步）
+        hedge 为 True 时对延迟敏感的请求启用对冲（主源过慢时向备用源补发）
+        """
         return await self._request(
             "GET",
             endpoint,
             params=params,
             use_cache=use_cache,
             cache_ttl=cache_ttl,
+            allow_stale=allow_stale,
+            hedge=hedge,
             **kwargs
         )
     
@@ -318,6 +634,50 @@ class BaseAPI:
             bot_logger.debug(f"JSON解码失败，原始响应内容: {response.content}")
             return response.text
     
-    def _build_url(self, endpoint: str) -> str:
-        """构建完整的请求URL"""
-        return f"{self.current_url}/{endpoint.lstrip('/')}"
+    def _build_url(self, endpoint: str, base_url: Optional[str] = None) -> str:
+        """构建完整的请求URL，默认使用主源"""
+        return f"{base_url or self.standard_url}/{endpoint.lstrip('/')}"
+
+    def _select_base_url(self, force_backup: bool = False) -> Tuple[str, Optional[CircuitBreaker]]:
+        """根据主源熔断器状态选择本次请求的上游地址
+
+        返回 (base_url, breaker)；breaker 为 None 表示熔断器未放行但已无其他上游可选，
+        此时请求照常发出，结果不计入熔断统计。force_backup 用于对冲请求，不改变实例的路由状态。
+        """
+        if force_backup and self.backup_url:
+            backup = circuit_breakers.get(self.backup_url)
+            return self.backup_url, backup if backup.allow_request() else None
+
+        primary = circuit_breakers.get(self.standard_url)
+        if primary.allow_request():
+            base_url, breaker = self.standard_url, primary
+        elif not self.backup_url:
+            base_url, breaker = self.standard_url, None
+        else:
+            backup = circuit_breakers.get(self.backup_url)
+            base_url, breaker = self.backup_url, backup if backup.allow_request() else None
+
+        using_backup = base_url != self.standard_url
+        if using_backup != self.is_using_backup:
+            if using_backup:
+                bot_logger.warning(f"[BaseAPI] 主API熔断，切换到备用API: {self.backup_url}")
+            else:
+                bot_logger.info(f"[BaseAPI] 主API熔断冷却结束，尝试切回主API: {self.standard_url}")
+        self.current_url = base_url
+        self.is_using_backup = using_backup
+        return base_url, breaker
+
+    @classmethod
+    def get_upstream_metrics(cls, endpoint: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """返回各端点模板的延迟、状态码、重试、304 比例、缓存命中与传输字节统计"""
+        return upstream_metrics.get_stats(endpoint)
+
+    @classmethod
+    def get_hedge_stats(cls) -> Dict[str, Any]:
+        """返回对冲请求的次数、胜出次数与预算使用情况"""
+        return hedge_policy.get_stats()
+
+    @classmethod
+    def get_circuit_breaker_stats(cls) -> Dict[str, Dict[str, Any]]:
+        """返回各上游主机熔断器的状态与统计"""
+        return circuit_breakers.get_stats()
@@ -3,12 +3,25 @@ import platform
 import subprocess
 import time
 import json
-from typing import Optional
+from typing import Dict, List, Optional, Set
+import psutil
 from playwright.async_api import async_playwright, Browser, Page
+from utils.config import settings
 from utils.logger import bot_logger
+from utils.render_queue import PRIORITY_INTERACTIVE, RenderQueue
+from utils.template_assets import ASSET_CACHE_CONTROL, ASSET_ORIGIN, template_assets
 
-# 可根据机器能力与并发负载微调
-PAGE_POOL_SIZE = 4  # 页面池大小
+# 可根据机器能力与并发负载微调 (image.page_pool)
+_PAGE_POOL_CONFIG = settings.IMAGE_PAGE_POOL
+PAGE_POOL_MIN = _PAGE_POOL_CONFIG.get("min_pages", 2)  # 页面池最小页面数 (启动时创建)
+PAGE_POOL_MAX = _PAGE_POOL_CONFIG.get("max_pages", 8)  # 页面池最大页面数
+BROWSER_PROCESSES = _PAGE_POOL_CONFIG.get("processes", 1)  # Chromium 进程数，页面均匀分布在各进程上
+SCALE_UP_WAIT_MS = _PAGE_POOL_CONFIG.get("scale_up_wait_ms", 200)  # 请求等待页面超过该时间时扩容
+SCALE_DOWN_IDLE_SECONDS = _PAGE_POOL_CONFIG.get("idle_shrink_seconds", 300)  # 页面池持续未用满该时间后逐步缩容
+MEMORY_LIMIT_PERCENT = _PAGE_POOL_CONFIG.get("memory_limit_percent", 85)  # 主机内存使用率超过该值时不扩容并缩容到最小值
+AUTOSCALE_INTERVAL = _PAGE_POOL_CONFIG.get("check_interval", 30)  # 缩容检查间隔(秒)
+RENDER_QUEUE_MAX_LENGTH = settings.IMAGE_RENDER_QUEUE.get("max_length", 64)  # 等待页面的最大请求数
+RENDER_QUEUE_MAX_BACKGROUND = settings.IMAGE_RENDER_QUEUE.get("max_background", 16)  # 其中后台请求的最大数量
 DEFAULT_VIEWPORT = {"width": 1200, "height": 400}
 DEFAULT_DEVICE_SCALE_FACTOR = 1.5  # 降低分辨率以加快渲染
 
@@ -16,6 +29,9 @@ DEFAULT_DEVICE_SCALE_FACTOR = 1.5  # 降低分辨率以加快渲染
 DEFAULT_TIMEOUT_MS = 1500
 DEFAULT_NAV_TIMEOUT_MS = 1500
 
+# 模板热度的衰减系数：每次获取页面时所有模板的热度乘以该系数，热度高的模板会占用更多预热页面
+TEMPLATE_DEMAND_DECAY = 0.95
+
 # 启动参数（在常见 Linux 容器中更稳、更快）
 BROWSER_ARGS = [
     "--disable-dev-shm-usage",
@@ -34,14 +50,41 @@ def _perf_log(event: str, **fields):
         bot_logger.info(f"[perf] {payload}")
 
 class BrowserManager:
-    """全局浏览器管理器，包含一个页面池以提高并发性能"""
+    """全局浏览器管理器，包含一个页面池以提高并发性能
+
+    页面归还后保留其预热状态 (`_warmed_for`: 最近渲染的模板)。获取页面时优先返回已为
+    目标模板预热的空闲页面；没有时挑选一个最冷门模板的空闲页面改作他用，
+    使预热页面的分布随请求热度调整。
+
+    页面数在 [min_pages, max_pages] 之间伸缩：请求等待页面超过 scale_up_wait_ms 时新建页面，
+    页面池持续 idle_shrink_seconds 未用满时每轮关闭一个最冷门的空闲页面；
+    主机内存使用率过高时停止扩容并把空闲页面缩减到最小值。
+
+    没有空闲页面时请求进入渲染队列 (utils/render_queue.py)，按优先级与截止时间分配归还的页面，
+    过期的请求不再获得页面。
+    """
     _instance = None
     _lock = asyncio.Lock()
     
     def __init__(self):
         self.browser: Optional[Browser] = None
+        self.browsers: List[Browser] = []
         self.playwright = None
-        self.page_pool: Optional[asyncio.Queue[Page]] = None
+        self.idle_pages: Optional[List[Page]] = None
+        self.render_queue = RenderQueue(RENDER_QUEUE_MAX_LENGTH, RENDER_QUEUE_MAX_BACKGROUND)
+        self._template_demand: Dict[str, float] = {}
+        self.pool_stats = {
+            "warm_hits": 0, "warm_misses": 0, "rebalanced": 0, "waits": 0,
+            "scale_ups": 0, "scale_downs": 0, "acquires": 0, "wait_seconds_sum": 0.0,
+        }
+        self.min_pages = PAGE_POOL_MIN
+        self.max_pages = max(PAGE_POOL_MAX, PAGE_POOL_MIN)
+        self.scale_up_wait = SCALE_UP_WAIT_MS / 1000
+        self.total_pages = 0  # 池中的页面总数 (空闲 + 使用中)
+        self._growing = 0  # 正在创建的页面数
+        self._last_saturated = time.monotonic()  # 最近一次没有空闲页面的时间
+        self._autoscale_task: Optional[asyncio.Task] = None
+        self._background: Set[asyncio.Task] = set()
         self.initialized = False
         
     @classmethod
@@ -67,30 +110,27 @@ class BrowserManager:
                 t1 = time.perf_counter()
                 _perf_log("playwright.start", latency_ms=round((t1 - t0) * 1000, 2))
 
-                self.browser = await self.playwright.chromium.launch(
-                    headless=True,
-                    args=BROWSER_ARGS,
-                    timeout=12000
-                )
+                for _ in range(max(BROWSER_PROCESSES, 1)):
+                    self.browsers.append(await self.playwright.chromium.launch(
+                        headless=True,
+                        args=BROWSER_ARGS,
+                        timeout=12000
+                    ))
+                self.browser = self.browsers[0]
                 t2 = time.perf_counter()
                 _perf_log("chromium.launch", latency_ms=round((t2 - t1) * 1000, 2),
-                          args=BROWSER_ARGS)
+                          args=BROWSER_ARGS, processes=len(self.browsers))
+
+                # 模板静态资源读入内存，页面创建时安装路由
+                if settings.IMAGE_ASSETS_IN_MEMORY and not template_assets.loaded:
+                    await asyncio.get_running_loop().run_in_executor(None, template_assets.load)
 
                 # 创建并填充页面池
-                self.page_pool = asyncio.Queue(maxsize=PAGE_POOL_SIZE)
-                for i in range(PAGE_POOL_SIZE):
+                self.idle_pages = []
+                for i in range(self.min_pages):
                     p0 = time.perf_counter()
-                    page = await self.browser.new_page(
-                        viewport=DEFAULT_VIEWPORT,
-                        device_scale_factor=DEFAULT_DEVICE_SCALE_FACTOR
-                    )
-                    # 缩短默认超时，避免等待过久
-                    try:
-                        page.set_default_timeout(DEFAULT_TIMEOUT_MS)
-                        page.set_default_navigation_timeout(DEFAULT_NAV_TIMEOUT_MS)
-                    except Exception:
-                        pass
-                    await self.page_pool.put(page)
+                    self.idle_pages.append(await self._new_page())
+                    self.total_pages += 1
                     p1 = time.perf_counter()
                     _perf_log("new_page",
                              index=i,
@@ -98,11 +138,17 @@ class BrowserManager:
                              device_scale_factor=DEFAULT_DEVICE_SCALE_FACTOR,
                              latency_ms=round((p1 - p0) * 1000, 2))
 
+                self._last_saturated = time.monotonic()
+                self._autoscale_task = asyncio.create_task(self._autoscale_loop())
                 self.initialized = True
                 total_ms = round((time.perf_counter() - t0) * 1000, 2)
-                bot_logger.info(f"浏览器管理器初始化成功，页面池大小: {PAGE_POOL_SIZE}，总耗时: {total_ms}ms")
+                bot_logger.info(
+                    f"浏览器管理器初始化成功，页面池大小: {self.min_pages}~{self.max_pages}，"
+                    f"浏览器进程数: {len(self.browsers)}，总耗时: {total_ms}ms"
+                )
                 _perf_log("browser_manager.initialize.done",
-                          page_pool_size=PAGE_POOL_SIZE,
+                          page_pool_size=self.min_pages,
+                          page_pool_max=self.max_pages,
                           total_ms=total_ms)
             except Exception as e:
                 bot_logger.error(f"浏览器管理器初始化失败: {str(e)}")
@@ -110,25 +156,211 @@ class BrowserManager:
                 await self.cleanup()
                 raise
     
-    async def acquire_page(self) -> Page:
-        """从池中获取一个页面"""
-        if not self.initialized or not self.page_pool:
+    async def _new_page(self) -> Page:
+        """在页面最少的浏览器进程上创建一个使用默认视口与超时设置的新页面"""
+        # browser.new_page 为每个页面创建独立的上下文
+        browser = min(self.browsers, key=lambda b: len(b.contexts)) if self.browsers else self.browser
+        page = await browser.new_page(
+            viewport=DEFAULT_VIEWPORT,
+            device_scale_factor=DEFAULT_DEVICE_SCALE_FACTOR
+        )
+        # 缩短默认超时，避免等待过久
+        try:
+            page.set_default_timeout(DEFAULT_TIMEOUT_MS)
+            page.set_default_navigation_timeout(DEFAULT_NAV_TIMEOUT_MS)
+        except Exception:
+            pass
+        if settings.IMAGE_ASSETS_IN_MEMORY:
+            await page.route(f"{ASSET_ORIGIN}/**", self._serve_asset)
+        return page
+
+    async def _serve_asset(self, route) -> None:
+        """从内存返回虚拟源下的模板与静态资源"""
+        asset = template_assets.resolve(route.request.url)
+        if asset is None:
+            await route.fulfill(status=404, body=b"")
+            return
+        body, content_type = asset
+        await route.fulfill(status=200, body=body, headers={
+            "Content-Type": content_type,
+            "Cache-Control": ASSET_CACHE_CONTROL,
+            "Access-Control-Allow-Origin": "*",
+        })
+
+    def _record_demand(self, template_key: Optional[str]) -> None:
+        """按指数衰减累计各模板的请求热度"""
+        for key in list(self._template_demand):
+            demand = self._template_demand[key] * TEMPLATE_DEMAND_DECAY
+            if demand < 0.01:
+                del self._template_demand[key]
+            else:
+                self._template_demand[key] = demand
+        if template_key:
+            self._template_demand[template_key] = self._template_demand.get(template_key, 0.0) + 1.0
+
+    def _pick_idle_page(self, template_key: Optional[str]) -> Page:
+        """从空闲页面中挑选：优先已为该模板预热的页面，其次未预热的页面，
+        最后是 (模板热度 / 该模板空闲页面数) 最低的页面，即最冷门模板的富余页面"""
+        idle = self.idle_pages
+        if template_key:
+            # 从后往前找，优先最近归还的页面
+            for i in range(len(idle) - 1, -1, -1):
+                if getattr(idle[i], "_warmed_for", None) == template_key:
+                    self.pool_stats["warm_hits"] += 1
+                    return idle.pop(i)
+            self.pool_stats["warm_misses"] += 1
+
+        idle_counts: Dict[Optional[str], int] = {}
+        for page in idle:
+            warmed_for = getattr(page, "_warmed_for", None)
+            idle_counts[warmed_for] = idle_counts.get(warmed_for, 0) + 1
+
+        def score(page: Page) -> float:
+            warmed_for = getattr(page, "_warmed_for", None)
+            if warmed_for is None:
+                return -1.0
+            return self._template_demand.get(warmed_for, 0.0) / idle_counts[warmed_for]
+
+        index = min(range(len(idle)), key=lambda i: score(idle[i]))
+        if template_key and getattr(idle[index], "_warmed_for", None) is not None:
+            self.pool_stats["rebalanced"] += 1
+        return idle.pop(index)
+
+    async def acquire_page(
+        self, template_key: Optional[str] = None, *,
+        priority: int = PRIORITY_INTERACTIVE, deadline: Optional[float] = None,
+    ) -> Page:
+        """从池中获取一个页面
+
+        Args:
+            template_key: 即将渲染的模板标识，用于优先返回已为该模板预热的页面
+            priority: 排队时的优先级 (数值越小越优先)
+            deadline: 截止时间 (time.monotonic)，过期前仍未拿到页面时抛出 RenderDropped
+
+        Raises:
+            RenderDropped: 请求已过期或渲染队列已满
+        """
+        if not self.initialized or self.idle_pages is None:
             await self.initialize()
         
         bot_logger.debug("正在从池中获取页面...")
         q0 = time.perf_counter()
-        page = await self.page_pool.get()
+        if deadline is not None and deadline <= time.monotonic():
+            raise self.render_queue.drop("expired")
+        self._record_demand(template_key)
+        if self.idle_pages:
+            page = self._pick_idle_page(template_key)
+            if not self.idle_pages:
+                self._last_saturated = time.monotonic()
+        else:
+            # 没有空闲页面时进入渲染队列，归还的页面按优先级与截止时间交给等待者；等待过久时扩容
+            self._last_saturated = time.monotonic()
+            waiter = asyncio.get_running_loop().create_future()
+            self.render_queue.push(waiter, priority, deadline)
+            self.pool_stats["waits"] += 1
+            self._spawn(self._grow_if_still_waiting(waiter))
+            try:
+                if deadline is None:
+                    page = await waiter
+                else:
+                    page = await asyncio.wait_for(waiter, deadline - time.monotonic())
+            except asyncio.TimeoutError:
+                raise self.render_queue.drop("expired") from None
+            except asyncio.CancelledError:
+                # 页面已交付但调用方被取消时，把页面还回池中
+                if waiter.done() and not waiter.cancelled() and waiter.exception() is None:
+                    await self.release_page(waiter.result())
+                raise
         q1 = time.perf_counter()
-        size = self.page_pool.qsize() if self.page_pool else -1
+        self.pool_stats["acquires"] += 1
+        self.pool_stats["wait_seconds_sum"] += q1 - q0
+        size = len(self.idle_pages) if self.idle_pages is not None else -1
         _perf_log("page.acquire", latency_ms=round((q1 - q0) * 1000, 2),
-                  pool_size=size, page_id=id(page))
+                  pool_size=size, page_id=id(page), template=template_key,
+                  warm_hit=template_key is not None and getattr(page, "_warmed_for", None) == template_key)
         bot_logger.debug(f"成功获取页面，当前池大小: {size}")
         return page
 
+    def _spawn(self, coro) -> None:
+        """启动后台任务并保留引用，避免任务被提前回收"""
+        task = asyncio.ensure_future(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    def _memory_pressure(self) -> bool:
+        """主机内存使用率是否超过上限"""
+        try:
+            return psutil.virtual_memory().percent >= MEMORY_LIMIT_PERCENT
+        except Exception:
+            return False
+
+    def _can_grow(self) -> bool:
+        return (
+            self.idle_pages is not None
+            and self.total_pages + self._growing < self.max_pages
+            and not self._memory_pressure()
+        )
+
+    async def _grow_if_still_waiting(self, waiter: asyncio.Future) -> None:
+        """请求等待超过 scale_up_wait 仍未拿到页面时新建一个页面"""
+        await asyncio.sleep(self.scale_up_wait)
+        if waiter.done() or not self._can_grow():
+            return
+        self._growing += 1
+        try:
+            page = await self._new_page()
+        except Exception as e:
+            bot_logger.warning(f"扩容页面池失败: {e}")
+            _perf_log("page_pool.scale_up.error", error=str(e))
+            return
+        finally:
+            self._growing -= 1
+        if self.idle_pages is None:
+            # 扩容期间浏览器已关闭
+            await page.close()
+            return
+        self.total_pages += 1
+        self.pool_stats["scale_ups"] += 1
+        _perf_log("page_pool.scale_up", total_pages=self.total_pages, waiting=len(self.render_queue))
+        self._put_idle(page)
+
+    async def _shrink_idle(self) -> None:
+        """页面池长时间未用满时关闭一个最冷门的空闲页面；内存紧张时直接缩减到最小值"""
+        pressure = self._memory_pressure()
+        quiet = time.monotonic() - self._last_saturated >= SCALE_DOWN_IDLE_SECONDS
+        while self.idle_pages and self.total_pages > self.min_pages and (pressure or quiet):
+            page = self._pick_idle_page(None)
+            self.total_pages -= 1
+            self.pool_stats["scale_downs"] += 1
+            try:
+                await page.close()
+            except Exception:
+                pass
+            _perf_log("page_pool.scale_down", total_pages=self.total_pages, memory_pressure=pressure)
+            if not pressure:
+                break
+
+    async def _autoscale_loop(self) -> None:
+        """后台缩容检查"""
+        while True:
+            await asyncio.sleep(AUTOSCALE_INTERVAL)
+            try:
+                await self._shrink_idle()
+            except Exception as e:
+                bot_logger.warning(f"页面池缩容检查失败: {e}")
+
+    def _put_idle(self, page: Page) -> None:
+        """归还页面：优先交给队列中优先级最高且未过期的等待者，否则放回空闲列表"""
+        waiter = self.render_queue.pop()
+        if waiter is not None:
+            waiter.set_result(page)
+            return
+        self.idle_pages.append(page)
+
     async def release_page(self, page: Page):
-        """将页面归还到池中，并重置关键状态以避免污染"""
+        """将页面归还到池中，并重置视口以避免污染 (保留模板预热状态)"""
         r0 = time.perf_counter()
-        if not self.page_pool:
+        if self.idle_pages is None:
             # 如果池不存在（可能在清理阶段），尝试关闭页面
             try:
                 if not page.is_closed():
@@ -141,69 +373,71 @@ class BrowserManager:
         if page.is_closed():
             bot_logger.warning("尝试释放一个已关闭的页面，将创建一个新页面补充到池中。")
             try:
-                if self.browser:
-                    page = await self.browser.new_page(
-                        viewport=DEFAULT_VIEWPORT,
-                        device_scale_factor=DEFAULT_DEVICE_SCALE_FACTOR
-                    )
-                    try:
-                        page.set_default_timeout(DEFAULT_TIMEOUT_MS)
-                        page.set_default_navigation_timeout(DEFAULT_NAV_TIMEOUT_MS)
-                    except Exception:
-                        pass
+                if self.browsers:
+                    page = await self._new_page()
                 else:
                     bot_logger.error("浏览器实例不存在，无法创建新页面。")
                     _perf_log("page.release.browser_missing")
+                    self.total_pages -= 1  # 页面未能补充，池中少了一个页面
                     return
             except Exception as e:
                 bot_logger.error(f"无法创建新页面来替换已关闭的页面: {e}")
                 _perf_log("page.release.recreate_error", error=str(e))
+                self.total_pages -= 1  # 页面未能补充，池中少了一个页面
                 return  # 无法补充，直接返回
         else:
             # 重置页面状态以避免状态污染
             try:
-                # 重置 viewport 到默认值
+                # 重置 viewport 到默认值 (内容高度的测量依赖默认视口)
                 current_viewport = page.viewport_size
                 if current_viewport != DEFAULT_VIEWPORT:
                     await page.set_viewport_size(DEFAULT_VIEWPORT)
                     bot_logger.debug(f"重置 viewport 从 {current_viewport} 到 {DEFAULT_VIEWPORT}")
-                
-                # 清除 warmup 标记，让下次使用时重新预热
-                if hasattr(page, '_warmed_for'):
-                    delattr(page, '_warmed_for')
-                    
             except Exception as e:
                 bot_logger.warning(f"重置页面状态时出错: {e}，页面可能已损坏，将创建新页面")
                 # 如果重置失败，关闭损坏的页面并创建新的
                 try:
                     if not page.is_closed():
                         await page.close()
-                    if self.browser:
-                        page = await self.browser.new_page(
-                            viewport=DEFAULT_VIEWPORT,
-                            device_scale_factor=DEFAULT_DEVICE_SCALE_FACTOR
-                        )
-                        try:
-                            page.set_default_timeout(DEFAULT_TIMEOUT_MS)
-                            page.set_default_navigation_timeout(DEFAULT_NAV_TIMEOUT_MS)
-                        except Exception:
-                            pass
+                    if self.browsers:
+                        page = await self._new_page()
                     else:
                         bot_logger.error("浏览器实例不存在，无法创建新页面。")
                         _perf_log("page.release.reset_error.browser_missing")
+                        self.total_pages -= 1  # 页面未能补充，池中少了一个页面
                         return
                 except Exception as e2:
                     bot_logger.error(f"创建替换页面失败: {e2}")
                     _perf_log("page.release.reset_error.recreate_failed", error=str(e2))
+                    self.total_pages -= 1  # 页面未能补充，池中少了一个页面
                     return
         
-        await self.page_pool.put(page)
+        self._put_idle(page)
         r1 = time.perf_counter()
-        size = self.page_pool.qsize() if self.page_pool else -1
+        size = len(self.idle_pages) if self.idle_pages is not None else -1
         _perf_log("page.release", latency_ms=round((r1 - r0) * 1000, 2),
-                  pool_size=size, page_id=id(page))
+                  pool_size=size, page_id=id(page), warmed_for=getattr(page, "_warmed_for", None))
         bot_logger.debug(f"页面已归还，当前池大小: {size}")
 
+    def get_stats(self) -> Dict[str, object]:
+        """页面池统计：页面数与利用率、等待情况、伸缩次数、预热命中情况与各模板热度"""
+        idle = len(self.idle_pages) if self.idle_pages is not None else 0
+        busy = max(self.total_pages - idle, 0)
+        acquires = self.pool_stats["acquires"]
+        return {
+            "total": self.total_pages,
+            "idle": idle,
+            "busy": busy,
+            "min": self.min_pages,
+            "max": self.max_pages,
+            "processes": len(self.browsers),
+            "utilization": round(busy / self.total_pages, 4) if self.total_pages else 0.0,
+            "waiting": len(self.render_queue),
+            "avg_wait_ms": round(self.pool_stats["wait_seconds_sum"] / acquires * 1000, 2) if acquires else 0.0,
+            **self.pool_stats,
+            "template_demand": {k: round(v, 2) for k, v in self._template_demand.items()},
+        }
+
     async def create_page(self) -> Optional[Page]:
         """(已废弃) 创建新的页面。请使用 acquire_page 和 release_page。"""
         bot_logger.warning("create_page 方法已废弃，请使用 acquire_page 和 release_page。")
@@ -225,12 +459,15 @@ class BrowserManager:
 
             self.initialized = False
             cleanup_timeout = 5.0  # 优雅关闭的超时时间（秒）
+            if self._autoscale_task:
+                self._autoscale_task.cancel()
+                self._autoscale_task = None
 
             # 1. 尝试带超时地关闭浏览器
-            if self.browser:
+            for browser in self.browsers:
                 try:
                     t0 = time.perf_counter()
-                    await asyncio.wait_for(self.browser.close(), timeout=cleanup_timeout)
+                    await asyncio.wait_for(browser.close(), timeout=cleanup_timeout)
                     t1 = time.perf_counter()
                     bot_logger.info("浏览器实例已成功关闭。")
                     _perf_log("browser.close", latency_ms=round((t1 - t0) * 1000, 2))
@@ -262,8 +499,11 @@ class BrowserManager:
 
             # 4. 清理内部引用
             self.browser = None
+            self.browsers = []
             self.playwright = None
-            self.page_pool = None
+            self.idle_pages = None
+            self.total_pages = 0
+            self.render_queue.fail_all(RuntimeError("浏览器已关闭"))
             
         bot_logger.info("浏览器资源清理完成。")
 
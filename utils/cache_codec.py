@@ -0,0 +1,116 @@
+"""
+API 响应缓存的压缩编解码
+
+超过阈值的响应体在写入 Redis 前压缩，并带上格式标记；读取时按标记解压。
+没有标记的值按原始内容处理，兼容升级前写入的缓存。
+优先使用 zstandard（可选依赖），未安装时回退到标准库 zlib。
+"""
+
+import time
+import zlib
+from typing import Dict, Optional
+
+from utils.logger import bot_logger
+from utils.config import settings
+
+try:
+    import zstandard
+except ImportError:  # 可选依赖
+    zstandard = None
+
+# 格式标记: 魔数 + 编码类型，JSON 响应体不可能以 0xFF 开头
+MAGIC = b"\xffCZ"
+CODEC_ZLIB = b"z"
+CODEC_ZSTD = b"s"
+
+
+class CacheCodec:
+    """带格式标记的缓存值压缩器"""
+
+    def __init__(self, enabled: bool = True, codec: str = "auto", threshold: int = 1024, level: Optional[int] = None):
+        self.enabled = enabled
+        self.threshold = threshold
+        if codec == "auto":
+            codec = "zstd" if zstandard is not None else "zlib"
+        if codec == "zstd" and zstandard is None:
+            bot_logger.warning("[CacheCodec] 未安装 zstandard，回退到 zlib")
+            codec = "zlib"
+        self.codec = codec
+        self.level = level if level is not None else (3 if codec == "zstd" else 6)
+
+        if codec == "zstd":
+            self._compressor = zstandard.ZstdCompressor(level=self.level)
+        self._decompressor = zstandard.ZstdDecompressor() if zstandard is not None else None
+
+        # 统计信息
+        self._stats = {
+            "compressed": 0,
+            "skipped": 0,
+            "decompressed": 0,
+            "raw_bytes": 0,
+            "stored_bytes": 0,
+            "compress_time": 0.0,
+            "decompress_time": 0.0,
+        }
+
+    def encode(self, content: bytes) -> bytes:
+        """压缩缓存值；未启用或低于阈值时原样返回"""
+        if not self.enabled or len(content) < self.threshold:
+            self._stats["skipped"] += 1
+            return content
+
+        start = time.perf_counter()
+        if self.codec == "zstd":
+            payload = MAGIC + CODEC_ZSTD + self._compressor.compress(content)
+        else:
+            payload = MAGIC + CODEC_ZLIB + zlib.compress(content, self.level)
+        self._stats["compress_time"] += time.perf_counter() - start
+
+        # 压缩无收益时保留原始内容，省去读取时的解压开销
+        if len(payload) >= len(content):
+            self._stats["skipped"] += 1
+            return content
+
+        self._stats["compressed"] += 1
+        self._stats["raw_bytes"] += len(content)
+        self._stats["stored_bytes"] += len(payload)
+        return payload
+
+    def decode(self, value: Optional[bytes]) -> Optional[bytes]:
+        """按格式标记解压缓存值；无标记的值视为原始内容"""
+        if not value or not value.startswith(MAGIC):
+            return value
+
+        codec = value[len(MAGIC):len(MAGIC) + 1]
+        body = value[len(MAGIC) + 1:]
+        start = time.perf_counter()
+        if codec == CODEC_ZSTD:
+            if self._decompressor is None:
+                raise RuntimeError("缓存值使用 zstd 压缩，但当前环境未安装 zstandard")
+            content = self._decompressor.decompress(body)
+        elif codec == CODEC_ZLIB:
+            content = zlib.decompress(body)
+        else:
+            raise ValueError(f"未知的缓存压缩格式: {codec!r}")
+        self._stats["decompress_time"] += time.perf_counter() - start
+        self._stats["decompressed"] += 1
+        return content
+
+    def get_stats(self) -> Dict[str, float]:
+        """返回压缩率与CPU耗时统计"""
+        stats = dict(self._stats)
+        stats["codec"] = self.codec
+        stats["ratio"] = round(stats["raw_bytes"] / stats["stored_bytes"], 2) if stats["stored_bytes"] else 0.0
+        stats["saved_bytes"] = stats["raw_bytes"] - stats["stored_bytes"]
+        stats["compress_time"] = round(stats["compress_time"], 4)
+        stats["decompress_time"] = round(stats["decompress_time"], 4)
+        return stats
+
+
+# 全局实例
+cache_codec = CacheCodec(
+    enabled=settings.API_CACHE_COMPRESSION_ENABLED,
+    codec=settings.API_CACHE_COMPRESSION_CODEC,
+    threshold=settings.API_CACHE_COMPRESSION_THRESHOLD,
+    level=settings.API_CACHE_COMPRESSION_LEVEL,
+)
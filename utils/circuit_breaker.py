@@ -0,0 +1,204 @@
+"""
+按上游主机划分的熔断器
+
+状态机:
+    closed    正常放行，在滑动窗口内统计错误率与慢调用率
+    open      熔断，拒绝请求（调用方改走备用源），冷却期结束后进入 half_open
+    half_open 只放行少量探测请求；连续成功后恢复 closed，任一失败重新 open
+"""
+
+import time
+from collections import deque
+from typing import Deque, Dict, Tuple
+from urllib.parse import urlsplit
+
+from utils.logger import bot_logger
+from utils.config import settings
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """单个上游主机的熔断器"""
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 2,
+        error_rate_threshold: float = 0.5,
+        slow_call_duration: float = 3.0,
+        slow_rate_threshold: float = 0.8,
+        min_calls: int = 10,
+        window: float = 60.0,
+        open_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+        success_threshold: int = 2,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.error_rate_threshold = error_rate_threshold
+        self.slow_call_duration = slow_call_duration
+        self.slow_rate_threshold = slow_rate_threshold
+        self.min_calls = min_calls
+        self.window = window
+        self.open_timeout = open_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.success_threshold = success_threshold
+
+        self.state = STATE_CLOSED
+        self.opened_at = 0.0
+        self.state_changed_at = time.time()
+        self.consecutive_failures = 0
+        self._half_open_inflight = 0
+        self._half_open_successes = 0
+        # 滑动窗口: (时间戳, 是否成功, 耗时)
+        self._calls: Deque[Tuple[float, bool, float]] = deque()
+
+        # 统计信息
+        self.total_calls = 0
+        self.total_failures = 0
+        self.rejected = 0
+        self.open_count = 0
+
+    def _transition(self, state: str, reason: str = "") -> None:
+        if state == self.state:
+            return
+        bot_logger.warning(f"[CircuitBreaker] {self.name}: {self.state} -> {state} {reason}".rstrip())
+        self.state = state
+        self.state_changed_at = time.time()
+        if state == STATE_OPEN:
+            self.opened_at = time.monotonic()
+            self.open_count += 1
+        elif state == STATE_CLOSED:
+            self.consecutive_failures = 0
+            self._calls.clear()
+        self._half_open_inflight = 0
+        self._half_open_successes = 0
+
+    def _trim(self, now: float) -> None:
+        while self._calls and now - self._calls[0][0] > self.window:
+            self._calls.popleft()
+
+    def _window_rates(self) -> Tuple[float, float]:
+        total = len(self._calls)
+        if not total:
+            return 0.0, 0.0
+        failures = sum(1 for _, ok, _ in self._calls if not ok)
+        slow = sum(1 for _, _, latency in self._calls if latency >= self.slow_call_duration)
+        return failures / total, slow / total
+
+    def allow_request(self) -> bool:
+        """是否放行请求；open 状态冷却结束后转入 half_open 并放行探测请求"""
+        if self.state == STATE_OPEN:
+            if time.monotonic() - self.opened_at < self.open_timeout:
+                self.rejected += 1
+                return False
+            self._transition(STATE_HALF_OPEN, "(冷却结束，开始探测)")
+
+        if self.state == STATE_HALF_OPEN:
+            if self._half_open_inflight >= self.half_open_max_calls:
+                self.rejected += 1
+                return False
+            self._half_open_inflight += 1
+        return True
+
+    def record(self, success: bool, latency: float) -> None:
+        """记录一次调用结果"""
+        now = time.monotonic()
+        self.total_calls += 1
+        if not success:
+            self.total_failures += 1
+
+        if self.state == STATE_HALF_OPEN:
+            self._half_open_inflight = max(self._half_open_inflight - 1, 0)
+            if not success:
+                self._transition(STATE_OPEN, "(探测失败)")
+                return
+            if latency >= self.slow_call_duration:
+                # 探测虽成功但仍然很慢，继续保持熔断
+                self._transition(STATE_OPEN, f"(探测耗时 {latency:.2f}s)")
+                return
+            self._half_open_successes += 1
+            if self._half_open_successes >= self.success_threshold:
+                self._transition(STATE_CLOSED, "(探测成功，恢复)")
+            return
+
+        if self.state == STATE_OPEN:
+            # 熔断前已发出的请求，结果不改变状态
+            return
+
+        self._calls.append((now, success, latency))
+        self._trim(now)
+        self.consecutive_failures = 0 if success else self.consecutive_failures + 1
+
+        if self.consecutive_failures >= self.failure_threshold:
+            self._transition(STATE_OPEN, f"(连续失败 {self.consecutive_failures} 次)")
+            return
+        if len(self._calls) >= self.min_calls:
+            error_rate, slow_rate = self._window_rates()
+            if error_rate >= self.error_rate_threshold:
+                self._transition(STATE_OPEN, f"(错误率 {error_rate:.0%})")
+            elif slow_rate >= self.slow_rate_threshold:
+                self._transition(STATE_OPEN, f"(慢调用率 {slow_rate:.0%})")
+
+    def release(self) -> None:
+        """请求未产生结果（如被取消）时归还半开状态的探测名额"""
+        if self.state == STATE_HALF_OPEN:
+            self._half_open_inflight = max(self._half_open_inflight - 1, 0)
+
+    def get_stats(self) -> Dict[str, float]:
+        """返回熔断器状态与统计"""
+        self._trim(time.monotonic())
+        error_rate, slow_rate = self._window_rates()
+        return {
+            "state": self.state,
+            "state_changed_at": self.state_changed_at,
+            "consecutive_failures": self.consecutive_failures,
+            "window_calls": len(self._calls),
+            "error_rate": round(error_rate, 3),
+            "slow_rate": round(slow_rate, 3),
+            "total_calls": self.total_calls,
+            "total_failures": self.total_failures,
+            "rejected": self.rejected,
+            "open_count": self.open_count,
+        }
+
+
+class CircuitBreakerRegistry:
+    """按主机管理熔断器"""
+
+    def __init__(self, **options):
+        self.options = options
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, url: str) -> CircuitBreaker:
+        """获取（必要时创建）URL 所属主机的熔断器"""
+        host = urlsplit(url).netloc or url
+        breaker = self._breakers.get(host)
+        if breaker is None:
+            breaker = CircuitBreaker(host, **self.options)
+            self._breakers[host] = breaker
+        return breaker
+
+    def reset(self) -> None:
+        """清空所有熔断器，恢复初始状态"""
+        self._breakers.clear()
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """返回所有主机的熔断器状态"""
+        return {host: breaker.get_stats() for host, breaker in self._breakers.items()}
+
+
+def _breaker_options() -> Dict[str, float]:
+    options = settings.API_CIRCUIT_BREAKER or {}
+    allowed = (
+        "failure_threshold", "error_rate_threshold", "slow_call_duration", "slow_rate_threshold",
+        "min_calls", "window", "open_timeout", "half_open_max_calls", "success_threshold",
+    )
+    return {key: options[key] for key in allowed if key in options}
+
+
+# 全局实例
+circuit_breakers = CircuitBreakerRegistry(**_breaker_options())
@@ -54,11 +54,32 @@ class Settings:
     API_TIMEOUT = _config.get("api", {}).get("timeout", 30)  # API超时时间(秒)
     API_MESSAGE = _config.get("api", {}).get("message", "欢迎使用 THE FINALS BOT API")
     API_TV_VER = _config.get("api", {}).get("tv_ver", "1.0.0")
+    API_RATE_LIMIT_RATE = _config.get("api", {}).get("rate_limit", {}).get("rate", 10)  # 每个主机每秒补充的令牌数
+    API_RATE_LIMIT_BURST = _config.get("api", {}).get("rate_limit", {}).get("burst", 20)  # 每个主机允许的突发请求数
+    API_RATE_LIMIT_HOSTS = _config.get("api", {}).get("rate_limit", {}).get("hosts", {}) or {}  # 按主机覆盖的限流参数
+    API_CACHE_COMPRESSION_ENABLED = _config.get("api", {}).get("cache_compression", {}).get("enabled", True)  # 是否压缩响应缓存
+    API_CACHE_COMPRESSION_CODEC = _config.get("api", {}).get("cache_compression", {}).get("codec", "auto")  # auto/zstd/zlib
+    API_CACHE_COMPRESSION_THRESHOLD = _config.get("api", {}).get("cache_compression", {}).get("threshold", 1024)  # 压缩阈值(字节)
+    API_CACHE_COMPRESSION_LEVEL = _config.get("api", {}).get("cache_compression", {}).get("level", None)  # 压缩级别，留空使用默认
+    API_CIRCUIT_BREAKER = _config.get("api", {}).get("circuit_breaker", {}) or {}  # 上游熔断器参数
+    API_HEDGING = _config.get("api", {}).get("hedging", {}) or {}  # 对冲请求参数
+    API_L0_CACHE_MAX_ENTRIES = _config.get("api", {}).get("l0_cache", {}).get("max_entries", 64)  # 进程内缓存最大条目数
+    API_L0_CACHE_MAX_BYTES = _config.get("api", {}).get("l0_cache", {}).get("max_mb", 64) * 1024 * 1024  # 进程内缓存最大容量
+    ME_SOURCE_TIMEOUTS = _config.get("me", {}).get("timeouts", {}) or {}  # /me 各数据源的截止时间(秒)
+    
+    # HTTP 客户端配置 (进程级共享，按主机划分连接池)
+    HTTP_CLIENT_TIMEOUT = _config.get("http_client", {}).get("timeout", 30)  # 默认总超时(秒)
+    HTTP_CLIENT_CONNECT_TIMEOUT = _config.get("http_client", {}).get("connect_timeout", 5)  # 建连超时(秒)
+    HTTP_CLIENT_MAX_CONNECTIONS = _config.get("http_client", {}).get("max_connections", 20)  # 每个主机最大连接数
+    HTTP_CLIENT_MAX_KEEPALIVE = _config.get("http_client", {}).get("max_keepalive", 10)  # 每个主机最大空闲连接数
+    HTTP_CLIENT_KEEPALIVE_EXPIRY = _config.get("http_client", {}).get("keepalive_expiry", 30)  # 空闲连接保持时间(秒)
+    HTTP_CLIENT_HTTP2 = _config.get("http_client", {}).get("http2", True)  # 是否启用HTTP/2 (需要安装 h2)
     
     # 服务器配置
     SERVER_API_ENABLED = _config.get("server", {}).get("api", {}).get("enabled", True)
     SERVER_API_HOST = _config.get("server", {}).get("api", {}).get("host", "127.0.0.1")
     SERVER_API_PORT = _config.get("server", {}).get("api", {}).get("port", 8000)
+    SERVER_API_METRICS_PUBLIC = _config.get("server", {}).get("api", {}).get("metrics_public", False)  # 是否允许非本机抓取 /metrics
     SERVER_API_EXTERNAL_URL = _config.get("server", {}).get("api", {}).get("external_url", f"http://{SERVER_API_HOST}:{SERVER_API_PORT}")
     
     # 赛季配置
@@ -76,6 +97,18 @@ class Settings:
     IMAGE_STORAGE_PATH = _config.get("image", {}).get("storage", {}).get("path", "static/temp_images")
     IMAGE_LIFETIME = _config.get("image", {}).get("storage", {}).get("lifetime", 24)
     IMAGE_CLEANUP_INTERVAL = _config.get("image", {}).get("storage", {}).get("cleanup_interval", 1)
+    IMAGE_RENDER_CACHE_ENABLED = _config.get("image", {}).get("render_cache", {}).get("enabled", True)  # 是否缓存渲染结果
+    IMAGE_RENDER_CACHE_MAX_ENTRIES = _config.get("image", {}).get("render_cache", {}).get("max_entries", 128)  # 进程内最大条目数
+    IMAGE_RENDER_CACHE_MAX_BYTES = _config.get("image", {}).get("render_cache", {}).get("max_mb", 32) * 1024 * 1024  # 进程内最大容量
+    IMAGE_RENDER_CACHE_TTL = _config.get("image", {}).get("render_cache", {}).get("ttl", 600)  # 缓存有效期(秒)
+    IMAGE_RENDER_CACHE_REDIS = _config.get("image", {}).get("render_cache", {}).get("redis", True)  # 是否同时缓存到 Redis
+    IMAGE_PAGE_POOL = _config.get("image", {}).get("page_pool", {}) or {}  # 浏览器页面池伸缩参数
+    IMAGE_RENDER_QUEUE = _config.get("image", {}).get("render_queue", {}) or {}  # 渲染队列长度上限
+    IMAGE_PRERENDER = _config.get("image", {}).get("prerender", {}) or {}  # 数据刷新后预渲染热门卡片
+    IMAGE_DATA_INJECTION_ENABLED = _config.get("image", {}).get("data_injection", {}).get("enabled", True)  # 是否启用数据注入渲染
+    IMAGE_ASSETS_IN_MEMORY = _config.get("image", {}).get("assets", {}).get("in_memory", True)  # 是否从内存提供模板静态资源
+    IMAGE_ASSETS_MAX_FILE_BYTES = _config.get("image", {}).get("assets", {}).get("max_file_mb", 8) * 1024 * 1024  # 单个资源常驻内存的上限
+    IMAGE_DATA_INJECTION_TEMPLATES = _config.get("image", {}).get("data_injection", {}).get("templates", ["rank.html", "me.html", "club_info.html", "world_tour.html"])  # 使用数据注入的模板
     
     # Redis 配置
     REDIS_HOST = _config.get("redis", {}).get("host", "127.0.0.1")
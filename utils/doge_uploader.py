@@ -3,6 +3,7 @@ import httpx
 import uuid
 from hashlib import sha1
 from utils.logger import bot_logger
+from utils.http_client import http_clients
 
 class DogeUploader:
     """多吉云OSS上传器，用于本地开发模式"""
@@ -34,27 +35,27 @@ class DogeUploader:
         headers = self._generate_auth_header(api_path, image_data)
         headers["Content-Type"] = "image/png" # 假设都为png
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(
-                    url=self.BASE_URL + api_path,
-                    headers=headers,
-                    content=image_data,
-                    timeout=30.0
-                )
-                response.raise_for_status()
-                data = response.json()
+        client = http_clients.get_client(self.BASE_URL)
+        try:
+            response = await client.post(
+                url=self.BASE_URL + api_path,
+                headers=headers,
+                content=image_data,
+                timeout=30.0
+            )
+            response.raise_for_status()
+            data = response.json()
 
-                if data.get("code") == 200:
-                    public_url = f"{self.PUBLIC_URL}/{filename}"
-                    bot_logger.info(f"图片成功上传到多吉云: {public_url}")
-                    return public_url
-                else:
-                    bot_logger.error(f"多吉云API错误: code={data.get('code')}, msg={data.get('msg')}")
-                    return None
-            except httpx.HTTPStatusError as e:
-                bot_logger.error(f"上传到多吉云时发生HTTP错误: {e.response.status_code} - {e.response.text}")
+            if data.get("code") == 200:
+                public_url = f"{self.PUBLIC_URL}/{filename}"
+                bot_logger.info(f"图片成功上传到多吉云: {public_url}")
+                return public_url
+            else:
+                bot_logger.error(f"多吉云API错误: code={data.get('code')}, msg={data.get('msg')}")
                 return None
-            except Exception as e:
-                bot_logger.error(f"上传到多吉云时发生未知错误: {e}", exc_info=True)
-                return None 
\ No newline at end of file
+        except httpx.HTTPStatusError as e:
+            bot_logger.error(f"上传到多吉云时发生HTTP错误: {e.response.status_code} - {e.response.text}")
+            return None
+        except Exception as e:
+            bot_logger.error(f"上传到多吉云时发生未知错误: {e}", exc_info=True)
+            return None 
\ No newline at end of file
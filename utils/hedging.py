@@ -0,0 +1,102 @@
+"""
+对冲请求 (hedged requests) 策略
+
+主源在 p95 延迟内仍未响应时，向备用源补发一次相同的 GET，先返回者胜出。
+补发次数受预算限制：每个可对冲请求积累 ratio 个额度，每次补发消耗 1 个，
+因此额外负载不会超过流量的 ratio 比例。
+"""
+
+from collections import deque
+from typing import Deque, Dict
+from urllib.parse import urlsplit
+
+from utils.config import settings
+
+
+class HedgePolicy:
+    """记录各主机延迟分布，计算对冲延迟并控制补发预算"""
+
+    def __init__(
+        self,
+        ratio: float = 0.05,
+        max_budget: float = 10.0,
+        default_delay: float = 1.0,
+        min_delay: float = 0.05,
+        max_delay: float = 3.0,
+        min_samples: int = 20,
+        sample_size: int = 200,
+    ):
+        self.ratio = ratio
+        self.max_budget = max_budget
+        self.default_delay = default_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.min_samples = min_samples
+        self.sample_size = sample_size
+
+        self._budget = 1.0
+        self._latencies: Dict[str, Deque[float]] = {}
+
+        # 统计信息
+        self._stats = {"eligible": 0, "hedged": 0, "hedge_wins": 0, "budget_denied": 0}
+
+    @staticmethod
+    def _host(url: str) -> str:
+        return urlsplit(url).netloc or url
+
+    def observe(self, url: str, latency: float) -> None:
+        """记录一次成功请求的耗时"""
+        host = self._host(url)
+        samples = self._latencies.get(host)
+        if samples is None:
+            samples = self._latencies[host] = deque(maxlen=self.sample_size)
+        samples.append(latency)
+
+    def get_p95(self, url: str) -> float:
+        """返回主机最近请求的 p95 延迟；样本不足时返回 0"""
+        samples = self._latencies.get(self._host(url))
+        if not samples or len(samples) < self.min_samples:
+            return 0.0
+        ordered = sorted(samples)
+        return ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)]
+
+    def get_delay(self, url: str) -> float:
+        """返回补发对冲请求前的等待时间"""
+        p95 = self.get_p95(url) or self.default_delay
+        return min(max(p95, self.min_delay), self.max_delay)
+
+    def note_request(self) -> None:
+        """记录一个可对冲的请求，并积累补发额度"""
+        self._stats["eligible"] += 1
+        self._budget = min(self._budget + self.ratio, self.max_budget)
+
+    def try_acquire(self) -> bool:
+        """尝试消耗一次补发额度"""
+        if self._budget < 1:
+            self._stats["budget_denied"] += 1
+            return False
+        self._budget -= 1
+        self._stats["hedged"] += 1
+        return True
+
+    def note_hedge_win(self) -> None:
+        """记录对冲请求先于主请求返回"""
+        self._stats["hedge_wins"] += 1
+
+    def get_stats(self) -> Dict[str, float]:
+        """返回对冲统计与各主机 p95 延迟"""
+        stats = dict(self._stats)
+        stats["budget"] = round(self._budget, 2)
+        stats["hedge_rate"] = round(stats["hedged"] / stats["eligible"], 4) if stats["eligible"] else 0.0
+        stats["p95"] = {host: round(self.get_p95(host), 3) for host in self._latencies}
+        return stats
+
+
+def _hedge_options() -> Dict[str, float]:
+    options = settings.API_HEDGING or {}
+    allowed = ("ratio", "max_budget", "default_delay", "min_delay", "max_delay", "min_samples")
+    return {key: options[key] for key in allowed if key in options}
+
+
+# 全局实例
+hedge_policy = HedgePolicy(**_hedge_options())
@@ -0,0 +1,155 @@
+"""
+进程级 HTTP 客户端注册表
+
+所有模块通过同一个注册表获取 httpx.AsyncClient：
+* 每个上游主机一个客户端（即独立的 keep-alive 连接池），跨模块复用连接与 TLS 会话
+* 安装了 h2 时启用 HTTP/2，上游不支持时自动协商回 HTTP/1.1
+* 统一的超时与连接数限制
+* 通过 httpcore 的 trace 扩展统计新建连接数，得出各主机的连接复用率
+* 代理取自 HTTP_PROXY (其次 HTTPS_PROXY) 环境变量，所有上游共用
+"""
+
+import asyncio
+import os
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+from utils.logger import bot_logger
+from utils.config import settings
+
+try:
+    import h2  # noqa: F401  (httpx 的 HTTP/2 支持依赖 h2)
+    HTTP2_AVAILABLE = True
+except ImportError:  # 可选依赖
+    HTTP2_AVAILABLE = False
+
+
+def get_proxy_url() -> Optional[str]:
+    """返回代理地址：HTTP_PROXY 优先，其次 HTTPS_PROXY，均未设置时为 None"""
+    return os.getenv("HTTP_PROXY") or os.getenv("HTTPS_PROXY") or None
+
+
+class HTTPClientRegistry:
+    """按主机管理共享的 httpx.AsyncClient"""
+
+    def __init__(
+        self,
+        timeout: float = 30.0,
+        connect_timeout: float = 5.0,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 30.0,
+        http2: bool = True,
+    ):
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.http2 = http2 and HTTP2_AVAILABLE
+        if http2 and not HTTP2_AVAILABLE:
+            bot_logger.info("[HTTPClientRegistry] 未安装 h2，使用 HTTP/1.1")
+
+        self._clients: Dict[Tuple[str, bool], httpx.AsyncClient] = {}
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def _origin(url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}" if parts.netloc else url
+
+    def _host_stats(self, host: str) -> Dict[str, Any]:
+        stats = self._stats.get(host)
+        if stats is None:
+            stats = self._stats[host] = {
+                "requests": 0,
+                "new_connections": 0,
+                "tls_handshakes": 0,
+                "http_versions": {},
+            }
+        return stats
+
+    def _make_hooks(self, origin: str) -> Dict[str, list]:
+        stats = self._host_stats(urlsplit(origin).netloc or origin)
+
+        async def trace(event_name: str, info: Dict[str, Any]) -> None:
+            if event_name == "connection.connect_tcp.complete":
+                stats["new_connections"] += 1
+            elif event_name == "connection.start_tls.complete":
+                stats["tls_handshakes"] += 1
+
+        async def on_request(request: httpx.Request) -> None:
+            stats["requests"] += 1
+            request.extensions.setdefault("trace", trace)
+
+        async def on_response(response: httpx.Response) -> None:
+            versions = stats["http_versions"]
+            versions[response.http_version] = versions.get(response.http_version, 0) + 1
+
+        return {"request": [on_request], "response": [on_response]}
+
+    def get_client(self, url: str, verify: bool = True) -> httpx.AsyncClient:
+        """获取 URL 所属主机的共享客户端，按 (主机, verify) 区分"""
+        origin = self._origin(url)
+        key = (origin, verify)
+        client = self._clients.get(key)
+        if client is None or client.is_closed:
+            config = {
+                "timeout": self.timeout,
+                "limits": self.limits,
+                "http2": self.http2,
+                "verify": verify,
+                "follow_redirects": True,
+                "event_hooks": self._make_hooks(origin),
+            }
+            proxy_url = get_proxy_url()
+            if proxy_url:
+                try:
+                    client = httpx.AsyncClient(proxy=proxy_url, **config)
+                except TypeError:
+                    # 旧版本 httpx 的代理参数
+                    client = httpx.AsyncClient(proxies=proxy_url, **config)
+            else:
+                client = httpx.AsyncClient(**config)
+            self._clients[key] = client
+            bot_logger.debug(
+                f"[HTTPClientRegistry] 创建客户端: {origin} (http2={self.http2}, verify={verify}, proxy={bool(proxy_url)})"
+            )
+        return client
+
+    async def close_all(self) -> None:
+        """关闭所有客户端"""
+        async with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+        for client in clients:
+            if not client.is_closed:
+                await client.aclose()
+        bot_logger.debug("[HTTPClientRegistry] 所有HTTP客户端已关闭")
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """返回各主机的请求数、新建连接数与连接复用率"""
+        result = {}
+        for host, stats in self._stats.items():
+            requests = stats["requests"]
+            result[host] = {
+                **stats,
+                "http_versions": dict(stats["http_versions"]),
+                "reuse_ratio": round(1 - stats["new_connections"] / requests, 4) if requests else 0.0,
+            }
+        return result
+
+
+# 全局实例
+http_clients = HTTPClientRegistry(
+    timeout=settings.HTTP_CLIENT_TIMEOUT,
+    connect_timeout=settings.HTTP_CLIENT_CONNECT_TIMEOUT,
+    max_connections=settings.HTTP_CLIENT_MAX_CONNECTIONS,
+    max_keepalive_connections=settings.HTTP_CLIENT_MAX_KEEPALIVE,
+    keepalive_expiry=settings.HTTP_CLIENT_KEEPALIVE_EXPIRY,
+    http2=settings.HTTP_CLIENT_HTTP2,
+)
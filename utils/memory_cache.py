@@ -0,0 +1,201 @@
+"""
+进程内 LRU 缓存
+
+按条目数和总字节数双重限制容量，每个条目带独立的过期时间，淘汰为 O(1)。
+* LRUCache: 同步缓存，用作 Redis 之前的 L0 缓存、绑定缓存、冷却与限流计数等
+* AsyncCache / async_cached: 在 LRUCache 之上加入异步加载的合并 (single-flight)，
+  相同 key 的并发未命中只调用一次加载函数
+
+指定 name 的缓存会登记到进程级注册表，命中统计可通过本地 API 服务器的 /metrics 查看。
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+# name -> 缓存实例 (同名时以最后创建的为准)
+_registry: Dict[str, Any] = {}
+
+
+class LRUCache:
+    """带过期时间与字节上限的 LRU 缓存（仅在事件循环线程内使用，无需加锁）"""
+
+    def __init__(self, max_entries: int = 64, max_bytes: int = 64 * 1024 * 1024, name: Optional[str] = None):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # key -> (value, size, expires_at)
+        self._data: "OrderedDict[Hashable, Tuple[Any, int, float]]" = OrderedDict()
+        self._bytes = 0
+
+        # 统计信息
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if name:
+            _registry[name] = self
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """读取未过期的条目，并标记为最近使用"""
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        value, _, expires_at = item
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """读取未过期的条目，不影响 LRU 顺序与命中统计"""
+        item = self._data.get(key)
+        if item is None or item[2] <= time.monotonic():
+            return None
+        return item[0]
+
+    def set(self, key: Hashable, value: Any, ttl: float, size: int = 0) -> None:
+        """写入条目；单个条目超过字节上限时不缓存"""
+        if key in self._data:
+            self._remove(key)
+        if ttl <= 0 or size > self.max_bytes:
+            return
+        self._data[key] = (value, size, time.monotonic() + ttl)
+        self._bytes += size
+        while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._data))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        """删除条目"""
+        if key in self._data:
+            self._remove(key)
+
+    def clear(self) -> None:
+        """清空缓存"""
+        self._data.clear()
+        self._bytes = 0
+
+    def _remove(self, key: Hashable) -> None:
+        _, size, _ = self._data.pop(key)
+        self._bytes -= size
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """返回命中率与容量使用情况"""
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+class AsyncCache:
+    """
+    带合并加载的异步缓存
+
+    get_or_load 未命中时调用加载函数并缓存结果；同一 key 的并发未命中共享同一个加载任务。
+    加载函数抛出异常或返回 None 时不缓存。
+    """
+
+    def __init__(
+        self, ttl: float, max_entries: int = 128, max_bytes: int = 64 * 1024 * 1024,
+        name: Optional[str] = None, sizeof: Optional[Callable[[Any], int]] = None,
+    ):
+        self.ttl = ttl
+        self.sizeof = sizeof
+        self._lru = LRUCache(max_entries=max_entries, max_bytes=max_bytes)
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.coalesced = 0
+        if name:
+            _registry[name] = self
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """读取缓存，未命中时加载"""
+        value = self._lru.get(key)
+        if value is not None:
+            return value
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._load(key, loader))
+            self._inflight[key] = task
+
+            def _on_done(t: asyncio.Task, key=key):
+                if self._inflight.get(key) is t:
+                    del self._inflight[key]
+                # 所有调用方都已取消时，避免出现 "exception was never retrieved"
+                if not t.cancelled():
+                    t.exception()
+
+            task.add_done_callback(_on_done)
+        else:
+            self.coalesced += 1
+
+        # shield: 单个调用方被取消时不影响共享的加载任务
+        return await asyncio.shield(task)
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        value = await loader()
+        if value is not None:
+            size = self.sizeof(value) if self.sizeof else 0
+            self._lru.set(key, value, self.ttl, size)
+        return value
+
+    def invalidate(self, key: Hashable) -> None:
+        """删除条目"""
+        self._lru.delete(key)
+
+    def clear(self) -> None:
+        """清空缓存"""
+        self._lru.clear()
+
+    def __len__(self) -> int:
+        return len(self._lru)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """返回命中率、容量与合并统计"""
+        return {**self._lru.get_stats(), "coalesced": self.coalesced, "inflight": len(self._inflight)}
+
+
+def async_cached(
+    ttl: float, key: Optional[Callable[..., Hashable]] = None, max_entries: int = 128,
+    max_bytes: int = 64 * 1024 * 1024, name: Optional[str] = None,
+    sizeof: Optional[Callable[[Any], int]] = None,
+):
+    """
+    异步函数结果缓存装饰器
+
+    key 接收与被装饰函数相同的参数并返回缓存键；用于方法时应在 key 中去掉 self，
+    使所有实例共享缓存。未指定时以全部位置参数与关键字参数作为键。
+    缓存实例可通过被装饰函数的 cache 属性访问。
+    """
+    def decorator(func):
+        cache = AsyncCache(ttl, max_entries=max_entries, max_bytes=max_bytes, name=name or func.__qualname__, sizeof=sizeof)
+
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            cache_key = key(*args, **kwargs) if key else (args, tuple(sorted(kwargs.items())))
+            return await cache.get_or_load(cache_key, lambda: func(*args, **kwargs))
+
+        wrapper.cache = cache
+        return wrapper
+    return decorator
+
+
+def get_all_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """返回所有具名缓存的统计"""
+    return {name: cache.get_stats() for name, cache in _registry.items()}
@@ -0,0 +1,192 @@
+"""
+上游请求指标
+
+按端点模板 (如 /v1/leaderboard/{season}worldtour/{platform}) 汇总：
+* 延迟直方图
+* 状态码计数 (含 304) 与传输字节数
+* async_retry 触发的重试次数
+* 缓存命中结果：hit (fresh) / stale / miss / fallback (上游失败时返回旧数据)
+
+数据保存在进程级注册表中，可通过本地 API 服务器的 /metrics 以 Prometheus 文本格式抓取。
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# 延迟直方图的桶上限 (秒)
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CACHE_OUTCOMES = ("hit", "stale", "miss", "fallback")
+
+_SEASON_SEGMENT = re.compile(r"^(?:cb|s)\d+")
+_PLATFORMS = {"crossplay", "steam", "xbox", "psn"}
+
+
+def endpoint_template(endpoint: str) -> str:
+    """把具体端点归一化为模板：去掉查询串，赛季前缀替换为 {season}，平台替换为 {platform}，数字替换为 {id}"""
+    path = endpoint.split("?", 1)[0]
+    segments = []
+    for segment in path.split("/"):
+        if segment in _PLATFORMS:
+            segment = "{platform}"
+        elif segment.isdigit():
+            segment = "{id}"
+        else:
+            segment = _SEASON_SEGMENT.sub("{season}", segment)
+        segments.append(segment)
+    return "/".join(segments) or "/"
+
+
+class Histogram:
+    """累积桶直方图 (与 Prometheus histogram 语义一致)"""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # 最后一个为 +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.total += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """返回 (le, 累计数) 列表"""
+        result, running = [], 0
+        for bound, count in zip(self.buckets, self.counts):
+            running += count
+            result.append((repr(bound), running))
+        result.append(("+Inf", running + self.counts[-1]))
+        return result
+
+    def quantile(self, q: float) -> float:
+        """按桶估算分位数 (返回所在桶的上限；落在 +Inf 桶时返回最大有限上限)"""
+        if not self.count:
+            return 0.0
+        target, running = q * self.count, 0
+        for bound, count in zip(self.buckets, self.counts):
+            running += count
+            if running >= target:
+                return bound
+        return self.buckets[-1] if self.buckets else 0.0
+
+
+class UpstreamMetrics:
+    """按端点模板记录上游请求指标的进程级注册表"""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._endpoints: Dict[str, Dict[str, Any]] = {}
+
+    def _get(self, endpoint: str) -> Dict[str, Any]:
+        template = endpoint_template(endpoint)
+        metrics = self._endpoints.get(template)
+        if metrics is None:
+            metrics = self._endpoints[template] = {
+                "latency": Histogram(self.buckets),
+                "status": {},
+                "retries": 0,
+                "bytes": 0,
+                "cache": dict.fromkeys(CACHE_OUTCOMES, 0),
+            }
+        return metrics
+
+    def observe_response(self, endpoint: str, status: int, latency: float, size: int = 0) -> None:
+        """记录一次上游响应"""
+        metrics = self._get(endpoint)
+        metrics["latency"].observe(latency)
+        key = str(status)
+        metrics["status"][key] = metrics["status"].get(key, 0) + 1
+        metrics["bytes"] += size
+
+    def observe_error(self, endpoint: str, latency: float) -> None:
+        """记录一次未拿到响应的请求 (超时、连接失败等)，状态码记为 error"""
+        metrics = self._get(endpoint)
+        metrics["latency"].observe(latency)
+        metrics["status"]["error"] = metrics["status"].get("error", 0) + 1
+
+    def observe_retry(self, endpoint: str) -> None:
+        """记录一次重试"""
+        self._get(endpoint)["retries"] += 1
+
+    def observe_cache(self, endpoint: str, outcome: str) -> None:
+        """记录一次缓存查询结果 (hit / stale / miss / fallback)"""
+        self._get(endpoint)["cache"][outcome] += 1
+
+    def reset(self) -> None:
+        """清空所有指标"""
+        self._endpoints.clear()
+
+    def get_stats(self, endpoint: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """返回各端点模板的指标摘要；指定 endpoint 时只返回该端点所属模板"""
+        templates = [endpoint_template(endpoint)] if endpoint else list(self._endpoints)
+        result = {}
+        for template in templates:
+            metrics = self._endpoints.get(template)
+            if metrics is None:
+                continue
+            latency: Histogram = metrics["latency"]
+            status = metrics["status"]
+            cache = metrics["cache"]
+            lookups = sum(cache.values())
+            result[template] = {
+                "requests": latency.count,
+                "status": dict(status),
+                "retries": metrics["retries"],
+                "bytes": metrics["bytes"],
+                "not_modified_ratio": round(status.get("304", 0) / latency.count, 4) if latency.count else 0.0,
+                "latency_avg": round(latency.total / latency.count, 4) if latency.count else 0.0,
+                "latency_p50": latency.quantile(0.5),
+                "latency_p95": latency.quantile(0.95),
+                "cache": dict(cache),
+                "cache_hit_ratio": round((cache["hit"] + cache["stale"]) / lookups, 4) if lookups else 0.0,
+            }
+        return result
+
+    def render_prometheus(self) -> str:
+        """以 Prometheus 文本格式输出全部指标"""
+        lines = [
+            "# HELP upstream_request_duration_seconds Upstream request latency",
+            "# TYPE upstream_request_duration_seconds histogram",
+        ]
+        for template, metrics in self._endpoints.items():
+            latency: Histogram = metrics["latency"]
+            label = f'endpoint="{template}"'
+            for le, count in latency.cumulative():
+                lines.append(f'upstream_request_duration_seconds_bucket{{{label},le="{le}"}} {count}')
+            lines.append(f"upstream_request_duration_seconds_sum{{{label}}} {latency.total:.6f}")
+            lines.append(f"upstream_request_duration_seconds_count{{{label}}} {latency.count}")
+
+        lines += ["# HELP upstream_responses_total Upstream responses by status code",
+                  "# TYPE upstream_responses_total counter"]
+        for template, metrics in self._endpoints.items():
+            for status, count in metrics["status"].items():
+                lines.append(f'upstream_responses_total{{endpoint="{template}",status="{status}"}} {count}')
+
+        lines += ["# HELP upstream_retries_total Retries issued by async_retry",
+                  "# TYPE upstream_retries_total counter"]
+        for template, metrics in self._endpoints.items():
+            lines.append(f'upstream_retries_total{{endpoint="{template}"}} {metrics["retries"]}')
+
+        lines += ["# HELP upstream_response_bytes_total Upstream response body bytes",
+                  "# TYPE upstream_response_bytes_total counter"]
+        for template, metrics in self._endpoints.items():
+            lines.append(f'upstream_response_bytes_total{{endpoint="{template}"}} {metrics["bytes"]}')
+
+        lines += ["# HELP upstream_cache_lookups_total Response cache lookups by outcome",
+                  "# TYPE upstream_cache_lookups_total counter"]
+        for template, metrics in self._endpoints.items():
+            for outcome, count in metrics["cache"].items():
+                lines.append(f'upstream_cache_lookups_total{{endpoint="{template}",outcome="{outcome}"}} {count}')
+
+        return "\n".join(lines) + "\n"
+
+
+# 全局实例
+upstream_metrics = UpstreamMetrics()
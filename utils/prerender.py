@@ -0,0 +1,131 @@
+"""
+热门卡片预渲染
+
+有些卡片只取决于刷新后的数据，与发起查询的用户无关 (底分卡片、排行榜前几名、武器排行榜、热门俱乐部)。
+插件把生成这些卡片的函数按数据源注册到调度器，数据源刷新完成后调用 notify(source)，
+调度器在防抖延迟后以后台优先级 (utils/render_queue.py) 依次执行该数据源的任务，
+渲染结果写入渲染缓存 (utils/render_cache.py)，之后用户的同一查询直接命中缓存。
+
+* 任务复用命令本身的渲染路径，模板数据相同，缓存键也就相同
+* 防抖期间或执行期间的重复通知合并为一次 (执行期间收到的通知在本轮结束后再执行一轮)
+* 静态数据 (如武器) 没有刷新事件，按 interval 定期重新渲染，保证在缓存过期前续上
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+from utils.config import settings
+from utils.logger import bot_logger
+from utils.render_queue import PRIORITY_BACKGROUND, render_context
+
+PrerenderJob = Callable[[], Awaitable[Any]]
+
+
+class PrerenderScheduler:
+    """按数据源组织的预渲染任务调度器"""
+
+    def __init__(self, enabled: bool = True, debounce: float = 2.0, timeout: float = 60.0):
+        self.enabled = enabled
+        self.debounce = debounce
+        self.timeout = timeout
+        self._jobs: Dict[str, Dict[str, PrerenderJob]] = {}
+        self._pending: Dict[str, asyncio.Task] = {}
+        self._rerun: Set[str] = set()
+        self._periodic: Dict[str, asyncio.Task] = {}
+        self._stats = {"notifications": 0, "coalesced": 0, "runs": 0, "failures": 0}
+
+    def register(self, source: str, name: str, job: PrerenderJob, interval: Optional[float] = None) -> None:
+        """注册任务；job 返回 None 视为渲染失败。interval 不为空时另外按该间隔定期执行"""
+        self._jobs.setdefault(source, {})[name] = job
+        if interval and self.enabled and f"{source}/{name}" not in self._periodic:
+            self._periodic[f"{source}/{name}"] = asyncio.create_task(self._periodic_loop(source, name, interval))
+        bot_logger.debug(f"[Prerender] 已注册预渲染任务 {source}/{name}")
+
+    def unregister(self, source: str, name: str) -> None:
+        """移除任务及其定期执行"""
+        self._jobs.get(source, {}).pop(name, None)
+        task = self._periodic.pop(f"{source}/{name}", None)
+        if task:
+            task.cancel()
+
+    def notify(self, source: str) -> None:
+        """数据源刷新完成；在防抖延迟后执行该数据源的全部任务"""
+        if not self.enabled or not self._jobs.get(source):
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # 不在事件循环中 (如同步脚本中刷新数据)，无需预渲染
+            return
+        self._stats["notifications"] += 1
+        if source in self._pending:
+            self._stats["coalesced"] += 1
+            self._rerun.add(source)
+            return
+        self._pending[source] = loop.create_task(self._run_source(source))
+
+    async def _run_source(self, source: str) -> None:
+        try:
+            while True:
+                await asyncio.sleep(self.debounce)
+                self._rerun.discard(source)
+                for name, job in list(self._jobs.get(source, {}).items()):
+                    await self._run_job(source, name, job)
+                if source not in self._rerun:
+                    break
+        finally:
+            self._pending.pop(source, None)
+            self._rerun.discard(source)
+
+    async def _run_job(self, source: str, name: str, job: PrerenderJob) -> None:
+        """以后台优先级执行单个任务，失败只记录日志"""
+        try:
+            with render_context(timeout=self.timeout, priority=PRIORITY_BACKGROUND):
+                result = await job()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._stats["failures"] += 1
+            bot_logger.warning(f"[Prerender] 预渲染 {source}/{name} 失败: {e}")
+            return
+        if result is None:
+            self._stats["failures"] += 1
+            bot_logger.debug(f"[Prerender] 预渲染 {source}/{name} 未生成图片")
+        else:
+            self._stats["runs"] += 1
+            bot_logger.debug(f"[Prerender] 预渲染 {source}/{name} 完成")
+
+    async def _periodic_loop(self, source: str, name: str, interval: float) -> None:
+        while True:
+            job = self._jobs.get(source, {}).get(name)
+            if job is None:
+                break
+            await self._run_job(source, name, job)
+            await asyncio.sleep(interval)
+
+    async def stop(self) -> None:
+        """取消等待中与定期执行的任务"""
+        tasks = list(self._pending.values()) + list(self._periodic.values())
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        self._pending.clear()
+        self._periodic.clear()
+        self._rerun.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """返回任务数、通知/合并次数与执行结果"""
+        return {
+            "jobs": sum(len(jobs) for jobs in self._jobs.values()),
+            "pending": len(self._pending),
+            **self._stats,
+        }
+
+
+# 全局实例
+prerender_scheduler = PrerenderScheduler(
+    enabled=settings.IMAGE_PRERENDER.get("enabled", True),
+    debounce=settings.IMAGE_PRERENDER.get("debounce", 2),
+    timeout=settings.IMAGE_PRERENDER.get("timeout", 60),
+)
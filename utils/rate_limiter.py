@@ -0,0 +1,156 @@
+"""
+按上游主机划分的令牌桶限流器
+
+每个主机拥有独立的令牌桶，互不阻塞；上游返回 429/Retry-After 时，
+对应主机的令牌桶会暂停发放令牌直到退避结束。
+"""
+
+import asyncio
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+from utils.logger import bot_logger
+from utils.config import settings
+
+
+class TokenBucket:
+    """异步令牌桶：以 rate 个/秒的速度补充令牌，最多积累 burst 个"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = max(float(rate), 0.001)
+        self.capacity = max(int(burst), 1)
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+        # 同一主机的等待者按 FIFO 顺序获取令牌
+        self._lock = asyncio.Lock()
+
+        # 统计信息
+        self.acquired = 0
+        self.throttled = 0
+        self.total_wait = 0.0
+        self.penalties = 0
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self.updated_at
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated_at = now
+
+    async def acquire(self) -> float:
+        """获取一个令牌，返回等待的秒数"""
+        start = time.monotonic()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    break
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+        waited = time.monotonic() - start
+        self.acquired += 1
+        if waited > 0.001:
+            self.throttled += 1
+            self.total_wait += waited
+        return waited
+
+    def penalize(self, retry_after: float) -> None:
+        """上游要求退避时，暂停发放令牌并清空已积累的突发额度"""
+        until = time.monotonic() + max(retry_after, 0)
+        if until > self.blocked_until:
+            self.blocked_until = until
+        self.tokens = 0.0
+        self.updated_at = max(self.updated_at, self.blocked_until)
+        self.penalties += 1
+
+    def get_stats(self) -> Dict[str, float]:
+        """返回令牌桶统计"""
+        return {
+            "rate": self.rate,
+            "burst": self.capacity,
+            "tokens": round(self.tokens, 2),
+            "acquired": self.acquired,
+            "throttled": self.throttled,
+            "total_wait_s": round(self.total_wait, 3),
+            "penalties": self.penalties,
+            "blocked_for_s": round(max(self.blocked_until - time.monotonic(), 0), 3),
+        }
+
+
+class HostRateLimiter:
+    """按主机管理令牌桶"""
+
+    def __init__(self, rate: float, burst: int, host_overrides: Optional[Dict[str, Dict]] = None):
+        self.default_rate = rate
+        self.default_burst = burst
+        self.host_overrides = host_overrides or {}
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    @staticmethod
+    def get_host(url: str) -> str:
+        """从URL中提取主机名（含端口）"""
+        return urlsplit(url).netloc or url
+
+    def _get_limits(self, host: str) -> Tuple[float, int]:
+        override = self.host_overrides.get(host) or self.host_overrides.get(host.split(":")[0]) or {}
+        return override.get("rate", self.default_rate), override.get("burst", self.default_burst)
+
+    def get_bucket(self, url: str) -> TokenBucket:
+        """获取（必要时创建）URL 所属主机的令牌桶"""
+        host = self.get_host(url)
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            rate, burst = self._get_limits(host)
+            bucket = TokenBucket(rate, burst)
+            self._buckets[host] = bucket
+            bot_logger.debug(f"[RateLimiter] 为主机 {host} 创建令牌桶: rate={rate}/s, burst={burst}")
+        return bucket
+
+    async def acquire(self, url: str) -> float:
+        """为 URL 所属主机获取一个令牌"""
+        return await self.get_bucket(url).acquire()
+
+    def penalize(self, url: str, retry_after: float) -> None:
+        """根据上游的 429/Retry-After 暂停该主机的请求"""
+        host = self.get_host(url)
+        bot_logger.warning(f"[RateLimiter] 主机 {host} 要求退避 {retry_after:.1f} 秒")
+        self.get_bucket(url).penalize(retry_after)
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """返回所有主机的令牌桶统计"""
+        return {host: bucket.get_stats() for host, bucket in self._buckets.items()}
+
+
+def parse_retry_after(value: Optional[str], default: float = 1.0, maximum: float = 60.0) -> float:
+    """解析 Retry-After 头（秒数或 HTTP 日期），返回需要等待的秒数"""
+    if not value:
+        return default
+    value = value.strip()
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            retry_at = parsedate_to_datetime(value)
+            if retry_at.tzinfo is None:
+                retry_at = retry_at.replace(tzinfo=timezone.utc)
+            seconds = (retry_at - datetime.now(timezone.utc)).total_seconds()
+        except (TypeError, ValueError):
+            return default
+    return min(max(seconds, 0.0), maximum)
+
+
+# 全局实例
+host_rate_limiter = HostRateLimiter(
+    rate=settings.API_RATE_LIMIT_RATE,
+    burst=settings.API_RATE_LIMIT_BURST,
+    host_overrides=settings.API_RATE_LIMIT_HOSTS,
+)
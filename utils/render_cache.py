@@ -0,0 +1,130 @@
+"""
+渲染结果缓存
+
+以 (模板, 模板修改时间, 模板数据哈希, 视口与截图参数) 的哈希为键缓存截图 JPEG：
+* L1: 进程内 LRU (按条目数与字节数限制)
+* L2: Redis 二进制键 render:{key}，带过期时间，多进程/重启后仍可命中
+
+命中时完全跳过浏览器；相同键的并发渲染只执行一次。Redis 不可用时只使用 L1。
+交互请求合并到后台预渲染 (utils/prerender.py) 上时，后台渲染被丢弃则由交互请求自行渲染。
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from utils.config import settings
+from utils.logger import bot_logger
+from utils.memory_cache import LRUCache
+from utils.redis_manager import redis_manager
+from utils.render_queue import current_priority
+
+
+class RenderCache:
+    """两级截图缓存"""
+
+    REDIS_PREFIX = "render:"
+
+    def __init__(
+        self, max_entries: int = 128, max_bytes: int = 32 * 1024 * 1024, ttl: int = 600,
+        use_redis: bool = True, max_item_bytes: int = 2 * 1024 * 1024,
+    ):
+        self.ttl = ttl
+        self.use_redis = use_redis
+        self.max_item_bytes = max_item_bytes
+        self._l1 = LRUCache(max_entries=max_entries, max_bytes=max_bytes, name="render_l1")
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._inflight_priority: Dict[str, int] = {}
+        self._stats = {"l1_hits": 0, "l2_hits": 0, "misses": 0, "coalesced": 0, "stores": 0, "redis_errors": 0}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        """依次查询 L1 与 L2，L2 命中时回填 L1"""
+        data = self._l1.get(key)
+        if data is not None:
+            self._stats["l1_hits"] += 1
+            return data
+        if self.use_redis:
+            try:
+                data = await redis_manager._get_binary_client().get(self.REDIS_PREFIX + key)
+            except Exception as e:
+                self._stats["redis_errors"] += 1
+                bot_logger.debug(f"[RenderCache] 读取 Redis 失败: {e}")
+                data = None
+            if data is not None:
+                self._stats["l2_hits"] += 1
+                self._l1.set(key, data, self.ttl, len(data))
+                return data
+        self._stats["misses"] += 1
+        return None
+
+    async def set(self, key: str, data: bytes) -> None:
+        """写入两级缓存；超过单条上限的截图不缓存"""
+        if len(data) > self.max_item_bytes:
+            return
+        self._stats["stores"] += 1
+        self._l1.set(key, data, self.ttl, len(data))
+        if self.use_redis:
+            try:
+                await redis_manager._get_binary_client().set(self.REDIS_PREFIX + key, data, ex=self.ttl)
+            except Exception as e:
+                self._stats["redis_errors"] += 1
+                bot_logger.debug(f"[RenderCache] 写入 Redis 失败: {e}")
+
+    async def get_or_render(self, key: str, render: Callable[[], Awaitable[Optional[bytes]]]) -> Optional[bytes]:
+        """读取缓存，未命中时渲染并写入；渲染失败 (返回 None) 时不缓存"""
+        data = await self.get(key)
+        if data is not None:
+            return data
+
+        priority = current_priority()
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._render_and_store(key, render))
+            self._inflight[key] = task
+            self._inflight_priority[key] = priority
+
+            def _on_done(t: asyncio.Task, key=key):
+                if self._inflight.get(key) is t:
+                    del self._inflight[key]
+                    del self._inflight_priority[key]
+                # 所有调用方都已取消时，避免出现 "exception was never retrieved"
+                if not t.cancelled():
+                    t.exception()
+
+            task.add_done_callback(_on_done)
+        else:
+            self._stats["coalesced"] += 1
+            if priority < self._inflight_priority.get(key, priority):
+                # 共享的是更低优先级的渲染：它在开始前被丢弃时不应连带本请求失败
+                data = await asyncio.shield(task)
+                return data if data is not None else await render()
+
+        # shield: 单个调用方被取消时不影响共享的渲染任务
+        return await asyncio.shield(task)
+
+    async def _render_and_store(self, key: str, render: Callable[[], Awaitable[Optional[bytes]]]) -> Optional[bytes]:
+        data = await render()
+        if data:
+            await self.set(key, data)
+        return data
+
+    def clear(self) -> None:
+        """清空 L1 (L2 依赖过期时间淘汰)"""
+        self._l1.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """返回各级命中率与 L1 容量使用情况"""
+        stats: Dict[str, Any] = dict(self._stats)
+        lookups = stats["l1_hits"] + stats["l2_hits"] + stats["misses"]
+        stats["hit_ratio"] = round((stats["l1_hits"] + stats["l2_hits"]) / lookups, 4) if lookups else 0.0
+        stats["inflight"] = len(self._inflight)
+        stats["l1"] = self._l1.get_stats()
+        return stats
+
+
+# 全局实例
+render_cache = RenderCache(
+    max_entries=settings.IMAGE_RENDER_CACHE_MAX_ENTRIES,
+    max_bytes=settings.IMAGE_RENDER_CACHE_MAX_BYTES,
+    ttl=settings.IMAGE_RENDER_CACHE_TTL,
+    use_redis=settings.IMAGE_RENDER_CACHE_REDIS,
+)
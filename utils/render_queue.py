@@ -0,0 +1,140 @@
+"""
+渲染请求队列
+
+位于浏览器页面池 (utils/browser.py) 之前：没有空闲页面时，渲染请求按 (优先级, 截止时间, 先后顺序)
+排队，页面归还时交给优先级最高且尚未过期的请求。
+* 交互命令 (PRIORITY_INTERACTIVE) 优先于后台预渲染 (PRIORITY_BACKGROUND)
+* 已过截止时间的请求在开始渲染前丢弃 (入队时、排队中、分配页面时)，不再占用 Chromium
+* 队列长度有上限，后台请求另有更低的上限，为交互命令预留空间
+
+截止时间与优先级通过 render_context() 设置在上下文变量中，随调用链 (包括由其创建的任务) 传递，
+调用方无需逐层传参。
+"""
+
+import asyncio
+import contextlib
+import heapq
+import itertools
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+
+_deadline: ContextVar[Optional[float]] = ContextVar("render_deadline", default=None)
+_priority: ContextVar[int] = ContextVar("render_priority", default=PRIORITY_INTERACTIVE)
+
+
+class RenderDropped(Exception):
+    """渲染请求未开始即被丢弃 (reason: expired 已过截止时间 / full 队列已满)"""
+
+    def __init__(self, reason: str):
+        super().__init__(f"渲染请求已丢弃: {reason}")
+        self.reason = reason
+
+
+@contextlib.contextmanager
+def render_context(timeout: Optional[float] = None, priority: Optional[int] = None) -> Iterator[None]:
+    """在该上下文中发起的渲染使用 timeout 秒后的截止时间与指定优先级"""
+    tokens = []
+    if timeout is not None:
+        tokens.append((_deadline, _deadline.set(time.monotonic() + timeout)))
+    if priority is not None:
+        tokens.append((_priority, _priority.set(priority)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+def current_deadline() -> Optional[float]:
+    """当前上下文的截止时间 (time.monotonic)，未设置时为 None"""
+    return _deadline.get()
+
+
+def current_priority() -> int:
+    """当前上下文的渲染优先级 (数值越小越优先)"""
+    return _priority.get()
+
+
+class RenderQueue:
+    """按优先级与截止时间排序的等待队列，元素为等待页面的 Future"""
+
+    def __init__(self, max_length: int = 64, max_background: int = 16):
+        self.max_length = max_length
+        self.max_background = max_background
+        self._heap: List[Tuple[int, float, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._stats = {
+            "enqueued": 0, "dispatched": 0, "max_depth": 0,
+            "dropped_expired": 0, "dropped_full": 0,
+        }
+
+    def _pending(self) -> List[Tuple[int, float, int, asyncio.Future]]:
+        return [entry for entry in self._heap if not entry[3].done()]
+
+    def __len__(self) -> int:
+        return len(self._pending())
+
+    def drop(self, reason: str) -> RenderDropped:
+        """记录一次丢弃并返回对应的异常"""
+        self._stats[f"dropped_{reason}"] += 1
+        return RenderDropped(reason)
+
+    def push(self, waiter: asyncio.Future, priority: int, deadline: Optional[float]) -> None:
+        """入队；已过期或队列已满时抛出 RenderDropped"""
+        if deadline is not None and deadline <= time.monotonic():
+            raise self.drop("expired")
+        self._expire()
+        pending = self._pending()
+        if len(pending) >= self.max_length or (
+            priority >= PRIORITY_BACKGROUND
+            and sum(1 for entry in pending if entry[0] >= PRIORITY_BACKGROUND) >= self.max_background
+        ):
+            raise self.drop("full")
+        heapq.heappush(self._heap, (priority, deadline if deadline is not None else float("inf"), next(self._seq), waiter))
+        self._stats["enqueued"] += 1
+        self._stats["max_depth"] = max(self._stats["max_depth"], len(pending) + 1)
+
+    def _expire(self) -> None:
+        """让已过期的等待者失败，并清理已完成 (已分配或已取消) 的条目"""
+        now = time.monotonic()
+        for _, deadline, _, waiter in self._heap:
+            if not waiter.done() and deadline <= now:
+                waiter.set_exception(self.drop("expired"))
+        self._heap = [entry for entry in self._heap if not entry[3].done()]
+        heapq.heapify(self._heap)
+
+    def pop(self) -> Optional[asyncio.Future]:
+        """取出优先级最高且未过期的等待者；过期的等待者在此处失败"""
+        now = time.monotonic()
+        while self._heap:
+            _, deadline, _, waiter = heapq.heappop(self._heap)
+            if waiter.done():
+                continue
+            if deadline <= now:
+                waiter.set_exception(self.drop("expired"))
+                continue
+            self._stats["dispatched"] += 1
+            return waiter
+        return None
+
+    def fail_all(self, exc: Exception) -> None:
+        """关闭时让所有等待者失败"""
+        for *_, waiter in self._heap:
+            if not waiter.done():
+                waiter.set_exception(exc)
+        self._heap = []
+
+    def get_stats(self) -> Dict[str, Any]:
+        """返回队列深度 (按优先级)、入队/分配次数与丢弃次数"""
+        pending = self._pending()
+        return {
+            "depth": len(pending),
+            "depth_interactive": sum(1 for entry in pending if entry[0] < PRIORITY_BACKGROUND),
+            "depth_background": sum(1 for entry in pending if entry[0] >= PRIORITY_BACKGROUND),
+            "max_length": self.max_length,
+            **self._stats,
+        }
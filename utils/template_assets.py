@@ -0,0 +1,114 @@
+"""
+模板静态资源的内存存储
+
+模板通过相对路径 (../fonts、../images) 引用 resources 目录下的字体、段位图标与赛季背景。
+启动时把这些文件一次性读入内存，浏览器页面以虚拟源 ASSET_ORIGIN 加载模板，
+对该源的请求由路由处理函数 (utils/browser.py) 直接从内存返回，不再逐次读取文件系统。
+"""
+
+import mimetypes
+import os
+from typing import Dict, Optional, Tuple
+from urllib.parse import unquote, urlparse
+
+from utils.config import settings
+from utils.logger import bot_logger
+
+# 页面加载模板时使用的虚拟源，不会产生真实的网络请求
+ASSET_ORIGIN = "http://finals.assets"
+# 静态资源的缓存头，资源在进程生命周期内不变
+ASSET_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# 模板目录本身 (页面的基准地址) 对应的空白文档
+BLANK_DOCUMENT = b"<!DOCTYPE html><html><head></head><body></body></html>"
+
+mimetypes.add_type("font/woff2", ".woff2")
+mimetypes.add_type("font/otf", ".otf")
+mimetypes.add_type("image/svg+xml", ".svg")
+
+
+class TemplateAssetStore:
+    """resources 目录的内存镜像，按相对路径 (posix 风格) 索引"""
+
+    def __init__(self, root: str, max_file_bytes: int = 8 * 1024 * 1024):
+        self.root = os.path.abspath(root)
+        self.max_file_bytes = max_file_bytes
+        self._assets: Dict[str, Tuple[bytes, str]] = {}
+        self.loaded = False
+        self._stats = {"hits": 0, "misses": 0, "disk_reads": 0}
+
+    def load(self) -> None:
+        """读取 root 下的所有文件 (超过单文件上限的除外)；同步方法，应在线程池中调用"""
+        assets: Dict[str, Tuple[bytes, str]] = {}
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                try:
+                    if os.path.getsize(path) > self.max_file_bytes:
+                        continue
+                    with open(path, "rb") as f:
+                        body = f.read()
+                except OSError as e:
+                    bot_logger.warning(f"[TemplateAssets] 读取 {path} 失败: {e}")
+                    continue
+                assets[os.path.relpath(path, self.root).replace(os.sep, "/")] = (body, self._content_type(path))
+        self._assets = assets
+        self.loaded = True
+        bot_logger.info(
+            f"[TemplateAssets] 已加载 {len(assets)} 个静态资源，"
+            f"共 {sum(len(body) for body, _ in assets.values()) / 1024 / 1024:.1f}MB"
+        )
+
+    @staticmethod
+    def _content_type(path: str) -> str:
+        return mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+    def base_url(self, template_dir: str) -> Optional[str]:
+        """模板目录在虚拟源下的基准地址；目录不在 root 之下时返回 None (继续使用 file://)"""
+        template_dir = os.path.abspath(template_dir)
+        if os.path.commonpath([self.root, template_dir]) != self.root:
+            return None
+        relative = os.path.relpath(template_dir, self.root).replace(os.sep, "/")
+        return f"{ASSET_ORIGIN}/" if relative == "." else f"{ASSET_ORIGIN}/{relative}/"
+
+    def resolve(self, url: str) -> Optional[Tuple[bytes, str]]:
+        """返回虚拟源地址对应的 (内容, Content-Type)；目录地址返回空白文档
+
+        内存中没有的文件 (启动后新增或超过单文件上限) 从磁盘读取，小文件读取后加入内存。
+        """
+        path = unquote(urlparse(url).path).lstrip("/")
+        if path == "" or path.endswith("/"):
+            return BLANK_DOCUMENT, "text/html; charset=utf-8"
+        asset = self._assets.get(path)
+        if asset is not None:
+            self._stats["hits"] += 1
+            return asset
+        full_path = os.path.abspath(os.path.join(self.root, path))
+        if os.path.commonpath([self.root, full_path]) != self.root or not os.path.isfile(full_path):
+            self._stats["misses"] += 1
+            return None
+        try:
+            with open(full_path, "rb") as f:
+                body = f.read()
+        except OSError:
+            self._stats["misses"] += 1
+            return None
+        self._stats["disk_reads"] += 1
+        asset = (body, self._content_type(full_path))
+        if len(body) <= self.max_file_bytes:
+            self._assets[path] = asset
+        return asset
+
+    def get_stats(self) -> Dict[str, int]:
+        """返回资源数、总字节数与命中情况"""
+        return {
+            "files": len(self._assets),
+            "bytes": sum(len(body) for body, _ in self._assets.values()),
+            **self._stats,
+        }
+
+
+# 全局实例
+template_assets = TemplateAssetStore(
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "resources"),
+    max_file_bytes=settings.IMAGE_ASSETS_MAX_FILE_BYTES,
+)